@@ -0,0 +1,74 @@
+"""
+Forward-decayed popularity scores, stored in log space.
+
+A score is the sum of weight * 2^((t - EPOCH) / half_life) over the events
+it counts (views, likes, bookmarks ...): newer events count exponentially
+more, and a row nobody touches never needs rewriting, so ORDER BY score
+is already the decayed ranking and can be served from an index.
+
+The sum itself leaves double range within a few years of EPOCH (its
+exponent grows by one every half-life), so columns hold its natural log
+instead. That grows only linearly - about 0.35 a day for a 2-day
+half-life - and events are added and taken back with log-sum-exp UPDATE
+expressions, so the ranking is unchanged and never overflows.
+
+An empty score is 0, the columns' default: strictly that is one event of
+weight 1 at EPOCH, which is negligible next to any real event by now.
+"""
+import math
+from datetime import datetime, timezone as dt_timezone
+
+from django.db.models import Case, F, FloatField, Value, When
+from django.db.models.functions import Abs, Exp, Greatest, Least, Ln
+from django.utils import timezone
+
+EPOCH = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+EMPTY = 0.0
+
+# exp() underflows below about -745 (and PostgreSQL raises on underflow);
+# terms that far apart don't change the sum anyway
+_MAX_GAP = 700.0
+# Taking back an event that is (numerically) the whole score empties it
+_MIN_REMAINDER = 1e-9
+
+
+def log_weight(weight: float, half_life, at: datetime = None) -> float:
+    """
+    Log-space score of one event.
+
+    Args:
+        weight: Event weight (> 0)
+        half_life: timedelta after which an event counts half as much as
+            one happening now
+        at: When the event happened (default: now)
+    """
+    age = (at or timezone.now()) - EPOCH
+    return math.log(weight) + math.log(2) * (age / half_life)
+
+
+def log_add(a: float, b: float) -> float:
+    """log(e^a + e^b), for combining scores in Python."""
+    high, low = max(a, b), min(a, b)
+    return high + math.log1p(math.exp(max(low - high, -_MAX_GAP)))
+
+
+def add_expression(field: str, value: float):
+    """UPDATE expression adding an event with log score `value` to a field."""
+    value = Value(value, output_field=FloatField())
+    return Greatest(F(field), value) + Ln(
+        Value(1.0) + Exp(-Least(Abs(F(field) - value), Value(_MAX_GAP)))
+    )
+
+
+def remove_expression(field: str, value: float):
+    """UPDATE expression taking back an event added with add_expression."""
+    threshold = value + _MIN_REMAINDER
+    value = Value(value, output_field=FloatField())
+    return Case(
+        When(
+            **{f'{field}__gt': threshold},
+            then=F(field) + Ln(Value(1.0) - Exp(Greatest(value - F(field), Value(-_MAX_GAP)))),
+        ),
+        default=Value(EMPTY),
+        output_field=FloatField(),
+    )
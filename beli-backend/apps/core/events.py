@@ -0,0 +1,217 @@
+"""
+Realtime event pub/sub for the SSE stream.
+
+Producers call publish() from ordinary (sync) code; messages go out once
+the surrounding transaction commits, so listeners never hear about rows
+they can't read yet. A message is (topic, event, data), e.g.
+('user:<id>', 'notification', {'id': ...}).
+
+On PostgreSQL messages travel over NOTIFY on CHANNEL, so every web process
+hears events published anywhere (API requests, the notification worker).
+Elsewhere they are handed straight to this process's broker - enough for a
+single-node dev server, but events published by other processes (e.g.
+process_notification_events) don't reach it.
+
+Each web process runs one EventBroker on its event loop: a single LISTEN
+connection (postgres) and a topic -> subscribers map. Subscribers have a
+bounded queue; one that falls MAX_PENDING messages behind has its backlog
+dropped and gets a single 'resync' event instead, so a slow client costs
+bounded memory and catches up with an incremental ?since= sync.
+"""
+import asyncio
+import json
+import logging
+from collections import defaultdict
+
+from django.db import connection, connections, transaction
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'beli_events'
+# NOTIFY payloads must stay under 8000 bytes
+PAYLOAD_LIMIT = 7900
+
+
+def publish(topic: str, event: str, data: dict) -> None:
+    """Publish one message after the current transaction commits."""
+    publish_many([(topic, event, data)])
+
+
+def publish_many(messages) -> None:
+    """
+    Publish (topic, event, data) messages after the current transaction
+    commits (immediately outside a transaction).
+    """
+    messages = [[topic, event, data] for topic, event, data in messages]
+    if messages:
+        transaction.on_commit(lambda: _send(messages))
+
+
+def _send(messages: list) -> None:
+    if connection.vendor != 'postgresql':
+        EventBroker.publish_threadsafe(json.loads(json.dumps(messages, default=str)))
+        return
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT pg_notify(%s, payload) FROM unnest(%s::text[]) AS payload',
+                [CHANNEL, _payloads(messages)]
+            )
+    except Exception:
+        # Realtime delivery is best effort - clients still sync by polling
+        logger.exception('Failed to publish %d realtime events', len(messages))
+
+
+def _payloads(messages: list) -> list:
+    """Pack messages into JSON arrays of at most PAYLOAD_LIMIT bytes."""
+    payloads, chunk, size = [], [], 2
+    for message in messages:
+        encoded = json.dumps(message, default=str, separators=(',', ':'))
+        if chunk and size + len(encoded) + 1 > PAYLOAD_LIMIT:
+            payloads.append('[' + ','.join(chunk) + ']')
+            chunk, size = [], 2
+        chunk.append(encoded)
+        size += len(encoded) + 1
+    if chunk:
+        payloads.append('[' + ','.join(chunk) + ']')
+    return payloads
+
+
+class Subscription:
+    """One stream's view of the broker: a bounded queue of (event, data)."""
+
+    def __init__(self, broker: 'EventBroker', topics: list, max_pending: int):
+        self.broker = broker
+        self.topics = topics
+        self.queue = asyncio.Queue(max_pending)
+        self.dropped = 0
+
+    def offer(self, event: str, data) -> None:
+        if self.queue.full():
+            # Too far behind - drop the backlog and tell the client to resync
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(('resync', {}))
+            self.dropped += 1
+            return
+        self.queue.put_nowait((event, data))
+
+    async def get(self, timeout: float):
+        """Next (event, data), or None after timeout seconds of silence."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self) -> None:
+        self.broker.unsubscribe(self)
+
+
+class EventBroker:
+    """
+    Per-process fan-out of published messages to stream subscribers.
+
+    Lives on the ASGI event loop; get() must be called from it.
+    """
+
+    MAX_PENDING = 100
+    MAX_SUBSCRIBERS = 10000
+    RECONNECT_SECONDS = 2
+
+    _instance = None
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.topics = defaultdict(set)  # topic -> Subscriptions
+        self.subscribers = 0
+        self.listener = None
+        if connections['default'].vendor == 'postgresql':
+            self.listener = loop.create_task(self._listen())
+
+    @classmethod
+    def get(cls) -> 'EventBroker':
+        loop = asyncio.get_running_loop()
+        if cls._instance is None or cls._instance.loop is not loop:
+            cls._instance = cls(loop)
+        return cls._instance
+
+    @classmethod
+    def publish_threadsafe(cls, messages: list) -> None:
+        """Dispatch messages in this process (no-op when nothing listens)."""
+        broker = cls._instance
+        if broker is not None and not broker.loop.is_closed():
+            broker.loop.call_soon_threadsafe(broker.dispatch, messages)
+
+    def subscribe(self, topics: list):
+        """
+        Returns:
+            Subscription, or None when the process is at MAX_SUBSCRIBERS
+        """
+        if self.subscribers >= self.MAX_SUBSCRIBERS:
+            return None
+        subscription = Subscription(self, topics, self.MAX_PENDING)
+        for topic in topics:
+            self.topics[topic].add(subscription)
+        self.subscribers += 1
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        for topic in subscription.topics:
+            subscribers = self.topics.get(topic)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self.topics[topic]
+        self.subscribers -= 1
+
+    def dispatch(self, messages: list) -> None:
+        for topic, event, data in messages:
+            for subscription in tuple(self.topics.get(topic, ())):
+                subscription.offer(event, data)
+
+    def _resync_all(self) -> None:
+        for subscription in {s for subscribers in self.topics.values() for s in subscribers}:
+            subscription.offer('resync', {})
+
+    def _connect(self):
+        import psycopg2
+
+        params = connections['default'].get_connection_params()
+        params.pop('cursor_factory', None)
+        conn = psycopg2.connect(**params)
+        conn.set_session(autocommit=True)
+        with conn.cursor() as cursor:
+            cursor.execute(f'LISTEN {CHANNEL}')
+        return conn
+
+    async def _listen(self) -> None:
+        """Relay NOTIFYs on CHANNEL to subscribers, reconnecting on errors."""
+        reconnecting = False
+        while True:
+            conn = None
+            try:
+                conn = await self.loop.run_in_executor(None, self._connect)
+                if reconnecting:
+                    # Anything published while we were away is lost
+                    self._resync_all()
+                reconnecting = True
+
+                ready = asyncio.Event()
+                self.loop.add_reader(conn.fileno(), ready.set)
+                try:
+                    while True:
+                        await ready.wait()
+                        ready.clear()
+                        conn.poll()
+                        while conn.notifies:
+                            self.dispatch(json.loads(conn.notifies.pop(0).payload))
+                finally:
+                    self.loop.remove_reader(conn.fileno())
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception('Realtime listener failed; reconnecting')
+                await asyncio.sleep(self.RECONNECT_SECONDS)
+            finally:
+                if conn is not None:
+                    conn.close()
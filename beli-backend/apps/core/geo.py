@@ -0,0 +1,67 @@
+"""
+Small geographic helpers (no PostGIS round trips).
+"""
+import math
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance between two points in kilometres."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def centroid(points: list) -> tuple:
+    """Arithmetic mean of (lat, lng) points, or None for no points."""
+    if not points:
+        return None
+    return (
+        sum(lat for lat, _ in points) / len(points),
+        sum(lng for _, lng in points) / len(points),
+    )
+
+
+def geometric_median(points: list, iterations: int = 50, tolerance_km: float = 0.01) -> tuple:
+    """
+    Point minimizing the total distance to all points (Weiszfeld's algorithm).
+
+    Unlike the centroid it isn't dragged toward one far-away participant,
+    so it's a fairer "meet in the middle" spot for a group.
+
+    Args:
+        points: (lat, lng) tuples
+        iterations: Maximum refinement steps
+        tolerance_km: Stop once a step moves less than this
+
+    Returns:
+        (lat, lng), or None for no points
+    """
+    if not points:
+        return None
+    if len(points) <= 2:
+        return centroid(points)
+
+    current = centroid(points)
+    for _ in range(iterations):
+        num_lat = num_lng = denom = 0.0
+        for lat, lng in points:
+            distance = haversine_km(current[0], current[1], lat, lng)
+            if distance < 1e-9:
+                # Sitting on a data point - Weiszfeld is undefined there
+                return current
+            weight = 1.0 / distance
+            num_lat += lat * weight
+            num_lng += lng * weight
+            denom += weight
+
+        updated = (num_lat / denom, num_lng / denom)
+        moved = haversine_km(current[0], current[1], updated[0], updated[1])
+        current = updated
+        if moved < tolerance_km:
+            break
+
+    return current
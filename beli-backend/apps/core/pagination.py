@@ -0,0 +1,55 @@
+"""
+Keyset (cursor) pagination helpers.
+
+Cursors are opaque base64-encoded JSON holding the sort key of the last
+row on a page. The next page filters strictly past that key, so every
+page is an index range scan no matter how deep the client scrolls.
+"""
+import base64
+import json
+
+from django.db.models import Q
+
+
+def encode_cursor(values: dict) -> str:
+    """Encode the last row's sort key as an opaque cursor."""
+    raw = json.dumps(values, default=str, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> dict:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError('Invalid cursor') from e
+
+    if not isinstance(values, dict):
+        raise ValueError('Invalid cursor')
+    return values
+
+
+def keyset_filter(fields: list, values: dict) -> Q:
+    """
+    Build the "strictly after" filter for a descending multi-column sort.
+
+    For fields (a, b, c) this is:
+        a < A OR (a = A AND b < B) OR (a = A AND b = B AND c < C)
+
+    Args:
+        fields: Sort fields in order, all descending
+        values: Field -> value of the last row on the previous page
+    """
+    condition = Q()
+    for i, field in enumerate(fields):
+        clause = Q(**{f'{field}__lt': values[field]})
+        for previous in fields[:i]:
+            clause &= Q(**{previous: values[previous]})
+        condition |= clause
+    return condition
@@ -0,0 +1,38 @@
+"""
+Tests for forward-decayed scores.
+"""
+import math
+from datetime import timedelta
+
+import pytest
+
+from . import decay
+
+HALF_LIFE = timedelta(days=2)
+
+
+def test_log_weight_doubles_every_half_life():
+    now = decay.EPOCH + timedelta(days=365)
+
+    later = decay.log_weight(3.0, HALF_LIFE, now + HALF_LIFE)
+
+    assert later - decay.log_weight(3.0, HALF_LIFE, now) == pytest.approx(math.log(2))
+    assert decay.log_weight(1.0, HALF_LIFE, decay.EPOCH) == decay.EMPTY
+
+
+def test_log_add_sums_in_log_space():
+    a, b = math.log(3.0), math.log(5.0)
+
+    assert decay.log_add(a, b) == pytest.approx(math.log(8.0))
+    assert decay.log_add(b, a) == decay.log_add(a, b)
+
+
+def test_scores_far_past_epoch_stay_finite():
+    # 2^(20 years / 2 days) is far outside double range; its log isn't
+    at = decay.EPOCH + timedelta(days=365 * 20)
+    old = decay.log_weight(20.0, HALF_LIFE, decay.EPOCH)
+    new = decay.log_weight(1.0, HALF_LIFE, at)
+
+    assert math.isfinite(new)
+    assert decay.log_add(old, new) == new
+    assert decay.log_add(new, new) == pytest.approx(new + math.log(2))
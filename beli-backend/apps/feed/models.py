@@ -37,6 +37,10 @@ class ActivityInteraction(models.Model):
         # This table may not exist yet - we'll create it
         db_table = 'activity_interactions'
         unique_together = ('user', 'rating', 'interaction_type')
+        indexes = [
+            # Per-rating like counts (review sort=most-liked)
+            models.Index(fields=['rating', 'interaction_type']),
+        ]
 
 
 class ActivityComment(models.Model):
@@ -62,3 +66,20 @@ class ActivityComment(models.Model):
     class Meta:
         db_table = 'activity_comments'
         ordering = ['created_at']
+
+
+class RatingTombstone(models.Model):
+    """
+    Record of a deleted rating - maps to Supabase rating_tombstones table.
+
+    Filled by a trigger on ratings DELETE so incremental feed sync can
+    tell clients which activities to drop.
+    """
+    rating_id = models.UUIDField(primary_key=True)
+    user_id = models.UUIDField()
+    restaurant_id = models.UUIDField()
+    deleted_at = models.DateTimeField()
+
+    class Meta:
+        managed = False  # Maintained by database trigger
+        db_table = 'rating_tombstones'
@@ -0,0 +1,236 @@
+"""
+Feed services - activity queries, incremental sync and interactions.
+
+The feed is derived from the ratings table, so "what changed since X"
+is answered from ratings.updated_at plus the rating_tombstones table
+(filled by a trigger when a rating is deleted).
+"""
+from django.db.models import Max
+
+from apps.core.events import publish, publish_many
+from apps.core.sync import Watermark, changed_after, make_etag
+from apps.notifications.services import NotificationEvents
+from apps.users.models import Rating, UserFollow
+from .models import ActivityComment, ActivityInteraction, RatingTombstone
+
+
+class FeedSyncService:
+    """
+    Builds feed pages, ETags and since-watermark deltas.
+
+    A scope is a list of user IDs whose activities make up the feed,
+    or None for the global feed.
+    """
+    FEED_STATUS = 'been'  # Only "been" ratings appear in the feed
+
+    @classmethod
+    def get_feed_scope(cls, user_id: str = None):
+        """
+        Get the user IDs whose activities make up a personalized feed.
+
+        Args:
+            user_id: Viewer's UUID (None = global feed)
+
+        Returns:
+            List of user IDs (followed users + self), or None for global
+        """
+        if not user_id:
+            return None
+
+        following_ids = [
+            str(uid) for uid in
+            UserFollow.objects.filter(follower_id=user_id)
+            .values_list('following_id', flat=True)
+        ]
+        following_ids.append(str(user_id))
+        return following_ids
+
+    @classmethod
+    def _scoped(cls, queryset, scope):
+        if scope is None:
+            return queryset
+        return queryset.filter(user_id__in=scope)
+
+    @classmethod
+    def get_activities(cls, scope, limit: int = 50):
+        """Latest feed activities for a scope, newest first."""
+        return cls._scoped(
+            Rating.objects.filter(status=cls.FEED_STATUS), scope
+        ).select_related('user', 'restaurant').order_by('-created_at')[:limit]
+
+    @classmethod
+    def get_sync_state(cls, scope, *extra) -> tuple:
+        """
+        Compute the ETag and current watermark for a feed scope.
+
+        Any insert/update bumps ratings.updated_at (including status changes
+        out of the feed) and any delete adds a tombstone, so the two maxima
+        plus the scope itself identify the feed's state in two index reads.
+
+        Returns:
+            (etag, watermark) - watermark is None for an empty scope
+        """
+        last_update = cls._scoped(Rating.objects.all(), scope).aggregate(
+            last=Max('updated_at')
+        )['last']
+        last_delete = cls._scoped(RatingTombstone.objects.all(), scope).aggregate(
+            last=Max('deleted_at')
+        )['last']
+        scope_key = 'global' if scope is None else ','.join(sorted(scope))
+
+        etag = make_etag('feed', scope_key, last_update, last_delete, *extra)
+        return etag, max(filter(None, [last_update, last_delete]), default=None)
+
+    @classmethod
+    def get_changes(cls, scope, since, limit: int = 50) -> dict:
+        """
+        Get activities changed after a watermark.
+
+        Args:
+            scope: User IDs in the feed (None = global)
+            since: Watermark from the client
+            limit: Maximum changed ratings to return
+
+        Returns:
+            Dict with 'items' (Rating objects), 'deleted' (rating IDs),
+            'watermark' (Watermark to send next) and 'hasMore'
+        """
+        changed = list(
+            cls._scoped(Rating.objects.filter(changed_after(since)), scope)
+            .select_related('user', 'restaurant')
+            .order_by('updated_at', 'id')[:limit + 1]
+        )
+        has_more = len(changed) > limit
+        changed = changed[:limit]
+
+        # A rating that moved out of "been" leaves the feed - tombstone it
+        items = [r for r in changed if r.status == cls.FEED_STATUS]
+        deleted = [str(r.id) for r in changed if r.status != cls.FEED_STATUS]
+
+        # Tombstones at the watermark's own instant went out with the page
+        # that set it, so these only need to be strictly newer
+        tombstones = cls._scoped(
+            RatingTombstone.objects.filter(deleted_at__gt=since.timestamp), scope
+        )
+        if has_more:
+            # Keep the watermark consistent: don't skip past unsent updates
+            tombstones = tombstones.filter(deleted_at__lte=changed[-1].updated_at)
+
+        watermark = since
+        for rating_id, deleted_at in tombstones.values_list('rating_id', 'deleted_at'):
+            deleted.append(str(rating_id))
+            if deleted_at > watermark.timestamp:
+                watermark = Watermark(deleted_at)
+
+        if changed and changed[-1].updated_at >= watermark.timestamp:
+            watermark = Watermark(changed[-1].updated_at, changed[-1].id)
+
+        return {
+            'items': items,
+            'deleted': deleted,
+            'watermark': watermark,
+            'hasMore': has_more,
+        }
+
+
+class FeedEvents:
+    """
+    Realtime feed updates for the SSE stream.
+
+    Published on feed:<author id>; streams subscribe to the topics of
+    their feed scope and refetch with ?since= when told something moved.
+    """
+
+    @classmethod
+    def topic(cls, user_id) -> str:
+        return f'feed:{user_id}'
+
+    @classmethod
+    def rating_saved(cls, rating, created: bool = False) -> None:
+        """Announce a new or updated rating."""
+        cls.ratings_saved([(rating.user_id, rating.id, rating.status, created)])
+
+    @classmethod
+    def ratings_saved(cls, ratings) -> None:
+        """
+        Announce new or updated ratings in one batch.
+
+        Args:
+            ratings: (user_id, rating_id, status, created) tuples. Feed
+                ratings go out as 'activity'; an updated rating outside the
+                feed status may just have left the feed, so it goes out as
+                'activity_deleted' (as ?since= sync reports it).
+        """
+        publish_many(
+            (
+                cls.topic(user_id),
+                'activity' if status == FeedSyncService.FEED_STATUS else 'activity_deleted',
+                {'id': rating_id},
+            )
+            for user_id, rating_id, status, created in ratings
+            if status == FeedSyncService.FEED_STATUS or not created
+        )
+
+    @classmethod
+    def rating_deleted(cls, user_id, rating_id) -> None:
+        publish(cls.topic(user_id), 'activity_deleted', {'id': rating_id})
+
+
+class FeedInteractionService:
+    """
+    Likes and comments on feed activities (ratings).
+
+    Each write queues a notification event for the rating's owner; the
+    notification itself is built by the fan-out worker.
+    """
+
+    @classmethod
+    def like(cls, rating_id, user_id) -> bool:
+        """
+        Like an activity.
+
+        Returns:
+            True if newly liked, False if it already was
+
+        Raises:
+            Rating.DoesNotExist: If the activity doesn't exist
+        """
+        rating = Rating.objects.only('id', 'user_id', 'restaurant_id').get(id=rating_id)
+        _, created = ActivityInteraction.objects.get_or_create(
+            rating=rating, user_id=user_id, interaction_type='like'
+        )
+        if created:
+            NotificationEvents.emit(
+                'rating_liked', rating.user_id, user_id, target_restaurant_id=rating.restaurant_id
+            )
+        return created
+
+    @classmethod
+    def unlike(cls, rating_id, user_id) -> bool:
+        """Remove a like. Returns True if one was removed."""
+        deleted, _ = ActivityInteraction.objects.filter(
+            rating_id=rating_id, user_id=user_id, interaction_type='like'
+        ).delete()
+        if deleted:
+            rating = Rating.objects.only('id', 'user_id', 'restaurant_id').filter(id=rating_id).first()
+            if rating is not None:
+                NotificationEvents.retract(
+                    'rating_liked', rating.user_id, user_id, target_restaurant_id=rating.restaurant_id
+                )
+        return deleted > 0
+
+    @classmethod
+    def comment(cls, rating_id, user_id, content: str) -> ActivityComment:
+        """
+        Comment on an activity.
+
+        Raises:
+            Rating.DoesNotExist: If the activity doesn't exist
+        """
+        rating = Rating.objects.only('id', 'user_id', 'restaurant_id').get(id=rating_id)
+        comment = ActivityComment.objects.create(rating=rating, user_id=user_id, content=content)
+        NotificationEvents.emit(
+            'comment', rating.user_id, user_id,
+            target_restaurant_id=rating.restaurant_id, comment_text=content,
+        )
+        return comment
@@ -0,0 +1,68 @@
+"""
+Tests for feed incremental sync.
+"""
+import uuid
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from apps.core.sync import Watermark, format_watermark, parse_since
+from apps.users.models import Rating
+from .models import RatingTombstone
+from .services import FeedSyncService
+
+
+def test_watermark_round_trips():
+    now = timezone.now()
+    row_id = uuid.uuid4()
+    assert parse_since(format_watermark(Watermark(now, row_id))) == Watermark(now, row_id)
+    assert parse_since(format_watermark(now)) == Watermark(now)
+    with pytest.raises(ValueError):
+        parse_since(f'{now.isoformat()},not-a-uuid')
+
+
+def _sync_all(scope, since, limit):
+    seen, deleted, pages = [], [], 0
+    while True:
+        changes = FeedSyncService.get_changes(scope, since, limit)
+        seen += [str(rating.id) for rating in changes['items']]
+        deleted += changes['deleted']
+        since = parse_since(format_watermark(changes['watermark']))
+        pages += 1
+        if not changes['hasMore']:
+            return seen, deleted, pages
+
+
+@pytest.mark.django_db
+def test_changes_page_through_rows_sharing_a_timestamp(make_user, make_restaurant):
+    user = make_user()
+    ratings = [
+        Rating.objects.create(user=user, restaurant=make_restaurant(), status='been')
+        for _ in range(7)
+    ]
+    # A bulk import writes a whole chunk with one timestamp
+    stamp = timezone.now()
+    Rating.objects.filter(user=user).update(updated_at=stamp)
+    RatingTombstone.objects.create(
+        rating_id=uuid.uuid4(), user_id=user.id, restaurant_id=uuid.uuid4(), deleted_at=stamp
+    )
+
+    seen, deleted, pages = _sync_all([str(user.id)], Watermark(stamp - timedelta(seconds=1)), limit=3)
+
+    assert sorted(seen) == sorted(str(rating.id) for rating in ratings)
+    assert len(deleted) == 1
+    assert pages == 3
+
+
+@pytest.mark.django_db
+def test_bare_timestamp_watermark_skips_rows_at_that_instant(make_user, make_restaurant):
+    user = make_user()
+    Rating.objects.create(user=user, restaurant=make_restaurant(), status='been')
+    stamp = timezone.now()
+    Rating.objects.filter(user=user).update(updated_at=stamp)
+
+    changes = FeedSyncService.get_changes([str(user.id)], Watermark(stamp), 10)
+
+    assert changes['items'] == []
+    assert changes['watermark'] == Watermark(stamp)
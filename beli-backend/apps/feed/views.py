@@ -8,8 +8,10 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.db.models import Q
 
-from apps.users.models import Rating, User, UserFollow
-from .serializers import FeedActivitySerializer
+from apps.core.sync import etag_matches, format_watermark, not_modified, parse_since
+from apps.users.models import Rating, User
+from .serializers import ActivityCommentSerializer, FeedActivitySerializer
+from .services import FeedInteractionService, FeedSyncService
 
 
 class FeedViewSet(viewsets.ViewSet):
@@ -17,8 +19,8 @@ class FeedViewSet(viewsets.ViewSet):
     API endpoint for activity feed.
 
     Supports:
-    - GET /api/v1/feed/ - Get activity feed
-    - GET /api/v1/feed/user/{userId}/ - Get user's activities
+    - GET /api/v1/feed/ - Get activity feed (?since= for incremental sync)
+    - GET /api/v1/feed/user/{userId}/ - Get user's activities (?since= supported)
     - POST /api/v1/feed/{id}/like/ - Like an activity
     - POST /api/v1/feed/{id}/unlike/ - Unlike an activity
     - POST /api/v1/feed/{id}/bookmark/ - Bookmark an activity
@@ -33,32 +35,18 @@ class FeedViewSet(viewsets.ViewSet):
         Maps to: FeedService.getActivityFeed()
 
         Returns activities from followed users, sorted by date.
+
+        Incremental sync:
+        - If-None-Match: returns 304 when the feed hasn't changed
+        - ?since=<watermark>: returns only changed activities plus
+          tombstones for deleted ones
         """
         user_id = request.query_params.get('userId')
         limit = int(request.query_params.get('limit', 50))
 
         # Get the feed - either personalized or global
-        if user_id:
-            # Get users this person follows
-            following_ids = list(
-                UserFollow.objects.filter(follower_id=user_id)
-                .values_list('following_id', flat=True)
-            )
-            # Include own activities
-            following_ids.append(user_id)
-
-            activities = Rating.objects.filter(
-                user_id__in=following_ids,
-                status='been'  # Only show "been" activities in feed
-            ).select_related('user', 'restaurant').order_by('-created_at')[:limit]
-        else:
-            # Global feed
-            activities = Rating.objects.filter(
-                status='been'
-            ).select_related('user', 'restaurant').order_by('-created_at')[:limit]
-
-        serializer = FeedActivitySerializer(activities, many=True)
-        return Response(serializer.data)
+        scope = FeedSyncService.get_feed_scope(user_id)
+        return self._sync_response(request, scope, limit)
 
     @action(detail=False, methods=['get'], url_path='user/(?P<user_id>[^/.]+)')
     def user_activities(self, request, user_id=None):
@@ -66,16 +54,42 @@ class FeedViewSet(viewsets.ViewSet):
         Get activities for a specific user.
 
         Maps to: FeedService.getUserActivities()
+
+        Supports the same If-None-Match / ?since= sync as the main feed.
         """
         limit = int(request.query_params.get('limit', 50))
+        return self._sync_response(request, [str(user_id)], limit)
+
+    def _sync_response(self, request, scope, limit):
+        """Serve a full page, a delta, or 304 for a feed scope."""
+        try:
+            since = parse_since(request.query_params.get('since'))
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        etag, watermark = FeedSyncService.get_sync_state(scope, limit, since)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
+        if since is None:
+            activities = FeedSyncService.get_activities(scope, limit)
+            response = Response(FeedActivitySerializer(activities, many=True).data)
+            # Starting point for the client's first ?since= request
+            response['X-Sync-Watermark'] = format_watermark(watermark) or ''
+        else:
+            changes = FeedSyncService.get_changes(scope, since, limit)
+            if not changes['items'] and not changes['deleted']:
+                return not_modified(etag)
 
-        activities = Rating.objects.filter(
-            user_id=user_id,
-            status='been'
-        ).select_related('user', 'restaurant').order_by('-created_at')[:limit]
+            response = Response({
+                'items': FeedActivitySerializer(changes['items'], many=True).data,
+                'deleted': changes['deleted'],
+                'watermark': format_watermark(changes['watermark']),
+                'hasMore': changes['hasMore'],
+            })
 
-        serializer = FeedActivitySerializer(activities, many=True)
-        return Response(serializer.data)
+        response['ETag'] = etag
+        return response
 
     @action(detail=True, methods=['post'])
     def like(self, request, pk=None):
@@ -91,7 +105,13 @@ class FeedViewSet(viewsets.ViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # For now, just return success - interactions table may not exist
+        try:
+            FeedInteractionService.like(pk, user_id)
+        except Rating.DoesNotExist:
+            return Response(
+                {'error': 'Activity not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
         return Response({'success': True, 'activityId': pk, 'liked': True})
 
     @action(detail=True, methods=['post'])
@@ -102,6 +122,13 @@ class FeedViewSet(viewsets.ViewSet):
         Maps to: FeedService.unlikeActivity()
         """
         user_id = request.data.get('userId')
+        if not user_id:
+            return Response(
+                {'error': 'userId is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        FeedInteractionService.unlike(pk, user_id)
         return Response({'success': True, 'activityId': pk, 'liked': False})
 
     @action(detail=True, methods=['post'])
@@ -140,11 +167,11 @@ class FeedViewSet(viewsets.ViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        import uuid
-        # Return mock comment - table may not exist
-        return Response({
-            'id': str(uuid.uuid4()),
-            'userId': user_id,
-            'content': content,
-            'timestamp': '2024-01-01T00:00:00Z',
-        })
+        try:
+            comment = FeedInteractionService.comment(pk, user_id, content)
+        except Rating.DoesNotExist:
+            return Response(
+                {'error': 'Activity not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response(ActivityCommentSerializer(comment).data)
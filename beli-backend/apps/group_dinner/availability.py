@@ -0,0 +1,305 @@
+"""
+Table availability for group dinner.
+
+There is no external booking system behind reservations, so availability is
+modelled from what we have: Restaurant.hours says when a restaurant seats
+people, and every non-cancelled Reservation row occupies tables for the
+length of a meal. Each restaurant-day is compiled once into slot bitmaps
+and cached, so checking the 20 restaurants on a suggestions page is a
+cache get_many plus, for misses, one restaurants query and one
+reservations query.
+
+Times are interpreted in settings.TIME_ZONE; restaurants carry no zone of
+their own.
+"""
+import math
+import re
+from datetime import datetime, time, timedelta
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from apps.restaurants.models import Restaurant
+from .models import Reservation
+
+SLOT_MINUTES = 30
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+DINING_SLOTS = 3  # a table is held for 90 minutes
+# Slot bitmaps run past midnight so late seatings can finish the meal
+HORIZON_SLOTS = SLOTS_PER_DAY + DINING_SLOTS
+
+WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+
+_HOURS_RE = re.compile(
+    r'^\s*(\d{1,2})(?::(\d{2}))?\s*([AaPp][Mm])\s*[-–]\s*(\d{1,2})(?::(\d{2}))?\s*([AaPp][Mm])\s*$'
+)
+
+
+def _minutes(hour: str, minute: str, meridiem: str) -> int:
+    hour = int(hour) % 12 + (12 if meridiem.lower() == 'pm' else 0)
+    return hour * 60 + int(minute or 0)
+
+
+def parse_hours(value) -> list:
+    """
+    Parse one day of Restaurant.hours ("11:00 AM - 10:00 PM").
+
+    Returns:
+        List of (open_minute, close_minute) from that day's midnight; the
+        close runs past 1440 for overnight hours. [] when closed, None when
+        the value can't be understood.
+    """
+    if not isinstance(value, str):
+        return None
+    text = value.strip().lower()
+    if text == 'closed':
+        return []
+    if '24 hours' in text:
+        return [(0, 24 * 60)]
+
+    intervals = []
+    for part in text.split(','):
+        match = _HOURS_RE.match(part)
+        if not match:
+            return None
+        opens = _minutes(*match.group(1, 2, 3))
+        closes = _minutes(*match.group(4, 5, 6))
+        if closes <= opens:
+            closes += 24 * 60
+        intervals.append((opens, closes))
+    return intervals
+
+
+def slot_label(slot: int) -> str:
+    """'7:30 PM' for a slot index within the day."""
+    hour, minute = divmod(slot * SLOT_MINUTES, 60)
+    return f"{hour % 12 or 12}:{minute:02d} {'PM' if hour >= 12 else 'AM'}"
+
+
+class DaySchedule:
+    """
+    One restaurant's seating capacity for one day.
+
+    Attributes:
+        open_mask: Bit i is set when the restaurant is open for all of slot i
+        booked: Tables held in each slot (HORIZON_SLOTS entries)
+        offers: (slot, party_size, reservation_id) of reservations their
+            holders have put up for claiming
+    """
+
+    # restaurants has no capacity column; assume a typical dining room
+    TABLES = 15
+    TABLE_SEATS = 4
+
+    def __init__(self, open_mask: int, booked: tuple, offers: tuple):
+        self.open_mask = open_mask
+        self.booked = booked
+        self.offers = offers
+
+    @classmethod
+    def build(cls, hours, day, reservations) -> 'DaySchedule':
+        """
+        Args:
+            hours: Restaurant.hours dict
+            day: Local date
+            reservations: (local start datetime, party_size, status, id) rows
+                overlapping the day
+        """
+        open_mask = cls._open_mask(hours or {}, day)
+
+        booked = [0] * HORIZON_SLOTS
+        offers = []
+        day_start = datetime.combine(day, time.min)
+        for starts_at, party_size, status, reservation_id in reservations:
+            first = math.floor((starts_at - day_start).total_seconds() / 60 / SLOT_MINUTES)
+            tables = cls.tables_for(party_size)
+            for slot in range(max(first, 0), min(first + DINING_SLOTS, HORIZON_SLOTS)):
+                booked[slot] += tables
+            if status == 'available' and 0 <= first < SLOTS_PER_DAY:
+                offers.append((first, party_size, str(reservation_id)))
+
+        return cls(open_mask, tuple(booked), tuple(offers))
+
+    @staticmethod
+    def _open_mask(hours: dict, day) -> int:
+        hours = {str(k).lower(): v for k, v in hours.items()}
+        today = parse_hours(hours.get(WEEKDAYS[day.weekday()]))
+        yesterday = parse_hours(hours.get(WEEKDAYS[(day.weekday() - 1) % 7]))
+        if today is None:
+            # Unknown hours - don't hide the restaurant, assume it's open
+            return (1 << HORIZON_SLOTS) - 1
+
+        intervals = list(today)
+        # Last night's hours spilling past midnight
+        intervals += [(0, closes - 24 * 60) for _, closes in yesterday or () if closes > 24 * 60]
+
+        mask = 0
+        for opens, closes in intervals:
+            first = math.ceil(opens / SLOT_MINUTES)
+            last = min(closes // SLOT_MINUTES, HORIZON_SLOTS)
+            for slot in range(first, last):
+                mask |= 1 << slot
+        return mask
+
+    @classmethod
+    def tables_for(cls, party_size: int) -> int:
+        return max(1, math.ceil(party_size / cls.TABLE_SEATS))
+
+    def seating_mask(self, party_size: int) -> int:
+        """
+        Slots where a party can sit down.
+
+        Bit s is set when slots s .. s + DINING_SLOTS - 1 are all open with
+        enough free tables, or when a reservation for at least party_size
+        is up for claiming at slot s.
+        """
+        need = self.tables_for(party_size)
+        free = self.open_mask
+        for slot, held in enumerate(self.booked):
+            if held and self.TABLES - held < need:
+                free &= ~(1 << slot)
+
+        seatable = free
+        for offset in range(1, DINING_SLOTS):
+            seatable &= free >> offset
+        seatable &= (1 << SLOTS_PER_DAY) - 1
+
+        for slot, size, _ in self.offers:
+            if size >= party_size:
+                seatable |= 1 << slot
+        return seatable
+
+    def offers_at(self, slot: int, party_size: int) -> list:
+        return [rid for offer_slot, size, rid in self.offers if offer_slot == slot and size >= party_size]
+
+    def to_cache(self) -> tuple:
+        return (self.open_mask, self.booked, self.offers)
+
+
+class AvailabilityService:
+    """
+    Batched "which of these restaurants can seat P people at T" checks.
+
+    Compiled DaySchedules are cached briefly: reservations are also written
+    outside Django, so the TTL bounds staleness, and the claim paths here
+    invalidate the day they touch.
+    """
+
+    CACHE_TTL = 60  # 1 minute
+    ALTERNATIVES_WINDOW = timedelta(hours=2)
+    DEFAULT_DINNER_TIME = time(19, 0)
+
+    @staticmethod
+    def cache_key(restaurant_id, day) -> str:
+        return f"availability:{restaurant_id}:{day.isoformat()}"
+
+    @classmethod
+    def default_time(cls):
+        """Tonight at DEFAULT_DINNER_TIME, or tomorrow's if that has passed."""
+        now = timezone.localtime()
+        tonight = timezone.make_aware(datetime.combine(now.date(), cls.DEFAULT_DINNER_TIME))
+        return tonight if tonight > now else tonight + timedelta(days=1)
+
+    @classmethod
+    def get_schedules(cls, restaurant_ids, day) -> dict:
+        """
+        DaySchedules for many restaurants on one local date.
+
+        Returns:
+            restaurant id (str) -> DaySchedule; unknown restaurants are omitted
+        """
+        restaurant_ids = list(dict.fromkeys(str(rid) for rid in restaurant_ids))
+        keys = {rid: cls.cache_key(rid, day) for rid in restaurant_ids}
+        cached = cache.get_many(list(keys.values()))
+        schedules = {rid: DaySchedule(*cached[key]) for rid, key in keys.items() if key in cached}
+
+        missing = [rid for rid in restaurant_ids if rid not in schedules]
+        if missing:
+            day_start = timezone.make_aware(datetime.combine(day, time.min))
+            held_for = timedelta(minutes=SLOT_MINUTES * DINING_SLOTS)
+            rows = {rid: [] for rid in missing}
+            reservations = Reservation.objects.filter(
+                restaurant_id__in=missing,
+                date_time__gt=day_start - held_for,
+                date_time__lt=day_start + timedelta(minutes=SLOT_MINUTES * HORIZON_SLOTS),
+            ).exclude(status='cancelled').values_list(
+                'restaurant_id', 'date_time', 'party_size', 'status', 'id'
+            )
+            for rid, date_time, party_size, status, reservation_id in reservations:
+                local = timezone.localtime(date_time).replace(tzinfo=None)
+                rows[str(rid)].append((local, party_size, status, reservation_id))
+
+            built = {
+                str(rid): DaySchedule.build(hours, day, rows[str(rid)])
+                for rid, hours in Restaurant.objects.filter(id__in=missing).values_list('id', 'hours')
+            }
+            cache.set_many(
+                {keys[rid]: schedule.to_cache() for rid, schedule in built.items()},
+                cls.CACHE_TTL
+            )
+            schedules.update(built)
+
+        return schedules
+
+    @classmethod
+    def check(cls, restaurant_ids, party_size: int, at=None) -> dict:
+        """
+        Check many restaurants for a table at one time.
+
+        Args:
+            restaurant_ids: Restaurant UUIDs
+            party_size: Number of diners
+            at: Aware datetime (default: default_time())
+
+        Returns:
+            restaurant id (str) -> {available, dateTime, partySize,
+            timeSlots (seatable slots within ALTERNATIVES_WINDOW of the
+            requested time), reservationIds (claimable at that time)}
+        """
+        at = timezone.localtime(at or cls.default_time())
+        day = at.date()
+        slot = (at.hour * 60 + at.minute) // SLOT_MINUTES
+        window = int(cls.ALTERNATIVES_WINDOW.total_seconds() // 60 // SLOT_MINUTES)
+        nearby = range(max(slot - window, 0), min(slot + window + 1, SLOTS_PER_DAY))
+        slot_start = at.replace(
+            hour=slot * SLOT_MINUTES // 60, minute=slot * SLOT_MINUTES % 60, second=0, microsecond=0
+        )
+
+        results = {}
+        for rid, schedule in cls.get_schedules(restaurant_ids, day).items():
+            seatable = schedule.seating_mask(party_size)
+            results[rid] = {
+                'available': bool(seatable >> slot & 1),
+                'dateTime': slot_start.isoformat(),
+                'partySize': party_size,
+                'timeSlots': [slot_label(s) for s in nearby if seatable >> s & 1],
+                'reservationIds': schedule.offers_at(slot, party_size),
+            }
+        return results
+
+    @classmethod
+    def get_day(cls, restaurant_id, day, party_size: int):
+        """
+        Every seatable slot of one restaurant-day.
+
+        Returns:
+            {available, date, partySize, timeSlots}, or None for an unknown
+            restaurant
+        """
+        schedule = cls.get_schedules([restaurant_id], day).get(str(restaurant_id))
+        if schedule is None:
+            return None
+        seatable = schedule.seating_mask(party_size)
+        return {
+            'available': bool(seatable),
+            'date': day.isoformat(),
+            'partySize': party_size,
+            'timeSlots': [slot_label(s) for s in range(SLOTS_PER_DAY) if seatable >> s & 1],
+        }
+
+    @classmethod
+    def invalidate(cls, restaurant_id, date_time) -> None:
+        """Drop the cached day(s) a reservation at date_time touches."""
+        local = timezone.localtime(date_time)
+        days = {local.date(), (local - timedelta(minutes=SLOT_MINUTES * DINING_SLOTS)).date()}
+        cache.delete_many([cls.cache_key(restaurant_id, day) for day in days])
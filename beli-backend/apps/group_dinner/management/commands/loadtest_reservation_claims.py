@@ -0,0 +1,149 @@
+"""
+Load test for reservation claiming against a real Postgres database.
+
+Creates a "drop" of reservations for one restaurant/time slot, fires
+concurrent claims at it from a thread pool (each thread has its own DB
+connection), then checks that every reservation went to exactly one user
+and prints latency percentiles.
+
+Usage:
+    python manage.py loadtest_reservation_claims
+    python manage.py loadtest_reservation_claims --reservations 50 --claims 5000 --workers 64
+    python manage.py loadtest_reservation_claims --mode claim-next
+
+Modes:
+    claim       Every request targets one of the reservations directly
+                (conditional UPDATE; many requests hit the same hot row)
+    claim-next  Every request asks for "any open seat" in the drop
+                (SELECT ... FOR UPDATE SKIP LOCKED)
+
+The test reservations are deleted afterwards unless --keep is given.
+"""
+import random
+import statistics
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.utils import timezone
+
+from apps.group_dinner.models import Reservation
+from apps.group_dinner.services import ReservationClaimService
+from apps.restaurants.models import Restaurant
+from apps.users.models import User
+
+
+class Command(BaseCommand):
+    help = 'Fire concurrent reservation claims and verify exactly-once allocation'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reservations', type=int, default=20, help='Reservations in the drop')
+        parser.add_argument('--claims', type=int, default=2000, help='Total claim requests')
+        parser.add_argument('--workers', type=int, default=32, help='Concurrent threads')
+        parser.add_argument('--mode', choices=['claim', 'claim-next'], default='claim')
+        parser.add_argument('--keep', action='store_true', help="Don't delete the test reservations")
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('This load test needs PostgreSQL (row locks and SKIP LOCKED)')
+
+        restaurant = Restaurant.objects.order_by('id').first()
+        user_ids = list(User.objects.values_list('id', flat=True)[:max(options['workers'], 2)])
+        if restaurant is None or len(user_ids) < 2:
+            raise CommandError('Need at least one restaurant and two users (run the seeds)')
+
+        slot = (timezone.now() + timedelta(days=30)).replace(second=0, microsecond=0)
+        drop_marker = f'loadtest:{uuid.uuid4()}'
+        reservations = Reservation.objects.bulk_create([
+            Reservation(
+                restaurant=restaurant,
+                user_id=user_ids[0],
+                date_time=slot,
+                party_size=2,
+                status='available',
+                notes=drop_marker,
+            )
+            for _ in range(options['reservations'])
+        ])
+        reservation_ids = [r.id for r in reservations]
+
+        latencies = []
+        outcomes = Counter()
+        # reservation id -> users told they won it (a user re-claiming a
+        # reservation they already hold is an idempotent success)
+        winners = defaultdict(set)
+        lock = threading.Lock()
+
+        def fire(i):
+            user_id = random.choice(user_ids)
+            started = time.perf_counter()
+            try:
+                if options['mode'] == 'claim':
+                    reservation_id = random.choice(reservation_ids)
+                    outcome, _ = ReservationClaimService.claim(reservation_id, user_id)
+                    won = reservation_id if outcome == ReservationClaimService.CLAIMED else None
+                else:
+                    reservation = ReservationClaimService.claim_next(restaurant.id, slot, 2, user_id)
+                    outcome = 'claimed' if reservation else 'sold_out'
+                    won = reservation.id if reservation else None
+            finally:
+                elapsed = time.perf_counter() - started
+                connections.close_all()
+
+            with lock:
+                latencies.append(elapsed)
+                outcomes[outcome] += 1
+                if won is not None:
+                    winners[won].add(user_id)
+
+        started = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+                list(pool.map(fire, range(options['claims'])))
+            wall = time.perf_counter() - started
+
+            claimed = Reservation.objects.filter(id__in=reservation_ids, status='claimed')
+            claimed_count = claimed.count()
+            unclaimed_ids = set(reservation_ids) - set(claimed.values_list('id', flat=True))
+            double_wins = {rid: users for rid, users in winners.items() if len(users) > 1}
+
+            self._report(options, wall, latencies, outcomes, claimed_count)
+
+            # Exactly once: every claimed row was won by one user, and no
+            # user believed they won a row that isn't claimed
+            errors = []
+            if double_wins:
+                errors.append(f'{len(double_wins)} reservations reported as won more than once')
+            if len(winners) != claimed_count:
+                errors.append(f'{len(winners)} reservations won for {claimed_count} claimed rows')
+            if options['mode'] == 'claim-next' and options['claims'] > len(reservation_ids) and unclaimed_ids:
+                errors.append(f'{len(unclaimed_ids)} reservations left unclaimed despite demand')
+            if errors:
+                raise CommandError('; '.join(errors))
+
+            self.stdout.write(self.style.SUCCESS('Exactly-once allocation verified'))
+        finally:
+            if not options['keep']:
+                Reservation.objects.filter(notes=drop_marker).delete()
+
+    def _report(self, options, wall, latencies, outcomes, claimed_count):
+        latencies_ms = sorted(l * 1000 for l in latencies)
+
+        def percentile(p):
+            return latencies_ms[min(len(latencies_ms) - 1, int(len(latencies_ms) * p))]
+
+        self.stdout.write(
+            f"{options['claims']} claims ({options['mode']}) on {options['reservations']} reservations, "
+            f"{options['workers']} workers in {wall:.2f}s ({options['claims'] / wall:.0f} req/s)"
+        )
+        self.stdout.write(f'Outcomes: {dict(outcomes)}; claimed rows: {claimed_count}')
+        self.stdout.write(
+            f'Latency ms: p50={percentile(0.50):.1f} p95={percentile(0.95):.1f} '
+            f'p99={percentile(0.99):.1f} max={latencies_ms[-1]:.1f} '
+            f'mean={statistics.mean(latencies_ms):.1f}'
+        )
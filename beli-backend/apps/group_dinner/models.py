@@ -25,7 +25,12 @@ class GroupDinnerSession(models.Model):
         null=True,
         db_column='selected_restaurant_id'
     )
+    category = models.CharField(max_length=20, blank=True, null=True)
+    # Participants' want-to-try/recent-visit sets and the derived candidate
+    # set, maintained incrementally by GroupSuggestionSessionService
+    suggestion_state = models.JSONField(default=dict, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         db_table = 'group_dinner_sessions'
@@ -73,3 +78,30 @@ class Reservation(models.Model):
     class Meta:
         db_table = 'reservations'
         ordering = ['date_time']
+
+
+class ReservationWaitlistEntry(models.Model):
+    """
+    A user queued for a reservation that was already claimed.
+
+    Served first come, first served when the claimer releases it.
+    """
+    id = models.BigAutoField(primary_key=True)
+    reservation = models.ForeignKey(
+        Reservation,
+        on_delete=models.CASCADE,
+        related_name='waitlist',
+        db_column='reservation_id'
+    )
+    user = models.ForeignKey(
+        'users.User',
+        on_delete=models.CASCADE,
+        related_name='reservation_waitlist',
+        db_column='user_id'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'reservation_waitlist'
+        ordering = ['id']
+        unique_together = ('reservation', 'user')
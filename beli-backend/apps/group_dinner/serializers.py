@@ -30,6 +30,9 @@ class GroupDinnerRequestSerializer(serializers.Serializer):
         default=list
     )
     category = serializers.CharField(required=False, allow_null=True)
+    sessionId = serializers.UUIDField(required=False)
+    dateTime = serializers.DateTimeField(required=False)
+    partySize = serializers.IntegerField(required=False, min_value=1)
 
 
 class ReservationSerializer(serializers.ModelSerializer):
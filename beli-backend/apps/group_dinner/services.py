@@ -4,12 +4,22 @@ Group Dinner matching algorithm.
 Matches the TypeScript GroupDinnerService.getGroupDinnerSuggestions() implementation.
 """
 from collections import defaultdict
-from datetime import timedelta
+from datetime import datetime, timedelta
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
 from django.utils import timezone
-from django.db.models import Q
+from django.utils.dateparse import parse_date
 
-from apps.users.models import Rating, User
+from apps.core.geo import centroid, geometric_median
+from apps.menus.dietary import DietaryIndex, dietary_mask
 from apps.restaurants.models import Restaurant
+from apps.restaurants.services import RestaurantCardCache
+from apps.restaurants.spatial import RestaurantSpatialIndex
+from apps.users.models import Rating, User
+from .availability import AvailabilityService
+from .models import GroupDinnerSession, Reservation, ReservationWaitlistEntry
 
 
 class GroupDinnerMatchingService:
@@ -20,6 +30,16 @@ class GroupDinnerMatchingService:
     - Want-to-try overlap: 70%
     - Dietary compatibility: 20%
     - Location convenience: 10%
+
+    Location convenience is the distance from each restaurant to the
+    geometric median of the participants' locations, where a participant's
+    location is the centroid of their recent visits. Distances come from
+    the in-memory RestaurantSpatialIndex, so scoring adds no per-restaurant
+    queries.
+
+    Dietary compatibility is the share of participants who have at least
+    DIETARY_MIN_OPTIONS dishes they can eat, counted from the in-memory
+    menu DietaryIndex. Participants without restrictions always count.
     """
 
     WEIGHTS = {
@@ -28,13 +48,73 @@ class GroupDinnerMatchingService:
         'location_convenience': 0.10,
     }
 
+    RECENT_VISIT_DAYS = 30
+
+    # Location scoring
+    CANDIDATE_LIMIT = 500  # overlap-ranked candidates re-ranked with location
+    MAX_DISTANCE_KM = 10.0  # no location points beyond this
+    NEARBY_KM = 2.0
+    LOCATION_HISTORY = 50  # recent visits used for a participant's centroid
+    LOCATION_CACHE_TTL = 3600  # 1 hour - invalidated on rating writes
+
+    # Dietary scoring
+    DIETARY_MIN_OPTIONS = 2
+
+    # Everything in one round trip: union of watchlists and legacy
+    # want_to_try ratings, anti-joined against anyone's recent visits,
+    # grouped per restaurant with its participants, scored, category
+    # filtered and cut to the top k. Restaurant columns come back in the
+    # same rows so Restaurant.objects.raw() can hydrate them directly.
+    SUGGESTIONS_SQL = """
+        WITH wants AS (
+            SELECT u.id AS user_id, w.rid::uuid AS restaurant_id
+            FROM users u
+            CROSS JOIN LATERAL UNNEST(u.watchlist) AS w(rid)
+            WHERE u.id = ANY(%(user_ids)s::uuid[])
+              -- watchlist is TEXT[]; skip stray entries rather than fail the cast
+              AND w.rid ~* '^[0-9a-f]{8}-([0-9a-f]{4}-){3}[0-9a-f]{12}$'
+            UNION
+            SELECT user_id, restaurant_id
+            FROM ratings
+            WHERE user_id = ANY(%(user_ids)s::uuid[]) AND status = 'want_to_try'
+        ),
+        recent AS (
+            SELECT restaurant_id
+            FROM ratings
+            WHERE user_id = ANY(%(user_ids)s::uuid[])
+              AND status = 'been'
+              AND (visit_date >= %(cutoff_date)s
+                   OR (visit_date IS NULL AND created_at >= %(cutoff)s))
+        ),
+        overlap AS (
+            SELECT w.restaurant_id,
+                   ARRAY_AGG(w.user_id::text ORDER BY w.user_id) AS participant_ids,
+                   COUNT(*) AS on_lists_count
+            FROM wants w
+            WHERE NOT EXISTS (SELECT 1 FROM recent r WHERE r.restaurant_id = w.restaurant_id)
+            GROUP BY w.restaurant_id
+        )
+        SELECT r.id, r.name, r.cuisine, r.category, r.price_range, r.neighborhood,
+               r.city, r.images, r.rating, r.rating_count, r.is_open,
+               o.participant_ids, o.on_lists_count,
+               o.on_lists_count::float / %(num_participants)s * %(overlap_weight)s
+                   + %(base_score)s AS base_score
+        FROM overlap o
+        JOIN restaurants r ON r.id = o.restaurant_id
+        WHERE %(category)s::text IS NULL OR r.category::text = %(category)s::text
+        ORDER BY o.on_lists_count DESC, r.rating DESC NULLS LAST, r.id
+        LIMIT %(limit)s
+    """
+
     @classmethod
     def get_suggestions(
         cls,
         user_id: str,
         participant_ids: list = None,
         category: str = None,
-        limit: int = 20
+        limit: int = 20,
+        date_time=None,
+        party_size: int = None
     ) -> list:
         """
         Generate group dinner suggestions based on participant preferences.
@@ -44,143 +124,696 @@ class GroupDinnerMatchingService:
             participant_ids: List of participant user IDs (optional, empty = solo)
             category: Filter by restaurant category
             limit: Maximum suggestions to return
+            date_time: When the group wants to eat (default: tonight)
+            party_size: Table size to check (default: number of participants)
 
         Returns:
             List of GroupDinnerMatch objects sorted by score
         """
-        all_user_ids = [user_id] + (participant_ids or [])
-
-        # Get want-to-try restaurants for all participants
-        # Note: want_to_try is stored in users.watchlist array
-        users = User.objects.filter(id__in=all_user_ids)
-
-        # Collect all watchlist items
-        restaurant_users = defaultdict(list)  # restaurant_id -> [user_ids]
-        for user in users:
-            if user.watchlist:
-                for rid in user.watchlist:
-                    restaurant_users[str(rid)].append(str(user.id))
-
-        # Also check ratings with want_to_try status (legacy)
-        want_to_try_ratings = Rating.objects.filter(
-            user_id__in=all_user_ids,
-            status='want_to_try'
-        ).values('restaurant_id', 'user_id')
-
-        for rating in want_to_try_ratings:
-            rid = str(rating['restaurant_id'])
-            uid = str(rating['user_id'])
-            if uid not in restaurant_users[rid]:
-                restaurant_users[rid].append(uid)
-
-        # Exclude recently visited (last 30 days)
-        recent_cutoff = timezone.now() - timedelta(days=30)
-        recently_visited = set(
-            Rating.objects.filter(
-                user_id__in=all_user_ids,
-                status='been',
-                visit_date__gte=recent_cutoff.date()
-            ).values_list('restaurant_id', flat=True)
-        )
+        all_user_ids = list(dict.fromkeys([str(user_id)] + [str(p) for p in participant_ids or []]))
+        num_participants = len(all_user_ids)
+        recent_cutoff = timezone.now() - timedelta(days=cls.RECENT_VISIT_DAYS)
+
+        # Without location history or dietary restrictions every candidate
+        # gets the same flat points, so the SQL ranking is already final
+        midpoint = cls.get_group_midpoint(all_user_ids)
+        dietary = cls._dietary_context(all_user_ids)
+        rerank = bool(midpoint or dietary)
+
+        restaurants = Restaurant.objects.raw(cls.SUGGESTIONS_SQL, {
+            'user_ids': all_user_ids,
+            'cutoff': recent_cutoff,
+            'cutoff_date': recent_cutoff.date(),
+            'num_participants': num_participants,
+            'overlap_weight': cls.WEIGHTS['want_to_try_overlap'] * 100,
+            'base_score': cls.flat_score(midpoint, dietary),
+            'category': category or None,
+            'limit': max(limit, cls.CANDIDATE_LIMIT) if rerank else limit,
+        })
+
+        location = cls._location_context(midpoint)
+        matches = [
+            cls._build_match(
+                restaurant,
+                restaurant_id=str(restaurant.id),
+                participants=restaurant.participant_ids,
+                num_participants=num_participants,
+                base_score=restaurant.base_score,
+                location=location,
+                dietary=dietary,
+            )
+            for restaurant in restaurants
+        ]
 
-        # Also exclude from created_at if visit_date is null
-        recently_visited.update(
-            Rating.objects.filter(
-                user_id__in=all_user_ids,
-                status='been',
-                visit_date__isnull=True,
-                created_at__gte=recent_cutoff
-            ).values_list('restaurant_id', flat=True)
+        if rerank:
+            matches.sort(key=lambda m: m['score'], reverse=True)
+        matches = matches[:limit]
+
+        return cls.attach_availability(
+            matches,
+            [m['restaurant'].id for m in matches],
+            party_size or num_participants,
+            date_time,
         )
 
-        recently_visited_str = {str(rid) for rid in recently_visited}
+    @classmethod
+    def _location_context(cls, midpoint):
+        """Distances from the group midpoint to nearby restaurants, or None (flat scoring)."""
+        if not midpoint:
+            return None
+        index = RestaurantSpatialIndex.get()
+        return index, index.within(midpoint[0], midpoint[1], cls.MAX_DISTANCE_KM)
 
-        # Get dietary restrictions for all users
-        dietary_restrictions = set()
-        for user in users:
-            if hasattr(user, 'dietary_restrictions') and user.dietary_restrictions:
-                dietary_restrictions.update(user.dietary_restrictions)
+    @classmethod
+    def flat_score(cls, midpoint, dietary) -> float:
+        """Points every candidate gets for the components that can't be scored."""
+        score = 0.0
+        if not dietary:
+            score += cls.WEIGHTS['dietary_compatibility'] * 100
+        if not midpoint:
+            score += cls.WEIGHTS['location_convenience'] * 100
+        return score
 
-        # Build scored matches
-        matches = []
-        restaurant_ids_to_fetch = [
-            rid for rid in restaurant_users.keys()
-            if rid not in recently_visited_str
+    @classmethod
+    def _dietary_context(cls, user_ids: list):
+        """Menu index and the participants' restriction masks, or None (flat scoring)."""
+        masks = [
+            mask for mask in (
+                dietary_mask(restrictions)
+                for restrictions in User.objects.filter(id__in=user_ids).values_list(
+                    'dietary_restrictions', flat=True
+                )
+            ) if mask
         ]
+        if not masks:
+            return None
+        return DietaryIndex.get(), masks
 
-        if not restaurant_ids_to_fetch:
-            return []
+    @classmethod
+    def _build_match(cls, restaurant, restaurant_id: str, participants: list,
+                     num_participants: int, base_score: float, location, dietary=None) -> dict:
+        """
+        Finish scoring one candidate and build its match dict.
+
+        Args:
+            restaurant: Restaurant (or serialized restaurant) for the response
+            base_score: Overlap points plus flat_score()
+            location: Result of _location_context()
+            dietary: Result of _dietary_context()
+        """
+        overlap_count = len(participants)
+        if overlap_count == num_participants:
+            match_reasons = ['Everyone wants to try this!']
+        elif overlap_count > 1:
+            match_reasons = [f'On {overlap_count} want-to-try lists']
+        else:
+            match_reasons = ['On your want-to-try list']
+
+        score = base_score
+        if dietary:
+            index, masks = dietary
+            if index.has_menu(restaurant_id):
+                satisfied = index.satisfied(restaurant_id, masks, cls.DIETARY_MIN_OPTIONS)
+                if satisfied == len(masks):
+                    match_reasons.append('Options for every diet')
+            else:
+                # Unknown menu - neither reward nor punish
+                satisfied = len(masks) / 2
+            unrestricted = num_participants - len(masks)
+            score += cls.WEIGHTS['dietary_compatibility'] * 100 * (unrestricted + satisfied) / num_participants
+
+        distance = None
+        if location:
+            index, distances = location
+            location_weight = cls.WEIGHTS['location_convenience'] * 100
+            distance = distances.get(restaurant_id)
+            if distance is not None:
+                score += location_weight * (1 - distance / cls.MAX_DISTANCE_KM)
+                if distance <= cls.NEARBY_KM:
+                    match_reasons.append(
+                        'Convenient for everyone' if num_participants > 1 else 'Close to you'
+                    )
+            elif index.location(restaurant_id) is None:
+                # Unknown location - neither reward nor punish
+                score += location_weight / 2
 
-        restaurants = {
-            str(r.id): r
-            for r in Restaurant.objects.filter(id__in=restaurant_ids_to_fetch)
+        return {
+            'restaurant': restaurant,
+            'score': round(score),
+            'onListsCount': overlap_count,
+            'participants': participants,
+            'matchReasons': match_reasons,
+            'distanceKm': round(distance, 1) if distance is not None else None,
+            'availability': None,  # filled in for the final page by attach_availability()
         }
 
-        num_participants = len(all_user_ids)
+    @classmethod
+    def get_participant_locations(cls, user_ids: list) -> dict:
+        """
+        Get each user's usual area: the centroid of their recent visits.
 
-        for rid, user_ids in restaurant_users.items():
-            if rid in recently_visited_str:
-                continue
+        Cached per user and dropped by RatingSideEffects on rating writes.
 
-            restaurant = restaurants.get(rid)
-            if not restaurant:
-                continue
+        Returns:
+            user id -> (lat, lng) for users with located visits
+        """
+        keys = {uid: f"user_centroid:{uid}" for uid in user_ids}
+        cached = cache.get_many(list(keys.values()))
+        # () marks "no located visits" so it isn't recomputed every time
+        locations = {uid: cached[key] for uid, key in keys.items() if key in cached}
+
+        missing = [uid for uid in user_ids if uid not in locations]
+        if missing:
+            index = RestaurantSpatialIndex.get()
+            history = defaultdict(list)
+            # Each user's LOCATION_HISTORY latest visits, cut in SQL so heavy
+            # users don't stream their whole history
+            visits = Rating.objects.filter(
+                user_id__in=missing, status='been'
+            ).annotate(
+                recency=Window(RowNumber(), partition_by=[F('user_id')], order_by=F('created_at').desc())
+            ).filter(recency__lte=cls.LOCATION_HISTORY).order_by().values_list('user_id', 'restaurant_id')
+            for uid, rid in visits:
+                point = index.location(rid)
+                if point:
+                    history[str(uid)].append(point)
+
+            computed = {uid: centroid(history[uid]) or () for uid in missing}
+            cache.set_many({keys[uid]: loc for uid, loc in computed.items()}, cls.LOCATION_CACHE_TTL)
+            locations.update(computed)
+
+        return {uid: tuple(loc) for uid, loc in locations.items() if loc}
 
-            # Filter by category
-            if category and restaurant.category != category:
-                continue
+    @classmethod
+    def get_group_midpoint(cls, user_ids: list):
+        """
+        Geometric median of the participants' locations.
+
+        Returns:
+            (lat, lng), or None if nobody has located visits
+        """
+        return geometric_median(list(cls.get_participant_locations(user_ids).values()))
 
-            # Calculate scores
-            score = 0
-            match_reasons = []
+    @classmethod
+    def get_restaurant_availability(cls, restaurant_id: str, date: str, party_size: int = 2):
+        """
+        Check restaurant availability for a date.
+
+        Args:
+            date: ISO date (default: today)
+
+        Returns:
+            {available, date, partySize, timeSlots}, or None for an unknown restaurant
+
+        Raises:
+            ValueError: If date isn't YYYY-MM-DD
+        """
+        day = timezone.localdate()
+        if date:
+            day = parse_date(date)
+            if day is None:
+                raise ValueError(f"Invalid date: {date}")
+        return AvailabilityService.get_day(restaurant_id, day, party_size)
+
+    @staticmethod
+    def attach_availability(matches: list, restaurant_ids: list, party_size: int, date_time=None) -> list:
+        """
+        Fill in each match's 'availability' with one batched check.
 
-            # Want-to-try overlap (70% weight)
-            overlap_count = len(user_ids)
-            overlap_ratio = overlap_count / num_participants
-            want_to_try_score = overlap_ratio * cls.WEIGHTS['want_to_try_overlap'] * 100
-            score += want_to_try_score
+        Args:
+            restaurant_ids: Restaurant id of each match, in the same order
+        """
+        availability = AvailabilityService.check(restaurant_ids, party_size, date_time)
+        for match, restaurant_id in zip(matches, restaurant_ids):
+            match['availability'] = availability.get(str(restaurant_id))
+        return matches
+
+
+# Sentinel for "leave the session's category as it is"
+UNCHANGED = object()
+
+
+class GroupSuggestionSessionService:
+    """
+    Suggestions for a GroupDinnerSession, kept up to date by delta.
+
+    The session stores each participant's want-to-try and recently-visited
+    restaurant sets plus the derived candidate set (restaurant -> who wants
+    it, excluding anything a participant visited recently). Adding or
+    removing a participant fetches/drops only that person's sets and
+    patches the candidates; changing the category is just a filter at read
+    time. Rendered results are cached per state version, so repeated
+    requests for the same view don't rescore at all.
+
+    State older than STATE_TTL is rebuilt from scratch so watchlist edits
+    made in the meantime are picked up.
+    """
+
+    STATE_TTL = timedelta(minutes=15)
+    CACHE_TTL = 300  # 5 minutes - keyed by state version
+
+    PARTICIPANT_SQL = """
+        SELECT x.user_id::text, x.restaurant_id::text, x.kind, r.category::text
+        FROM (
+            SELECT u.id AS user_id, w.rid::uuid AS restaurant_id, 'want' AS kind
+            FROM users u
+            CROSS JOIN LATERAL UNNEST(u.watchlist) AS w(rid)
+            WHERE u.id = ANY(%(user_ids)s::uuid[])
+              -- watchlist is TEXT[]; skip stray entries rather than fail the cast
+              AND w.rid ~* '^[0-9a-f]{8}-([0-9a-f]{4}-){3}[0-9a-f]{12}$'
+            UNION
+            SELECT user_id, restaurant_id, 'want'
+            FROM ratings
+            WHERE user_id = ANY(%(user_ids)s::uuid[]) AND status = 'want_to_try'
+            UNION
+            SELECT user_id, restaurant_id, 'recent'
+            FROM ratings
+            WHERE user_id = ANY(%(user_ids)s::uuid[])
+              AND status = 'been'
+              AND (visit_date >= %(cutoff_date)s
+                   OR (visit_date IS NULL AND created_at >= %(cutoff)s))
+        ) x
+        JOIN restaurants r ON r.id = x.restaurant_id
+    """
+
+    @staticmethod
+    def participant_ids(session: GroupDinnerSession) -> list:
+        """Organizer first, then invited participants (deduplicated)."""
+        return list(dict.fromkeys([str(session.user_id)] + [str(p) for p in session.participants or []]))
+
+    @classmethod
+    def create_session(cls, user_id: str, participant_ids: list = None, category: str = None) -> GroupDinnerSession:
+        session = GroupDinnerSession.objects.create(
+            user_id=user_id,
+            participants=[p for p in dict.fromkeys(participant_ids or []) if str(p) != str(user_id)],
+            category=category or None,
+        )
+        with transaction.atomic():
+            session = GroupDinnerSession.objects.select_for_update().get(id=session.id)
+            cls._rebuild(session)
+            session.save(update_fields=['suggestion_state', 'updated_at'])
+        return session
 
-            if overlap_count == num_participants:
-                match_reasons.append('Everyone wants to try this!')
-            elif overlap_count > 1:
-                match_reasons.append(f'On {overlap_count} want-to-try lists')
+    @classmethod
+    def update(cls, session_id, add=(), remove=(), participant_ids=None, category=UNCHANGED) -> GroupDinnerSession:
+        """
+        Apply participant/category changes by delta.
+
+        Args:
+            session_id: GroupDinnerSession UUID
+            add: Participant ids to add
+            remove: Participant ids to remove
+            participant_ids: Full desired participant list (diffed against
+                the stored one) - alternative to add/remove
+            category: New category filter (None clears it; omit to keep)
+
+        Raises:
+            GroupDinnerSession.DoesNotExist
+        """
+        with transaction.atomic():
+            session = GroupDinnerSession.objects.select_for_update().get(id=session_id)
+            organizer = str(session.user_id)
+            current = [str(p) for p in session.participants or []]
+
+            if participant_ids is not None:
+                wanted = [p for p in dict.fromkeys(str(p) for p in participant_ids) if p != organizer]
             else:
-                match_reasons.append('On your want-to-try list')
-
-            # Dietary compatibility (20% weight)
-            # Simplified: assume all restaurants accommodate restrictions
-            dietary_score = cls.WEIGHTS['dietary_compatibility'] * 100
-            score += dietary_score
-            if dietary_restrictions:
-                match_reasons.append('Accommodates dietary preferences')
-
-            # Location convenience (10% weight)
-            location_score = cls.WEIGHTS['location_convenience'] * 100
-            score += location_score
-
-            matches.append({
-                'restaurant': restaurant,
-                'score': round(score),
-                'onListsCount': overlap_count,
-                'participants': user_ids,
-                'matchReasons': match_reasons,
-                'availability': None,  # Would check reservation system
-            })
+                removing = {str(p) for p in remove}
+                wanted = [p for p in current if p not in removing]
+                wanted += [p for p in dict.fromkeys(str(p) for p in add) if p != organizer and p not in wanted]
+
+            added = [p for p in wanted if p not in current]
+            removed = [p for p in current if p not in wanted]
+            update_fields = ['updated_at']
+
+            if added or removed:
+                session.participants = wanted
+                update_fields.append('participants')
+                state = session.suggestion_state or {}
+                if cls._is_fresh(state):
+                    state = cls._load_state(state)
+                    cls._remove_participants(state, removed)
+                    cls._add_participants(state, added, cls._fetch(added))
+                    session.suggestion_state = cls._dump_state(state)
+                else:
+                    cls._rebuild(session)
+                update_fields.append('suggestion_state')
+
+            if category is not UNCHANGED and (category or None) != session.category:
+                session.category = category or None
+                update_fields.append('category')
+
+            if len(update_fields) > 1:
+                session.save(update_fields=update_fields)
+        return session
 
-        # Sort by score descending
-        matches.sort(key=lambda m: m['score'], reverse=True)
+    @classmethod
+    def get_suggestions(cls, session: GroupDinnerSession, limit: int = 20,
+                        date_time=None, party_size: int = None) -> list:
+        """
+        Get scored suggestions for a session (cached per state version).
 
-        return matches[:limit]
+        Availability isn't part of the cached ranking; it is checked fresh
+        for the returned page.
+
+        Returns:
+            Same match dicts as GroupDinnerMatchingService.get_suggestions(),
+            with 'restaurant' already serialized
+        """
+        state = session.suggestion_state or {}
+        if not cls._is_fresh(state):
+            with transaction.atomic():
+                locked = GroupDinnerSession.objects.select_for_update().get(id=session.id)
+                if not cls._is_fresh(locked.suggestion_state or {}):
+                    cls._rebuild(locked)
+                    locked.save(update_fields=['suggestion_state', 'updated_at'])
+                session.suggestion_state = locked.suggestion_state
+                state = session.suggestion_state
+
+        cache_key = f"group_suggestions:{session.id}:{state['version']}:{session.category or ''}:{limit}"
+        result = cache.get(cache_key)
+        if result is None:
+            result = cls._rank(session, state, limit)
+            cache.set(cache_key, result, cls.CACHE_TTL)
+
+        return GroupDinnerMatchingService.attach_availability(
+            result,
+            [match['restaurant']['id'] for match in result],
+            party_size or len(state['participants']),
+            date_time,
+        )
 
     @classmethod
-    def get_restaurant_availability(cls, restaurant_id: str, date: str) -> dict:
+    def _rank(cls, session: GroupDinnerSession, state: dict, limit: int) -> list:
+        """Score, sort and hydrate the top `limit` candidates of a session's state."""
+        participants = state['participants']
+        num_participants = len(participants)
+        midpoint = GroupDinnerMatchingService.get_group_midpoint(participants)
+        location = GroupDinnerMatchingService._location_context(midpoint)
+        dietary = GroupDinnerMatchingService._dietary_context(participants)
+        weights = GroupDinnerMatchingService.WEIGHTS
+        flat_score = GroupDinnerMatchingService.flat_score(midpoint, dietary)
+
+        matches = []
+        for rid, user_ids in state['candidates'].items():
+            if session.category and state['categories'].get(rid) != session.category:
+                continue
+            match = GroupDinnerMatchingService._build_match(
+                None,
+                restaurant_id=rid,
+                participants=sorted(user_ids),
+                num_participants=num_participants,
+                base_score=len(user_ids) / num_participants * weights['want_to_try_overlap'] * 100 + flat_score,
+                location=location,
+                dietary=dietary,
+            )
+            match['restaurant_id'] = rid
+            matches.append(match)
+
+        matches.sort(key=lambda m: (-m['score'], -m['onListsCount'], m['restaurant_id']))
+
+        # Hydrate the winners only; skip restaurants deleted since the build
+        result = []
+        candidates = iter(matches)
+        while len(result) < limit:
+            batch = [m for _, m in zip(range(limit - len(result)), candidates)]
+            if not batch:
+                break
+            cards = {
+                str(card['id']): card
+                for card in RestaurantCardCache.get_many([m['restaurant_id'] for m in batch])
+            }
+            for match in batch:
+                card = cards.get(match.pop('restaurant_id'))
+                if card is not None:
+                    match['restaurant'] = card
+                    result.append(match)
+
+        return result
+
+    @staticmethod
+    def get_contributions(session: GroupDinnerSession) -> dict:
         """
-        Check restaurant availability for a date.
+        Per-participant breakdown of what they bring to the candidate set.
 
-        Returns mock availability for now.
+        Returns:
+            user id -> {wantToTry, recentlyVisited, candidates}
         """
-        # This would integrate with a real reservation system
+        state = session.suggestion_state or {}
+        candidates = state.get('candidates', {})
+        contributions = {}
+        for uid in state.get('participants', []):
+            contributions[uid] = {
+                'wantToTry': len(state['wants'].get(uid, [])),
+                'recentlyVisited': len(state['recent'].get(uid, [])),
+                'candidates': sum(1 for user_ids in candidates.values() if uid in user_ids),
+            }
+        return contributions
+
+    # State helpers
+
+    @classmethod
+    def _is_fresh(cls, state: dict) -> bool:
+        built_at = state.get('builtAt')
+        return bool(built_at) and timezone.now() - datetime.fromisoformat(built_at) < cls.STATE_TTL
+
+    @classmethod
+    def _fetch(cls, user_ids: list) -> tuple:
+        """One query for the given users' want-to-try and recent-visit sets."""
+        wants = {uid: set() for uid in user_ids}
+        recent = {uid: set() for uid in user_ids}
+        categories = {}
+        if not user_ids:
+            return wants, recent, categories
+
+        cutoff = timezone.now() - timedelta(days=GroupDinnerMatchingService.RECENT_VISIT_DAYS)
+        with connection.cursor() as cursor:
+            cursor.execute(cls.PARTICIPANT_SQL, {
+                'user_ids': user_ids,
+                'cutoff': cutoff,
+                'cutoff_date': cutoff.date(),
+            })
+            for uid, rid, kind, category in cursor.fetchall():
+                (wants if kind == 'want' else recent)[uid].add(rid)
+                categories[rid] = category
+        return wants, recent, categories
+
+    @classmethod
+    def _rebuild(cls, session: GroupDinnerSession) -> None:
+        state = {
+            'version': (session.suggestion_state or {}).get('version', 0),
+            'participants': [],
+            'wants': {},
+            'recent': {},
+            'categories': {},
+            'candidates': {},
+        }
+        participants = cls.participant_ids(session)
+        cls._add_participants(state, participants, cls._fetch(participants))
+        state['builtAt'] = timezone.now().isoformat()
+        session.suggestion_state = cls._dump_state(state)
+
+    @staticmethod
+    def _load_state(state: dict) -> dict:
+        return {
+            **state,
+            'wants': {uid: set(rids) for uid, rids in state['wants'].items()},
+            'recent': {uid: set(rids) for uid, rids in state['recent'].items()},
+            'candidates': {rid: set(uids) for rid, uids in state['candidates'].items()},
+        }
+
+    @staticmethod
+    def _dump_state(state: dict) -> dict:
         return {
-            'available': True,
-            'timeSlots': ['6:00 PM', '7:00 PM', '8:00 PM', '9:00 PM'],
+            **state,
+            'version': state['version'] + 1,
+            'wants': {uid: sorted(rids) for uid, rids in state['wants'].items()},
+            'recent': {uid: sorted(rids) for uid, rids in state['recent'].items()},
+            'candidates': {rid: sorted(uids) for rid, uids in state['candidates'].items()},
         }
+
+    @staticmethod
+    def _add_participants(state: dict, user_ids: list, fetched: tuple) -> None:
+        wants, recent, categories = fetched
+        state['categories'].update(categories)
+        for uid in user_ids:
+            state['participants'].append(uid)
+            state['wants'][uid] = wants[uid]
+            state['recent'][uid] = recent[uid]
+
+        blocked = set().union(*state['recent'].values())
+        candidates = state['candidates']
+        for uid in user_ids:
+            for rid in recent[uid]:
+                candidates.pop(rid, None)
+            for rid in wants[uid]:
+                if rid not in blocked:
+                    candidates.setdefault(rid, set()).add(uid)
+
+    @staticmethod
+    def _remove_participants(state: dict, user_ids: list) -> None:
+        candidates = state['candidates']
+        unblocked = set()
+        for uid in user_ids:
+            if uid not in state['wants']:
+                continue
+            state['participants'].remove(uid)
+            for rid in state['wants'].pop(uid):
+                holders = candidates.get(rid)
+                if holders is not None:
+                    holders.discard(uid)
+                    if not holders:
+                        del candidates[rid]
+            unblocked |= state['recent'].pop(uid)
+
+        # Restaurants only this person had visited become candidates again
+        still_blocked = set().union(*state['recent'].values())
+        for rid in unblocked - still_blocked:
+            holders = {uid for uid, rids in state['wants'].items() if rid in rids}
+            if holders:
+                candidates[rid] = holders
+
+
+class ReservationClaimService:
+    """
+    Exactly-once reservation claiming.
+
+    A claim is a single conditional UPDATE ... WHERE status = 'available',
+    so the database decides the winner and there is no read-then-write
+    window. Losers can join a FIFO waitlist; releasing a reservation hands
+    it straight to the head of the queue. Joining and releasing both lock
+    the reservation row, so nobody is queued behind a reservation that has
+    just become available.
+    """
+
+    CLAIMED = 'claimed'
+    WAITLISTED = 'waitlisted'
+    UNAVAILABLE = 'unavailable'
+    NOT_FOUND = 'not_found'
+
+    @classmethod
+    def claim(cls, reservation_id, user_id, join_waitlist: bool = False) -> tuple:
+        """
+        Try to claim a reservation.
+
+        Args:
+            reservation_id: Reservation UUID
+            user_id: Claiming user's UUID
+            join_waitlist: Queue the user if someone else got there first
+
+        Returns:
+            (outcome, waitlist_position) - outcome is one of CLAIMED,
+            WAITLISTED, UNAVAILABLE, NOT_FOUND; position is 1-based when
+            WAITLISTED, else None
+        """
+        claimed = Reservation.objects.filter(
+            id=reservation_id, status='available'
+        ).update(status='claimed', claimed_by_id=user_id)
+        if claimed:
+            cls._invalidate_availability(reservation_id)
+            return cls.CLAIMED, None
+
+        # Lost the race (or it's gone). Decide under the row lock release()
+        # takes, so a release can't hand the reservation on - or put it
+        # back to available - between our check and joining the queue.
+        with transaction.atomic():
+            reservation = Reservation.objects.select_for_update().filter(
+                id=reservation_id
+            ).only('status', 'claimed_by_id').first()
+            if reservation is None:
+                return cls.NOT_FOUND, None
+            if reservation.status == 'available':
+                # Released since the UPDATE above - claim it now
+                reservation.status = 'claimed'
+                reservation.claimed_by_id = user_id
+                reservation.save(update_fields=['status', 'claimed_by'])
+                transaction.on_commit(lambda: cls._invalidate_availability(reservation_id))
+                return cls.CLAIMED, None
+            if reservation.status == 'claimed' and str(reservation.claimed_by_id) == str(user_id):
+                # Retried request from the winner
+                return cls.CLAIMED, None
+            if not join_waitlist or reservation.status == 'cancelled':
+                return cls.UNAVAILABLE, None
+
+            entry, _ = ReservationWaitlistEntry.objects.get_or_create(
+                reservation_id=reservation_id, user_id=user_id
+            )
+            position = ReservationWaitlistEntry.objects.filter(
+                reservation_id=reservation_id, id__lte=entry.id
+            ).count()
+        return cls.WAITLISTED, position
+
+    @classmethod
+    def claim_next(cls, restaurant_id, date_time, party_size: int, user_id):
+        """
+        Claim any available reservation matching a drop (same restaurant,
+        time and at least party_size seats).
+
+        Concurrent callers skip rows another transaction is already
+        claiming instead of queueing behind the same hot row.
+
+        Returns:
+            The claimed Reservation, or None if none are left
+        """
+        with transaction.atomic():
+            reservation = Reservation.objects.select_for_update(skip_locked=True).filter(
+                restaurant_id=restaurant_id,
+                date_time=date_time,
+                party_size__gte=party_size,
+                status='available',
+            ).order_by('party_size', 'id').first()
+            if reservation is None:
+                return None
+
+            reservation.status = 'claimed'
+            reservation.claimed_by_id = user_id
+            reservation.save(update_fields=['status', 'claimed_by'])
+
+        AvailabilityService.invalidate(reservation.restaurant_id, reservation.date_time)
+        return reservation
+
+    @classmethod
+    def release(cls, reservation_id, user_id) -> tuple:
+        """
+        Give up a claimed reservation; it goes to the next waitlisted user,
+        or back to available if nobody is waiting.
+
+        Returns:
+            (released, new_claimer_id) - released is False if the user
+            doesn't hold the claim
+
+        Raises:
+            Reservation.DoesNotExist
+        """
+        with transaction.atomic():
+            reservation = Reservation.objects.select_for_update().get(id=reservation_id)
+            if reservation.status != 'claimed' or str(reservation.claimed_by_id) != str(user_id):
+                return False, None
+
+            entry = ReservationWaitlistEntry.objects.filter(
+                reservation=reservation
+            ).order_by('id').first()
+            if entry is not None:
+                entry.delete()
+                reservation.claimed_by_id = entry.user_id
+            else:
+                reservation.status = 'available'
+                reservation.claimed_by_id = None
+            reservation.save(update_fields=['status', 'claimed_by'])
+
+        if entry is None:
+            AvailabilityService.invalidate(reservation.restaurant_id, reservation.date_time)
+        return True, entry.user_id if entry is not None else None
+
+    @staticmethod
+    def _invalidate_availability(reservation_id) -> None:
+        row = Reservation.objects.filter(id=reservation_id).values_list('restaurant_id', 'date_time').first()
+        if row:
+            AvailabilityService.invalidate(*row)
+
+    @staticmethod
+    def leave_waitlist(reservation_id, user_id) -> bool:
+        deleted, _ = ReservationWaitlistEntry.objects.filter(
+            reservation_id=reservation_id, user_id=user_id
+        ).delete()
+        return bool(deleted)
@@ -0,0 +1,58 @@
+"""
+Tests for reservation claiming.
+"""
+import pytest
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from .models import Reservation, ReservationWaitlistEntry
+from .services import ReservationClaimService
+
+
+@pytest.fixture
+def reservation(make_user, make_restaurant):
+    return Reservation.objects.create(
+        restaurant=make_restaurant(), user=make_user(),
+        date_time=timezone.now(), party_size=2,
+    )
+
+
+@pytest.mark.django_db
+def test_release_hands_the_reservation_to_the_waitlist_in_order(reservation, make_user):
+    first, second, third = make_user(), make_user(), make_user()
+
+    assert ReservationClaimService.claim(reservation.id, first.id) == ('claimed', None)
+    assert ReservationClaimService.claim(reservation.id, second.id, join_waitlist=True) == ('waitlisted', 1)
+    assert ReservationClaimService.claim(reservation.id, third.id, join_waitlist=True) == ('waitlisted', 2)
+    assert ReservationClaimService.claim(reservation.id, third.id) == ('unavailable', None)
+
+    assert ReservationClaimService.release(reservation.id, first.id) == (True, second.id)
+    assert ReservationClaimService.release(reservation.id, second.id) == (True, third.id)
+    assert ReservationClaimService.release(reservation.id, third.id) == (True, None)
+
+    reservation.refresh_from_db()
+    assert (reservation.status, reservation.claimed_by_id) == ('available', None)
+
+
+@pytest.mark.django_db
+def test_claim_that_loses_to_a_release_claims_instead_of_queueing(reservation, make_user, monkeypatch):
+    holder, claimer = make_user(), make_user()
+    ReservationClaimService.claim(reservation.id, holder.id)
+
+    # The holder releases between the claimer's failed UPDATE and its
+    # waitlist decision
+    real_update = QuerySet.update
+
+    def update_then_release(queryset, **kwargs):
+        monkeypatch.setattr(QuerySet, 'update', real_update)
+        updated = real_update(queryset, **kwargs)
+        ReservationClaimService.release(reservation.id, holder.id)
+        return updated
+
+    monkeypatch.setattr(QuerySet, 'update', update_then_release)
+    outcome = ReservationClaimService.claim(reservation.id, claimer.id, join_waitlist=True)
+
+    assert outcome == ('claimed', None)
+    reservation.refresh_from_db()
+    assert (reservation.status, reservation.claimed_by_id) == ('claimed', claimer.id)
+    assert not ReservationWaitlistEntry.objects.filter(reservation=reservation).exists()
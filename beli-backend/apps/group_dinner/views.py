@@ -3,17 +3,23 @@ Group Dinner API views.
 
 Provides REST endpoints for group dinner matching and reservations.
 """
+from django.utils.dateparse import parse_datetime
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
-from .services import GroupDinnerMatchingService
+from .availability import AvailabilityService
+from .services import (
+    GroupDinnerMatchingService,
+    GroupSuggestionSessionService,
+    ReservationClaimService,
+)
 from .serializers import (
     GroupDinnerMatchSerializer,
     GroupDinnerRequestSerializer,
     ReservationSerializer,
 )
-from .models import Reservation
+from .models import GroupDinnerSession, Reservation
 from apps.users.models import User, UserFollow
 from apps.users.serializers import UserListSerializer
 from apps.restaurants.serializers import RestaurantListSerializer
@@ -25,11 +31,17 @@ class GroupDinnerViewSet(viewsets.ViewSet):
 
     Supports:
     - POST /api/v1/group-dinner/suggestions/ - Get restaurant suggestions
+    - POST /api/v1/group-dinner/sessions/ - Start a suggestion session
+    - GET /api/v1/group-dinner/sessions/{id}/ - Get session suggestions (cached)
+    - PATCH /api/v1/group-dinner/sessions/{id}/ - Change the session's category filter
+    - POST /api/v1/group-dinner/sessions/{id}/participants/ - Add/remove participants
     - GET /api/v1/group-dinner/friends/{userId}/ - Get user's friends
     - GET /api/v1/group-dinner/companions/{userId}/ - Get recent dining companions
     - GET /api/v1/group-dinner/availability/{restaurantId}/ - Check availability
     - GET /api/v1/group-dinner/reservations/{userId}/ - Get user's reservations
-    - POST /api/v1/group-dinner/reservations/{id}/claim/ - Claim a reservation
+    - POST /api/v1/group-dinner/reservations/{id}/claim/ - Claim a reservation (optionally join waitlist)
+    - POST /api/v1/group-dinner/reservations/claim-next/ - Claim any open reservation in a drop
+    - POST /api/v1/group-dinner/reservations/{id}/release/ - Release a claim (passes to waitlist)
     - POST /api/v1/group-dinner/reservations/{id}/share/ - Share a reservation
     """
 
@@ -38,6 +50,12 @@ class GroupDinnerViewSet(viewsets.ViewSet):
         """
         Get group dinner restaurant suggestions.
 
+        With a sessionId, the session's stored candidates are updated by
+        delta to the given participants/category instead of recomputed;
+        participantIds or category left out of the body are kept as stored.
+        Each suggestion's availability is for dateTime (default: tonight)
+        and partySize (default: everyone).
+
         Maps to: GroupDinnerService.getGroupDinnerSuggestions()
         """
         serializer = GroupDinnerRequestSerializer(data=request.data)
@@ -46,10 +64,32 @@ class GroupDinnerViewSet(viewsets.ViewSet):
 
         data = serializer.validated_data
 
+        if data.get('sessionId'):
+            # Only what the request mentions changes; omitted keys are kept
+            changes = {}
+            if 'participantIds' in request.data:
+                changes['participant_ids'] = [str(p) for p in data['participantIds']]
+            if 'category' in request.data:
+                changes['category'] = data.get('category')
+            try:
+                session = GroupSuggestionSessionService.update(data['sessionId'], **changes)
+            except GroupDinnerSession.DoesNotExist:
+                return Response(
+                    {'error': 'Session not found'},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+            return Response(GroupSuggestionSessionService.get_suggestions(
+                session,
+                date_time=data.get('dateTime'),
+                party_size=data.get('partySize'),
+            ))
+
         matches = GroupDinnerMatchingService.get_suggestions(
             user_id=str(data['userId']),
             participant_ids=[str(p) for p in data.get('participantIds', [])],
             category=data.get('category'),
+            date_time=data.get('dateTime'),
+            party_size=data.get('partySize'),
         )
 
         # Serialize results
@@ -61,11 +101,91 @@ class GroupDinnerViewSet(viewsets.ViewSet):
                 'onListsCount': match['onListsCount'],
                 'participants': match['participants'],
                 'matchReasons': match['matchReasons'],
+                'distanceKm': match['distanceKm'],
                 'availability': match['availability'],
             })
 
         return Response(result)
 
+    @action(detail=False, methods=['post'])
+    def sessions(self, request):
+        """
+        Start a group dinner session with persisted, incrementally
+        maintained suggestions.
+        """
+        serializer = GroupDinnerRequestSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        data = serializer.validated_data
+        session = GroupSuggestionSessionService.create_session(
+            user_id=str(data['userId']),
+            participant_ids=[str(p) for p in data.get('participantIds', [])],
+            category=data.get('category'),
+        )
+        return Response(self._session_data(session), status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['get', 'patch'], url_path='sessions/(?P<session_id>[^/.]+)')
+    def session_detail(self, request, session_id=None):
+        """
+        Get a session's suggestions (GET), or change its category filter
+        (PATCH {"category": ...}; null or "" clears it).
+        """
+        try:
+            if request.method == 'PATCH':
+                if 'category' not in request.data:
+                    return Response(
+                        {'error': 'category is required'},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+                session = GroupSuggestionSessionService.update(
+                    session_id, category=request.data['category']
+                )
+            else:
+                session = GroupDinnerSession.objects.get(id=session_id)
+        except GroupDinnerSession.DoesNotExist:
+            return Response(
+                {'error': 'Session not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        return Response(self._session_data(session))
+
+    @action(detail=False, methods=['post'], url_path='sessions/(?P<session_id>[^/.]+)/participants')
+    def session_participants(self, request, session_id=None):
+        """
+        Add/remove session participants.
+
+        Body: {"add": [userId, ...], "remove": [userId, ...]}
+        """
+        add = request.data.get('add') or []
+        remove = request.data.get('remove') or []
+        if not isinstance(add, list) or not isinstance(remove, list):
+            return Response(
+                {'error': 'add and remove must be lists of user ids'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            session = GroupSuggestionSessionService.update(session_id, add=add, remove=remove)
+        except GroupDinnerSession.DoesNotExist:
+            return Response(
+                {'error': 'Session not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        return Response(self._session_data(session))
+
+    @staticmethod
+    def _session_data(session):
+        return {
+            'sessionId': str(session.id),
+            'participants': GroupSuggestionSessionService.participant_ids(session),
+            'category': session.category,
+            'suggestions': GroupSuggestionSessionService.get_suggestions(session),
+            'contributions': GroupSuggestionSessionService.get_contributions(session),
+        }
+
     @action(detail=False, methods=['get'], url_path='friends/(?P<user_id>[^/.]+)')
     def friends(self, request, user_id=None):
         """
@@ -118,12 +238,36 @@ class GroupDinnerViewSet(viewsets.ViewSet):
         Check restaurant availability.
 
         Maps to: GroupDinnerService.getRestaurantAvailability()
+
+        Query params:
+            date: ISO date (default: today)
+            partySize: Number of diners (default: 2)
         """
         date = request.query_params.get('date')
+        try:
+            party_size = int(request.query_params.get('partySize', 2))
+        except ValueError:
+            party_size = 0
+        if party_size < 1:
+            return Response(
+                {'error': 'partySize must be a positive integer'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-        availability = GroupDinnerMatchingService.get_restaurant_availability(
-            restaurant_id, date
-        )
+        try:
+            availability = GroupDinnerMatchingService.get_restaurant_availability(
+                restaurant_id, date, party_size
+            )
+        except ValueError:
+            return Response(
+                {'error': 'date must be YYYY-MM-DD'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if availability is None:
+            return Response(
+                {'error': 'Restaurant not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
 
         return Response(availability)
 
@@ -164,27 +308,98 @@ class GroupDinnerViewSet(viewsets.ViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        try:
-            reservation = Reservation.objects.get(id=pk)
-        except Reservation.DoesNotExist:
+        outcome, position = ReservationClaimService.claim(
+            pk, user_id, join_waitlist=bool(request.data.get('waitlist'))
+        )
+
+        if outcome == ReservationClaimService.NOT_FOUND:
             return Response(
                 {'error': 'Reservation not found'},
                 status=status.HTTP_404_NOT_FOUND
             )
-
-        if reservation.status != 'available':
+        if outcome == ReservationClaimService.WAITLISTED:
+            return Response(
+                {'waitlisted': True, 'position': position},
+                status=status.HTTP_202_ACCEPTED
+            )
+        if outcome == ReservationClaimService.UNAVAILABLE:
             return Response(
                 {'error': 'Reservation is not available'},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        reservation.claimed_by_id = user_id
-        reservation.status = 'claimed'
-        reservation.save()
+        reservation = Reservation.objects.select_related('restaurant', 'user').get(id=pk)
+        serializer = ReservationSerializer(reservation)
+        return Response(serializer.data)
+
+    @action(detail=False, methods=['post'], url_path='reservations/claim-next')
+    def claim_next(self, request):
+        """
+        Claim any open reservation from a drop (restaurant + time slot).
+
+        Body: {"userId", "restaurantId", "dateTime", "partySize"}
+        """
+        missing = [f for f in ('userId', 'restaurantId', 'dateTime', 'partySize') if not request.data.get(f)]
+        if missing:
+            return Response(
+                {'error': f"{', '.join(missing)} required"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        date_time = parse_datetime(str(request.data['dateTime']))
+        if date_time is None:
+            return Response(
+                {'error': 'dateTime must be an ISO 8601 timestamp'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        reservation = ReservationClaimService.claim_next(
+            request.data['restaurantId'],
+            date_time,
+            int(request.data['partySize']),
+            request.data['userId'],
+        )
+        if reservation is None:
+            return Response(
+                {'error': 'No reservations left for this slot'},
+                status=status.HTTP_409_CONFLICT
+            )
 
         serializer = ReservationSerializer(reservation)
         return Response(serializer.data)
 
+    @action(detail=True, methods=['post'])
+    def release(self, request, pk=None):
+        """
+        Release a claimed reservation (or leave its waitlist).
+
+        The reservation passes to the first user on the waitlist, if any.
+        """
+        user_id = request.data.get('userId')
+        if not user_id:
+            return Response(
+                {'error': 'userId is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            released, next_user_id = ReservationClaimService.release(pk, user_id)
+        except Reservation.DoesNotExist:
+            return Response(
+                {'error': 'Reservation not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        if not released:
+            if ReservationClaimService.leave_waitlist(pk, user_id):
+                return Response({'success': True, 'waitlisted': False})
+            return Response(
+                {'error': 'You have not claimed this reservation'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response({'success': True, 'claimedBy': next_user_id})
+
     @action(detail=True, methods=['post'])
     def share(self, request, pk=None):
         """
@@ -205,6 +420,7 @@ class GroupDinnerViewSet(viewsets.ViewSet):
         reservation.shared_with = participant_ids
         reservation.status = 'shared'
         reservation.save()
+        AvailabilityService.invalidate(reservation.restaurant_id, reservation.date_time)
 
         serializer = ReservationSerializer(reservation)
         return Response(serializer.data)
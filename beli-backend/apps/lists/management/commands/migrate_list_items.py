@@ -0,0 +1,56 @@
+"""
+Copy list contents from the legacy lists.restaurants array into list_items.
+
+Usage:
+    python manage.py migrate_list_items            # merge every legacy array
+    python manage.py migrate_list_items --dry-run  # report only
+
+Safe to re-run: ids a list already has are skipped, missing ones are
+appended after its current items, and array entries pointing at deleted
+restaurants are dropped. Each merged array is cleared, so later removals
+through the API stick. Lists not migrated yet are still served from the
+array, and the first edit of a list merges it the same way.
+"""
+from django.core.management.base import BaseCommand
+
+from apps.lists.models import List, ListItem
+from apps.lists.services import ListItemService
+from apps.restaurants.models import Restaurant
+
+
+class Command(BaseCommand):
+    help = 'Backfill list_items from the legacy lists.restaurants array'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report what would be copied without writing',
+        )
+
+    def handle(self, *args, **options):
+        lists = List.objects.exclude(restaurants=[]).only('id', 'restaurants')
+
+        migrated = items = 0
+        for list_obj in lists.iterator():
+            if options['dry_run']:
+                restaurant_ids = list(dict.fromkeys(list_obj.restaurants or []))
+                existing = set(
+                    Restaurant.objects.filter(id__in=restaurant_ids).values_list('id', flat=True)
+                )
+                present = set(
+                    ListItem.objects.filter(list=list_obj, restaurant_id__in=restaurant_ids)
+                    .values_list('restaurant_id', flat=True)
+                )
+                added = [rid for rid in restaurant_ids if rid in existing and rid not in present]
+            else:
+                try:
+                    added = ListItemService.merge_legacy(list_obj.id)
+                except List.DoesNotExist:
+                    continue  # deleted since the scan started
+
+            migrated += 1
+            items += len(added)
+
+        verb = 'Would migrate' if options['dry_run'] else 'Migrated'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {items} items across {migrated} lists'))
@@ -0,0 +1,41 @@
+"""
+Recompute list trending scores from stored data.
+
+Views and bookmarks made through the API keep trending_score current on
+their own; run this after stats or bookmarks are written directly to the
+database, or once to convert scores stored before they moved to log space
+(see apps.core.decay).
+
+Usage:
+    python manage.py refresh_list_scores                 # every list
+    python manage.py refresh_list_scores --lists <id> <id>
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.lists.services import ListDiscoveryService
+
+
+class Command(BaseCommand):
+    help = 'Recompute trending_score for lists'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lists',
+            nargs='+',
+            help='Only refresh these list ids',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Lists updated per bulk UPDATE',
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        refreshed = ListDiscoveryService.refresh(options['lists'], options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Refreshed {refreshed} lists in {time.perf_counter() - started:.2f}s'
+        ))
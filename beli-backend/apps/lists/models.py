@@ -36,6 +36,7 @@ class List(models.Model):
     )
     name = models.CharField(max_length=200)
     description = models.TextField(blank=True, default='')
+    # Legacy storage - items now live in ListItem (see migrate_list_items)
     restaurants = ArrayField(models.UUIDField(), default=list)
     is_public = models.BooleanField(default=True)
     category = models.CharField(max_length=20, choices=CATEGORY_CHOICES, default='restaurants')
@@ -51,3 +52,100 @@ class List(models.Model):
 
     def __str__(self):
         return f"{self.name} by {self.user.username}"
+
+
+class OrderKeyField(models.CharField):
+    """
+    CharField the database sorts byte-wise, like Python.
+
+    Uses the "C" collation on PostgreSQL; SQLite's default BINARY collation
+    already compares bytes (and has no "C" collation to ask for).
+    """
+
+    def db_parameters(self, connection):
+        params = super().db_parameters(connection)
+        if connection.vendor == 'postgresql':
+            params['collation'] = 'C'
+        return params
+
+
+class ListItem(models.Model):
+    """
+    A restaurant in a list.
+
+    Items are ordered by `position`, a lexicographic key (see ordering.py),
+    so inserting or moving an item writes one row instead of the whole list.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    list = models.ForeignKey(
+        List,
+        on_delete=models.CASCADE,
+        related_name='items',
+        db_column='list_id'
+    )
+    restaurant = models.ForeignKey(
+        'restaurants.Restaurant',
+        on_delete=models.CASCADE,
+        related_name='+',
+        db_column='restaurant_id'
+    )
+    position = OrderKeyField(max_length=255)
+    added_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'list_items'
+        ordering = ['position']
+        unique_together = [('list', 'restaurant'), ('list', 'position')]
+
+    def __str__(self):
+        return f"{self.restaurant_id} in {self.list_id} @ {self.position}"
+
+
+class ListBookmark(models.Model):
+    """
+    A user saving someone's list.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(
+        'users.User',
+        on_delete=models.CASCADE,
+        related_name='list_bookmarks',
+        db_column='user_id'
+    )
+    list = models.ForeignKey(
+        List,
+        on_delete=models.CASCADE,
+        related_name='bookmarks',
+        db_column='list_id'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'list_bookmarks'
+        unique_together = ('user', 'list')
+
+
+class ListStats(models.Model):
+    """
+    Popularity counters for a list, maintained incrementally on each
+    view/bookmark (see ListDiscoveryService).
+    """
+    list = models.OneToOneField(
+        List,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        db_column='list_id'
+    )
+    bookmark_count = models.IntegerField(default=0)
+    view_count = models.IntegerField(default=0)
+    # Forward-decayed engagement score, in log space - comparable across
+    # rows without rewriting old ones (see apps.core.decay)
+    trending_score = models.FloatField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'list_stats'
+        indexes = [
+            models.Index(fields=['-trending_score']),
+        ]
@@ -0,0 +1,91 @@
+"""
+Lexicographic order keys for list items.
+
+Keys are base-62 strings compared byte-wise (the column uses the "C"
+collation), so an item can be placed between any two neighbours by
+writing a single row - no renumbering of the rest of the list.
+
+Keys never end in the smallest digit, which guarantees there is always
+room for another key between two existing ones.
+"""
+DIGITS = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
+BASE = len(DIGITS)
+
+# Width of keys handed out for appends (62^5 slots before keys grow)
+KEY_WIDTH = 5
+FIRST_KEY = 'V' + '0' * (KEY_WIDTH - 2) + '1'
+
+
+def _midpoint(a: str, b) -> str:
+    """Key strictly between a and b ('' = start, None = end)."""
+    if b is not None:
+        # Shared prefix stays, recurse on the remainder
+        n = 0
+        while n < len(b) and (a[n] if n < len(a) else '0') == b[n]:
+            n += 1
+        if n > 0:
+            return b[:n] + _midpoint(a[n:], b[n:])
+
+    digit_a = DIGITS.index(a[0]) if a else 0
+    digit_b = DIGITS.index(b[0]) if b is not None else BASE
+    if digit_b - digit_a > 1:
+        return DIGITS[(digit_a + digit_b) // 2]
+
+    # Adjacent digits - go one level deeper
+    if b is not None and len(b) > 1:
+        return b[0]
+    return DIGITS[digit_a] + _midpoint(a[1:], None)
+
+
+def key_between(before, after) -> str:
+    """
+    Get a key that sorts strictly between two existing keys.
+
+    Args:
+        before: Key of the previous item, or None to insert at the start
+        after: Key of the next item, or None to insert at the end
+
+    Raises:
+        ValueError: If before >= after
+    """
+    if before is not None and after is not None and before >= after:
+        raise ValueError(f'{before!r} must sort before {after!r}')
+    if before is None and after is None:
+        return FIRST_KEY
+    if after is None:
+        return key_after(before)
+    return _midpoint(before or '', after)
+
+
+def key_after(key: str) -> str:
+    """
+    Get the next append key after `key`.
+
+    Increments the key as a fixed-width base-62 number so repeated appends
+    stay short; only falls back to a longer key once a width is exhausted.
+    """
+    if key is None:
+        return FIRST_KEY
+
+    digits = [DIGITS.index(c) for c in key.ljust(KEY_WIDTH, '0')]
+    while True:
+        i = len(digits) - 1
+        while i >= 0 and digits[i] == BASE - 1:
+            digits[i] = 0
+            i -= 1
+        if i < 0:
+            # All 'z' - extend instead of wrapping around
+            return key + _midpoint('', None)
+        digits[i] += 1
+        candidate = ''.join(DIGITS[d] for d in digits)
+        if not candidate.endswith('0'):
+            return candidate
+
+
+def keys_after(key, count: int) -> list:
+    """Get `count` increasing append keys after `key` (None = empty list)."""
+    keys = []
+    for _ in range(count):
+        key = key_after(key)
+        keys.append(key)
+    return keys
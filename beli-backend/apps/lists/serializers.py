@@ -18,7 +18,8 @@ class ListSerializer(serializers.ModelSerializer):
     createdAt = serializers.DateTimeField(source='created_at', read_only=True)
     updatedAt = serializers.DateTimeField(source='updated_at', read_only=True)
 
-    # Restaurant count
+    # Restaurant ids in list order, and count (from ListItem rows)
+    restaurants = serializers.SerializerMethodField()
     restaurantCount = serializers.SerializerMethodField()
 
     class Meta:
@@ -39,8 +40,33 @@ class ListSerializer(serializers.ModelSerializer):
             'updatedAt',
         ]
 
+    def get_restaurants(self, obj):
+        # Ordered by ListItem.Meta.ordering; prefetch 'items' for many lists.
+        # Lists not merged into list_items yet still read the legacy array
+        items = obj.items.all()
+        if not items:
+            return list(dict.fromkeys(obj.restaurants or []))
+        return [item.restaurant_id for item in items]
+
+    def get_restaurantCount(self, obj):
+        return len(self.get_restaurants(obj))
+
+
+class ListHeaderSerializer(ListSerializer):
+    """
+    ListSerializer without the restaurant ids, for list cards and page
+    headers; restaurants are paged separately.
+
+    Expects restaurant_count annotated (see services.with_counts).
+    """
+    restaurants = None
+
+    class Meta(ListSerializer.Meta):
+        fields = [field for field in ListSerializer.Meta.fields if field != 'restaurants']
+
     def get_restaurantCount(self, obj):
-        return len(obj.restaurants) if obj.restaurants else 0
+        # Lists not merged into list_items yet still count the legacy array
+        return obj.restaurant_count or len(set(obj.restaurants or []))
 
 
 class ListCreateSerializer(serializers.Serializer):
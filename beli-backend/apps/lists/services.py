@@ -0,0 +1,679 @@
+"""
+Lists services - ordered list membership, cached list headers and
+list discovery (trending, lists containing a restaurant).
+"""
+import uuid
+from datetime import datetime, timedelta
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Prefetch
+from django.utils import timezone
+
+from apps.core import decay
+from apps.core.pagination import decode_cursor, encode_cursor
+from apps.notifications.services import NotificationEvents
+from apps.restaurants.models import Restaurant
+from apps.users.models import User
+from .models import List, ListBookmark, ListItem, ListStats
+from .ordering import key_between, keys_after
+from .serializers import ListHeaderSerializer
+
+
+def with_items(queryset):
+    """Prefetch each list's ordered restaurant ids for ListSerializer."""
+    return queryset.prefetch_related(
+        Prefetch('items', queryset=ListItem.objects.only('id', 'list_id', 'restaurant_id', 'position'))
+    )
+
+
+def with_counts(queryset):
+    """Annotate each list's restaurant_count for ListHeaderSerializer."""
+    return queryset.annotate(restaurant_count=Count('items'))
+
+
+class ListHeaderCache:
+    """
+    Rendered ListHeaderSerializer data (name, counts, thumbnail) per list.
+
+    Restaurant ids aren't cached: they come a page at a time from
+    ListItemService.get_page, so a header stays small whatever the list's
+    size.
+
+    Invalidated by every edit that goes through ListItemService or the
+    list update/delete endpoints, so it can be cached for a long time.
+    """
+
+    CACHE_TTL = 3600  # 1 hour - invalidated on write
+
+    @staticmethod
+    def cache_key(list_id) -> str:
+        return f"list_header:{list_id}"
+
+    @classmethod
+    def get(cls, list_id) -> dict:
+        """
+        Get a list's header.
+
+        Raises:
+            List.DoesNotExist: If the list doesn't exist
+        """
+        cache_key = cls.cache_key(list_id)
+        header = cache.get(cache_key)
+        if header is None:
+            list_obj = with_counts(List.objects.all()).get(id=list_id)
+            header = dict(ListHeaderSerializer(list_obj).data)
+            cache.set(cache_key, header, cls.CACHE_TTL)
+        return header
+
+    @classmethod
+    def get_many(cls, list_ids) -> list:
+        """Get headers for many lists in the given order (missing lists are skipped)."""
+        list_ids = [str(lid) for lid in list_ids]
+        keys = {lid: cls.cache_key(lid) for lid in list_ids}
+        cached = cache.get_many(list(keys.values()))
+        headers = {lid: cached[key] for lid, key in keys.items() if key in cached}
+
+        missing = [lid for lid in list_ids if lid not in headers]
+        if missing:
+            fetched = {
+                str(list_obj.id): dict(ListHeaderSerializer(list_obj).data)
+                for list_obj in with_counts(List.objects.filter(id__in=missing))
+            }
+            cache.set_many({cls.cache_key(lid): header for lid, header in fetched.items()}, cls.CACHE_TTL)
+            headers.update(fetched)
+
+        return [headers[lid] for lid in list_ids if lid in headers]
+
+    @classmethod
+    def invalidate(cls, list_id) -> None:
+        cache.delete(cls.cache_key(list_id))
+
+
+class ListItemService:
+    """
+    Reads and edits of a list's restaurants (ListItem rows).
+
+    Every edit locks the parent list row first, so concurrent edits to the
+    same list serialize instead of handing out the same order key twice.
+    Edits touch only the affected rows; keys are renumbered only when
+    repeated inserts at one spot have made them too long.
+    """
+
+    DEFAULT_PAGE_SIZE = 50
+    MAX_PAGE_SIZE = 200
+    MAX_BATCH_SIZE = 500
+
+    # Renumber the list once a key grows past this many characters
+    REBALANCE_LENGTH = 64
+
+    @staticmethod
+    def normalize_ids(ids) -> list:
+        """
+        Parse restaurant ids, dropping duplicates but keeping order.
+
+        Raises:
+            ValueError: If an id isn't a UUID
+        """
+        try:
+            parsed = [uuid.UUID(str(rid)) for rid in ids]
+        except (ValueError, AttributeError, TypeError) as e:
+            raise ValueError('Restaurant ids must be UUIDs') from e
+        return list(dict.fromkeys(parsed))
+
+    @classmethod
+    def _lock(cls, list_id) -> List:
+        """Lock a list for an edit, first merging in any legacy contents."""
+        list_obj = List.objects.select_for_update().get(id=list_id)
+        if list_obj.restaurants:
+            cls._merge_legacy(list_obj)
+        return list_obj
+
+    @staticmethod
+    def _touch(list_obj: List, restaurant_ids=()) -> None:
+        """Bump updated_at and drop caches once the edit commits."""
+        List.objects.filter(id=list_obj.id).update(updated_at=timezone.now())
+
+        def invalidate():
+            ListHeaderCache.invalidate(list_obj.id)
+            ListDiscoveryService.invalidate_restaurants(restaurant_ids)
+
+        transaction.on_commit(invalidate)
+
+    @staticmethod
+    def _existing_restaurants(restaurant_ids) -> set:
+        return set(Restaurant.objects.filter(id__in=restaurant_ids).values_list('id', flat=True))
+
+    @classmethod
+    def _next_key(cls, list_id, position):
+        """Key of the first item after `position` (None = end of list)."""
+        return ListItem.objects.filter(
+            list_id=list_id, position__gt=position
+        ).order_by('position').values_list('position', flat=True).first()
+
+    @classmethod
+    def _keys_between(cls, before, after, count: int) -> list:
+        if after is None:
+            return keys_after(before, count)
+        keys = []
+        for _ in range(count):
+            before = key_between(before, after)
+            keys.append(before)
+        return keys
+
+    @classmethod
+    def _legacy_items(cls, list_id) -> list:
+        """
+        (restaurant_id, position) pairs for a list still stored only in the
+        legacy lists.restaurants array.
+
+        Positions are the keys _merge_legacy will assign, so cursors handed
+        out before the merge stay valid after it. Empty once the list has
+        any list_items rows.
+        """
+        legacy = List.objects.filter(id=list_id).values_list('restaurants', flat=True).first()
+        if not legacy or ListItem.objects.filter(list_id=list_id).exists():
+            return []
+        restaurant_ids = list(dict.fromkeys(legacy))
+        existing = cls._existing_restaurants(restaurant_ids)
+        restaurant_ids = [rid for rid in restaurant_ids if rid in existing]
+        return list(zip(restaurant_ids, keys_after(None, len(restaurant_ids))))
+
+    @classmethod
+    def _merge_legacy(cls, list_obj: List) -> list:
+        """
+        Append legacy lists.restaurants entries missing from list_items, then
+        clear the array so removed items can't come back (caller holds the
+        lock).
+
+        Returns:
+            Restaurant ids added
+        """
+        restaurant_ids = list(dict.fromkeys(list_obj.restaurants or []))
+        existing = cls._existing_restaurants(restaurant_ids)
+        present = set(
+            ListItem.objects.filter(list=list_obj, restaurant_id__in=restaurant_ids)
+            .values_list('restaurant_id', flat=True)
+        )
+        to_add = [rid for rid in restaurant_ids if rid in existing and rid not in present]
+
+        if to_add:
+            last = ListItem.objects.filter(list=list_obj).order_by(
+                '-position'
+            ).values_list('position', flat=True).first()
+            ListItem.objects.bulk_create([
+                ListItem(list=list_obj, restaurant_id=rid, position=key)
+                for rid, key in zip(to_add, keys_after(last, len(to_add)))
+            ])
+            cls._touch(list_obj, to_add)
+        List.objects.filter(id=list_obj.id).update(restaurants=[])
+        list_obj.restaurants = []
+        return to_add
+
+    @classmethod
+    def merge_legacy(cls, list_id) -> list:
+        """
+        Move a list's legacy lists.restaurants entries into list_items.
+
+        Returns:
+            Restaurant ids added
+
+        Raises:
+            List.DoesNotExist: If the list doesn't exist
+        """
+        with transaction.atomic():
+            return cls._merge_legacy(List.objects.select_for_update().get(id=list_id))
+
+    @classmethod
+    def get_restaurant_ids(cls, list_id) -> list:
+        """Get all restaurant ids in list order."""
+        restaurant_ids = list(
+            ListItem.objects.filter(list_id=list_id)
+            .order_by('position').values_list('restaurant_id', flat=True)
+        )
+        return restaurant_ids or [rid for rid, _ in cls._legacy_items(list_id)]
+
+    @classmethod
+    def get_page(cls, list_id, cursor: str = None, limit: int = DEFAULT_PAGE_SIZE) -> tuple:
+        """
+        Get one page of a list's restaurant ids in stored order.
+
+        Only (restaurant_id, position) is read - hydrate the ids through
+        RestaurantCardCache.
+
+        Returns:
+            (restaurant_ids, next_cursor) - next_cursor is None on the last page
+
+        Raises:
+            ValueError: On a malformed cursor
+        """
+        limit = max(1, min(limit, cls.MAX_PAGE_SIZE))
+        queryset = ListItem.objects.filter(list_id=list_id).order_by(
+            'position'
+        ).values_list('restaurant_id', 'position')
+
+        position = None
+        if cursor:
+            position = decode_cursor(cursor).get('position')
+            if not isinstance(position, str):
+                raise ValueError('Invalid cursor')
+            queryset = queryset.filter(position__gt=position)
+
+        rows = list(queryset[:limit + 1])
+        if not rows:
+            # Not merged into list_items yet - page over the legacy array
+            rows = [
+                row for row in cls._legacy_items(list_id)
+                if position is None or row[1] > position
+            ][:limit + 1]
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor({'position': rows[-1][1]})
+        return [restaurant_id for restaurant_id, _ in rows], next_cursor
+
+    @classmethod
+    def add(cls, list_id, restaurant_ids, after_id=None) -> dict:
+        """
+        Add restaurants to a list.
+
+        Restaurants already in the list keep their place; unknown ids are
+        skipped and reported.
+
+        Args:
+            list_id: List UUID
+            restaurant_ids: Restaurant ids to add, in order
+            after_id: Insert after this restaurant (default: append at the end)
+
+        Returns:
+            Dict with added and notFound restaurant ids
+
+        Raises:
+            List.DoesNotExist: If the list doesn't exist
+            ValueError: On bad ids, too many ids, or after_id not in the list
+        """
+        restaurant_ids = cls.normalize_ids(restaurant_ids)
+        if len(restaurant_ids) > cls.MAX_BATCH_SIZE:
+            raise ValueError(f'At most {cls.MAX_BATCH_SIZE} restaurants per request')
+
+        existing = cls._existing_restaurants(restaurant_ids)
+        not_found = [rid for rid in restaurant_ids if rid not in existing]
+
+        with transaction.atomic():
+            list_obj = cls._lock(list_id)
+
+            present = set(
+                ListItem.objects.filter(list=list_obj, restaurant_id__in=restaurant_ids)
+                .values_list('restaurant_id', flat=True)
+            )
+            to_add = [rid for rid in restaurant_ids if rid in existing and rid not in present]
+            if not to_add:
+                return {'added': [], 'notFound': not_found}
+
+            if after_id is not None:
+                before = cls._position_of(list_obj.id, after_id)
+                after = cls._next_key(list_obj.id, before)
+            else:
+                before = ListItem.objects.filter(list=list_obj).order_by(
+                    '-position'
+                ).values_list('position', flat=True).first()
+                after = None
+
+            keys = cls._keys_between(before, after, len(to_add))
+            ListItem.objects.bulk_create([
+                ListItem(list=list_obj, restaurant_id=rid, position=key)
+                for rid, key in zip(to_add, keys)
+            ])
+            if max(len(key) for key in keys) > cls.REBALANCE_LENGTH:
+                cls._rebalance(list_obj.id)
+            cls._touch(list_obj, to_add)
+
+        return {'added': to_add, 'notFound': not_found}
+
+    @classmethod
+    def remove(cls, list_id, restaurant_ids) -> int:
+        """
+        Remove restaurants from a list.
+
+        Returns:
+            Number of items removed
+
+        Raises:
+            List.DoesNotExist: If the list doesn't exist
+            ValueError: On bad ids or too many ids
+        """
+        restaurant_ids = cls.normalize_ids(restaurant_ids)
+        if len(restaurant_ids) > cls.MAX_BATCH_SIZE:
+            raise ValueError(f'At most {cls.MAX_BATCH_SIZE} restaurants per request')
+
+        with transaction.atomic():
+            list_obj = cls._lock(list_id)
+            removed, _ = ListItem.objects.filter(
+                list=list_obj, restaurant_id__in=restaurant_ids
+            ).delete()
+            if removed:
+                cls._touch(list_obj, restaurant_ids)
+        return removed
+
+    @classmethod
+    def move(cls, list_id, restaurant_id, after_id=None) -> None:
+        """
+        Move a restaurant to just after another one (or to the top).
+
+        Only the moved row is written.
+
+        Raises:
+            List.DoesNotExist: If the list doesn't exist
+            ValueError: If either restaurant isn't in the list
+        """
+        (restaurant_id,) = cls.normalize_ids([restaurant_id])
+
+        with transaction.atomic():
+            list_obj = cls._lock(list_id)
+            try:
+                item = ListItem.objects.get(list=list_obj, restaurant_id=restaurant_id)
+            except ListItem.DoesNotExist:
+                raise ValueError('Restaurant is not in this list')
+
+            if after_id is not None:
+                (after_id,) = cls.normalize_ids([after_id])
+                if after_id == restaurant_id:
+                    return
+                before = cls._position_of(list_obj.id, after_id)
+                after = ListItem.objects.filter(
+                    list=list_obj, position__gt=before
+                ).exclude(id=item.id).order_by('position').values_list('position', flat=True).first()
+            else:
+                before = None
+                after = ListItem.objects.filter(list=list_obj).exclude(
+                    id=item.id
+                ).order_by('position').values_list('position', flat=True).first()
+
+            item.position = key_between(before, after)
+            item.save(update_fields=['position'])
+            if len(item.position) > cls.REBALANCE_LENGTH:
+                cls._rebalance(list_obj.id)
+            cls._touch(list_obj)
+
+    @classmethod
+    def replace(cls, list_id, restaurant_ids) -> None:
+        """
+        Replace a list's contents with exactly these restaurants, in order.
+
+        Raises:
+            List.DoesNotExist: If the list doesn't exist
+            ValueError: On bad ids
+        """
+        restaurant_ids = cls.normalize_ids(restaurant_ids)
+        existing = cls._existing_restaurants(restaurant_ids)
+        restaurant_ids = [rid for rid in restaurant_ids if rid in existing]
+
+        with transaction.atomic():
+            list_obj = cls._lock(list_id)
+            previous = cls.get_restaurant_ids(list_obj.id)
+            ListItem.objects.filter(list=list_obj).delete()
+            ListItem.objects.bulk_create([
+                ListItem(list=list_obj, restaurant_id=rid, position=key)
+                for rid, key in zip(restaurant_ids, keys_after(None, len(restaurant_ids)))
+            ])
+            cls._touch(list_obj, set(previous) | set(restaurant_ids))
+
+    @classmethod
+    def _position_of(cls, list_id, restaurant_id) -> str:
+        (restaurant_id,) = cls.normalize_ids([restaurant_id])
+        position = ListItem.objects.filter(
+            list_id=list_id, restaurant_id=restaurant_id
+        ).values_list('position', flat=True).first()
+        if position is None:
+            raise ValueError('Anchor restaurant is not in this list')
+        return position
+
+    @classmethod
+    def _rebalance(cls, list_id) -> None:
+        """Reassign short, evenly spaced keys to every item (caller holds the lock)."""
+        items = list(ListItem.objects.filter(list_id=list_id).order_by('position'))
+        # (list, position) is unique, so park every item under a '~' prefix
+        # (sorts after all real keys) before writing the final keys
+        for item, key in zip(items, keys_after(None, len(items))):
+            item.position = '~' + key
+        ListItem.objects.bulk_update(items, ['position'], batch_size=500)
+        for item in items:
+            item.position = item.position[1:]
+        ListItem.objects.bulk_update(items, ['position'], batch_size=500)
+
+
+class ListDiscoveryService:
+    """
+    Trending lists and "lists containing this restaurant".
+
+    Popularity is kept in ListStats and updated with a single UPDATE per
+    view/bookmark. trending_score is a forward-decayed sum with a
+    TRENDING_HALF_LIFE half-life, stored in log space (see apps.core.decay):
+    newer events count exponentially more and scores of lists that haven't
+    been touched never need rewriting - ORDER BY trending_score is already
+    the decayed ranking.
+
+    The restaurant -> lists lookup uses the list_items restaurant index and
+    is cached per restaurant, invalidated when list membership changes.
+    """
+
+    CACHE_TTL = 600  # 10 minutes
+    VIEW_DEDUPE_TTL = 3600  # 1 hour
+    MAX_RESULTS = 50
+
+    TRENDING_HALF_LIFE = timedelta(days=3)
+    VIEW_WEIGHT = 1.0
+    BOOKMARK_WEIGHT = 5.0
+
+    @classmethod
+    def _score(cls, weight: float, at: datetime = None) -> float:
+        return decay.log_weight(weight, cls.TRENDING_HALF_LIFE, at)
+
+    @classmethod
+    def _bump(cls, list_id, views: int = 0, bookmarks: int = 0,
+              score=None, initial_score: float = decay.EMPTY) -> None:
+        """
+        Args:
+            score: UPDATE expression for trending_score (default: unchanged)
+            initial_score: trending_score when the stats row doesn't exist yet
+        """
+        updated = ListStats.objects.filter(list_id=list_id).update(
+            view_count=F('view_count') + views,
+            bookmark_count=F('bookmark_count') + bookmarks,
+            trending_score=score if score is not None else F('trending_score'),
+            updated_at=timezone.now(),
+        )
+        if not updated:
+            try:
+                with transaction.atomic():
+                    ListStats.objects.create(
+                        list_id=list_id,
+                        view_count=max(views, 0),
+                        bookmark_count=max(bookmarks, 0),
+                        trending_score=initial_score,
+                    )
+            except IntegrityError:
+                # Created concurrently - apply as an update instead
+                cls._bump(list_id, views, bookmarks, score, initial_score)
+
+    @classmethod
+    def record_view(cls, list_id, user_id) -> bool:
+        """
+        Count a view that came with a userId, at most once per viewer per
+        VIEW_DEDUPE_TTL, so refreshes and anonymous crawlers don't inflate
+        trending.
+
+        Returns:
+            True if the view was counted
+        """
+        if not cache.add(f"list_view:{list_id}:{user_id}", True, cls.VIEW_DEDUPE_TTL):
+            return False
+        score = cls._score(cls.VIEW_WEIGHT)
+        cls._bump(
+            list_id, views=1,
+            score=decay.add_expression('trending_score', score), initial_score=score,
+        )
+        return True
+
+    @classmethod
+    def bookmark(cls, list_id, user_id) -> bool:
+        """
+        Bookmark a list.
+
+        Returns:
+            True if newly bookmarked, False if it already was
+
+        Raises:
+            ValueError: If user_id isn't a UUID
+            List.DoesNotExist: If the list doesn't exist
+            User.DoesNotExist: If the user doesn't exist
+        """
+        user_id = cls._parse_user_id(user_id)
+        list_obj = List.objects.only('id', 'user_id', 'name').get(id=list_id)
+        if not User.objects.filter(id=user_id).exists():
+            raise User.DoesNotExist('User not found')
+        with transaction.atomic():
+            _, created = ListBookmark.objects.get_or_create(list=list_obj, user_id=user_id)
+            if created:
+                score = cls._score(cls.BOOKMARK_WEIGHT)
+                cls._bump(
+                    list_obj.id, bookmarks=1,
+                    score=decay.add_expression('trending_score', score), initial_score=score,
+                )
+                NotificationEvents.emit(
+                    'list_bookmark', list_obj.user_id, user_id, target_list=list_obj.name
+                )
+        return created
+
+    @classmethod
+    def unbookmark(cls, list_id, user_id) -> bool:
+        """
+        Remove a bookmark, taking back exactly the score it added.
+
+        Returns:
+            True if a bookmark was removed
+
+        Raises:
+            ValueError: If user_id isn't a UUID
+        """
+        user_id = cls._parse_user_id(user_id)
+        with transaction.atomic():
+            bookmark = ListBookmark.objects.select_for_update().filter(
+                list_id=list_id, user_id=user_id
+            ).first()
+            if bookmark is None:
+                return False
+            bookmark.delete()
+            cls._bump(
+                list_id,
+                bookmarks=-1,
+                score=decay.remove_expression(
+                    'trending_score', cls._score(cls.BOOKMARK_WEIGHT, bookmark.created_at)
+                ),
+            )
+            list_obj = List.objects.only('id', 'user_id', 'name').filter(id=list_id).first()
+            if list_obj is not None:
+                NotificationEvents.retract(
+                    'list_bookmark', list_obj.user_id, user_id, target_list=list_obj.name
+                )
+        return True
+
+    @staticmethod
+    def _parse_user_id(user_id) -> uuid.UUID:
+        try:
+            return uuid.UUID(str(user_id))
+        except ValueError as e:
+            raise ValueError('userId must be a UUID') from e
+
+    @classmethod
+    def refresh(cls, list_ids=None, batch_size: int = 500) -> int:
+        """
+        Recompute trending_score from view counts and bookmark rows.
+
+        View timestamps aren't stored, so a rebuild credits views at the
+        list's creation time; use it to rebuild scores written outside the
+        API (or by an older scoring scheme), not as a replacement for them.
+
+        Args:
+            list_ids: Lists to refresh (default: every list with stats)
+
+        Returns:
+            Number of lists updated
+        """
+        stats = ListStats.objects.select_related('list').only(
+            'list_id', 'view_count', 'trending_score', 'list__created_at'
+        ).order_by('list_id')
+        if list_ids is not None:
+            stats = stats.filter(list_id__in=list_ids)
+
+        updated = 0
+        batch = []
+        for row in stats.iterator(chunk_size=batch_size):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                updated += cls._refresh_batch(batch)
+                batch = []
+        if batch:
+            updated += cls._refresh_batch(batch)
+        return updated
+
+    @classmethod
+    def _refresh_batch(cls, rows: list) -> int:
+        scores = {
+            row.list_id: (
+                cls._score(cls.VIEW_WEIGHT * row.view_count, row.list.created_at)
+                if row.view_count > 0 else decay.EMPTY
+            )
+            for row in rows
+        }
+        bookmarks = ListBookmark.objects.filter(
+            list_id__in=list(scores)
+        ).values_list('list_id', 'created_at')
+        for list_id, created_at in bookmarks:
+            scores[list_id] = decay.log_add(scores[list_id], cls._score(cls.BOOKMARK_WEIGHT, created_at))
+
+        for row in rows:
+            row.trending_score = scores[row.list_id]
+        ListStats.objects.bulk_update(rows, ['trending_score'])
+        return len(rows)
+
+    @classmethod
+    def get_trending(cls, limit: int = 20) -> list:
+        """Get the highest-scoring public lists (headers)."""
+        limit = max(1, min(limit, cls.MAX_RESULTS))
+        list_ids = ListStats.objects.filter(
+            list__is_public=True
+        ).order_by('-trending_score').values_list('list_id', flat=True)[:limit]
+        return ListHeaderCache.get_many(list_ids)
+
+    @staticmethod
+    def restaurant_cache_key(restaurant_id) -> str:
+        return f"restaurant_lists:{restaurant_id}"
+
+    @classmethod
+    def get_lists_for_restaurant(cls, restaurant_id, limit: int = 20) -> list:
+        """
+        Get public lists that include a restaurant, most popular first.
+
+        Returns:
+            List headers
+        """
+        limit = max(1, min(limit, cls.MAX_RESULTS))
+        cache_key = cls.restaurant_cache_key(restaurant_id)
+        list_ids = cache.get(cache_key)
+        if list_ids is None:
+            list_ids = [
+                str(lid) for lid in ListItem.objects.filter(
+                    restaurant_id=restaurant_id,
+                    list__is_public=True,
+                ).order_by(
+                    F('list__stats__trending_score').desc(nulls_last=True),
+                    '-list__created_at',
+                ).values_list('list_id', flat=True)[:cls.MAX_RESULTS]
+            ]
+            cache.set(cache_key, list_ids, cls.CACHE_TTL)
+        return ListHeaderCache.get_many(list_ids[:limit])
+
+    @classmethod
+    def invalidate_restaurants(cls, restaurant_ids) -> None:
+        cache.delete_many([cls.restaurant_cache_key(rid) for rid in restaurant_ids])
@@ -0,0 +1,84 @@
+"""
+Tests for list items and the legacy lists.restaurants array.
+"""
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from .models import List, ListItem
+from .services import ListHeaderCache, ListItemService
+
+
+@pytest.fixture
+def legacy_list(make_user, make_restaurant):
+    """A list whose contents are still only in the legacy array."""
+    restaurants = [make_restaurant() for _ in range(5)]
+    list_obj = List.objects.create(
+        user=make_user(), name='Legacy', restaurants=[r.id for r in restaurants]
+    )
+    return list_obj, [r.id for r in restaurants]
+
+
+@pytest.mark.django_db
+def test_unmerged_list_reads_the_legacy_array(legacy_list):
+    list_obj, ids = legacy_list
+
+    assert ListItemService.get_restaurant_ids(list_obj.id) == ids
+
+    page, cursor = ListItemService.get_page(list_obj.id, limit=3)
+    rest, end = ListItemService.get_page(list_obj.id, cursor=cursor, limit=3)
+    assert page + rest == ids
+    assert end is None
+
+
+@pytest.mark.django_db
+def test_cursor_from_the_legacy_array_survives_the_merge(legacy_list):
+    list_obj, ids = legacy_list
+    page, cursor = ListItemService.get_page(list_obj.id, limit=2)
+
+    ListItemService.merge_legacy(list_obj.id)
+
+    rest, _ = ListItemService.get_page(list_obj.id, cursor=cursor, limit=10)
+    assert page + rest == ids
+
+
+@pytest.mark.django_db
+def test_first_edit_merges_the_legacy_array(legacy_list, make_restaurant):
+    list_obj, ids = legacy_list
+    extra = make_restaurant().id
+
+    ListItemService.add(list_obj.id, [extra])
+    ListItemService.remove(list_obj.id, [ids[0]])
+
+    assert ListItemService.get_restaurant_ids(list_obj.id) == ids[1:] + [extra]
+    list_obj.refresh_from_db()
+    assert list_obj.restaurants == []
+
+
+@pytest.mark.django_db
+def test_backfill_merges_ids_missing_from_partly_migrated_lists(legacy_list):
+    list_obj, ids = legacy_list
+    ListItem.objects.create(list=list_obj, restaurant_id=ids[2], position='V0001')
+
+    call_command('migrate_list_items', stdout=StringIO())
+
+    assert ListItemService.get_restaurant_ids(list_obj.id) == [ids[2], ids[0], ids[1], ids[3], ids[4]]
+    call_command('migrate_list_items', stdout=StringIO())
+    assert ListItem.objects.filter(list=list_obj).count() == 5
+
+
+@pytest.mark.django_db
+def test_header_counts_items_without_listing_them(
+    legacy_list, make_restaurant, django_capture_on_commit_callbacks
+):
+    list_obj, _ = legacy_list
+    assert ListHeaderCache.get(list_obj.id)['restaurantCount'] == 5
+
+    with django_capture_on_commit_callbacks(execute=True):
+        ListItemService.add(list_obj.id, [make_restaurant().id])
+
+    header = ListHeaderCache.get(list_obj.id)
+    assert header['restaurantCount'] == 6
+    assert 'restaurants' not in header
+    assert ListHeaderCache.get_many([list_obj.id]) == [header]
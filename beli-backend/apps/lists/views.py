@@ -3,15 +3,16 @@ Lists API views.
 
 Provides REST endpoints for user lists, matching ListService methods.
 """
-import uuid
+from django.db.models import F
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
 from .models import List
 from .serializers import ListSerializer, ListCreateSerializer, ListUpdateSerializer
-from apps.restaurants.models import Restaurant
-from apps.restaurants.serializers import RestaurantListSerializer
+from .services import ListDiscoveryService, ListHeaderCache, ListItemService, with_items
+from apps.restaurants.services import RestaurantCardCache
+from apps.users.models import User
 
 
 class ListsViewSet(viewsets.ViewSet):
@@ -21,12 +22,17 @@ class ListsViewSet(viewsets.ViewSet):
     Supports:
     - GET /api/v1/lists/user/{userId}/ - Get user's lists
     - GET /api/v1/lists/featured/ - Get featured lists
-    - GET /api/v1/lists/{id}/ - Get single list
+    - GET /api/v1/lists/trending/ - Get trending public lists
+    - GET /api/v1/lists/restaurant/{restaurantId}/ - Get public lists containing a restaurant
+    - GET /api/v1/lists/{id}/ - Get single list (restaurants paged, in list order)
     - POST /api/v1/lists/ - Create list
     - PATCH /api/v1/lists/{id}/ - Update list
     - DELETE /api/v1/lists/{id}/ - Delete list
-    - POST /api/v1/lists/{id}/add/ - Add restaurant to list
-    - POST /api/v1/lists/{id}/remove/ - Remove restaurant from list
+    - POST /api/v1/lists/{id}/add/ - Add restaurant(s) to list
+    - POST /api/v1/lists/{id}/remove/ - Remove restaurant(s) from list
+    - POST /api/v1/lists/{id}/move/ - Move a restaurant within the list
+    - POST /api/v1/lists/{id}/bookmark/ - Bookmark list
+    - DELETE /api/v1/lists/{id}/bookmark/ - Remove bookmark
     """
 
     def list(self, request):
@@ -36,7 +42,7 @@ class ListsViewSet(viewsets.ViewSet):
         Note: Returns empty array if lists table doesn't exist in Supabase.
         """
         try:
-            lists = List.objects.all().order_by('-created_at')[:50]
+            lists = with_items(List.objects.all().order_by('-created_at'))[:50]
             serializer = ListSerializer(lists, many=True)
             return Response(serializer.data)
         except Exception:
@@ -45,23 +51,46 @@ class ListsViewSet(viewsets.ViewSet):
 
     def retrieve(self, request, pk=None):
         """
-        Get a single list with its restaurants.
+        Get a single list with one page of its restaurants, in list order.
+
+        The header comes from ListHeaderCache and restaurants are hydrated
+        from the shared RestaurantCardCache, so a page costs one small
+        index scan regardless of list size. 'restaurants' holds this page's
+        ids only.
+
+        Query params:
+            cursor: restaurantDetailsNextCursor from the previous page
+            limit: Restaurants per page (default 50, max 200)
+            userId: Viewer; only first-page views that carry one count
+                towards trending (once per viewer per hour)
 
         Maps to: ListService.getListById()
         """
         try:
-            list_obj = List.objects.get(id=pk)
+            list_data = ListHeaderCache.get(pk)
         except List.DoesNotExist:
             return Response(
                 {'error': 'List not found'},
                 status=status.HTTP_404_NOT_FOUND
             )
 
+        try:
+            restaurant_ids, next_cursor = ListItemService.get_page(
+                pk,
+                cursor=request.query_params.get('cursor'),
+                limit=int(request.query_params.get('limit', ListItemService.DEFAULT_PAGE_SIZE)),
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        viewer_id = request.query_params.get('userId')
+        if viewer_id and not request.query_params.get('cursor'):
+            ListDiscoveryService.record_view(pk, viewer_id)
+
         # Get full restaurant data
-        list_data = ListSerializer(list_obj).data
-        if list_obj.restaurants:
-            restaurants = Restaurant.objects.filter(id__in=list_obj.restaurants)
-            list_data['restaurantDetails'] = RestaurantListSerializer(restaurants, many=True).data
+        list_data['restaurants'] = restaurant_ids
+        list_data['restaurantDetails'] = RestaurantCardCache.get_many(restaurant_ids)
+        list_data['restaurantDetailsNextCursor'] = next_cursor
 
         return Response(list_data)
 
@@ -81,12 +110,14 @@ class ListsViewSet(viewsets.ViewSet):
             user_id=data['userId'],
             name=data['name'],
             description=data.get('description', ''),
-            restaurants=data.get('restaurants', []),
             is_public=data.get('isPublic', True),
             category=data.get('category', 'restaurants'),
             list_type=data.get('listType', 'playlists'),
         )
+        if data.get('restaurants'):
+            ListItemService.replace(list_obj.id, data['restaurants'])
 
+        list_obj = with_items(List.objects.all()).get(id=list_obj.id)
         return Response(ListSerializer(list_obj).data, status=status.HTTP_201_CREATED)
 
     def partial_update(self, request, pk=None):
@@ -113,12 +144,19 @@ class ListsViewSet(viewsets.ViewSet):
             list_obj.name = data['name']
         if 'description' in data:
             list_obj.description = data['description']
-        if 'restaurants' in data:
-            list_obj.restaurants = data['restaurants']
+        visibility_changed = 'isPublic' in data and data['isPublic'] != list_obj.is_public
         if 'isPublic' in data:
             list_obj.is_public = data['isPublic']
 
-        list_obj.save()
+        # Leave the legacy restaurants array to ListItemService
+        list_obj.save(update_fields=['name', 'description', 'is_public', 'updated_at'])
+        if 'restaurants' in data:
+            ListItemService.replace(list_obj.id, data['restaurants'])
+        ListHeaderCache.invalidate(list_obj.id)
+        if visibility_changed:
+            ListDiscoveryService.invalidate_restaurants(ListItemService.get_restaurant_ids(list_obj.id))
+
+        list_obj = with_items(List.objects.all()).get(id=list_obj.id)
         return Response(ListSerializer(list_obj).data)
 
     def destroy(self, request, pk=None):
@@ -127,8 +165,11 @@ class ListsViewSet(viewsets.ViewSet):
 
         Maps to: ListService.deleteList()
         """
+        restaurant_ids = ListItemService.get_restaurant_ids(pk)
         deleted, _ = List.objects.filter(id=pk).delete()
         if deleted:
+            ListHeaderCache.invalidate(pk)
+            ListDiscoveryService.invalidate_restaurants(restaurant_ids)
             return Response(status=status.HTTP_204_NO_CONTENT)
         return Response(
             {'error': 'List not found'},
@@ -142,7 +183,7 @@ class ListsViewSet(viewsets.ViewSet):
 
         Maps to: ListService.getUserLists()
         """
-        lists = List.objects.filter(user_id=user_id).order_by('-created_at')
+        lists = with_items(List.objects.filter(user_id=user_id).order_by('-created_at'))
         serializer = ListSerializer(lists, many=True)
         return Response(serializer.data)
 
@@ -153,43 +194,87 @@ class ListsViewSet(viewsets.ViewSet):
 
         Maps to: ListService.getFeaturedLists()
         """
-        lists = List.objects.filter(is_featured=True).order_by('-created_at')[:20]
-        serializer = ListSerializer(lists, many=True)
-        return Response(serializer.data)
+        list_ids = List.objects.filter(is_featured=True).order_by(
+            F('stats__trending_score').desc(nulls_last=True), '-created_at'
+        ).values_list('id', flat=True)[:20]
+        return Response(ListHeaderCache.get_many(list_ids))
+
+    @action(detail=False, methods=['get'])
+    def trending(self, request):
+        """
+        Get trending public lists, ranked by time-decayed views and bookmarks.
+        """
+        limit = int(request.query_params.get('limit', 20))
+        return Response(ListDiscoveryService.get_trending(limit))
+
+    @action(detail=False, methods=['get'], url_path='restaurant/(?P<restaurant_id>[^/.]+)')
+    def restaurant_lists(self, request, restaurant_id=None):
+        """
+        Get public lists that include a restaurant, most popular first.
+        """
+        limit = int(request.query_params.get('limit', 20))
+        return Response(ListDiscoveryService.get_lists_for_restaurant(restaurant_id, limit))
 
     @action(detail=True, methods=['post'])
     def add(self, request, pk=None):
         """
-        Add restaurant to list.
+        Add restaurant(s) to list.
+
+        Body: {"restaurantId": id} or {"restaurantIds": [...]},
+        optional "afterId" to insert after that restaurant instead of
+        appending at the end.
         """
-        restaurant_id = request.data.get('restaurantId')
-        if not restaurant_id:
+        restaurant_ids = self._restaurant_ids(request)
+        if not restaurant_ids:
             return Response(
                 {'error': 'restaurantId is required'},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
         try:
-            list_obj = List.objects.get(id=pk)
+            result = ListItemService.add(pk, restaurant_ids, after_id=request.data.get('afterId'))
         except List.DoesNotExist:
             return Response(
                 {'error': 'List not found'},
                 status=status.HTTP_404_NOT_FOUND
             )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-        restaurants = list_obj.restaurants or []
-        restaurant_uuid = uuid.UUID(restaurant_id)
-        if restaurant_uuid not in restaurants:
-            restaurants.append(restaurant_uuid)
-            list_obj.restaurants = restaurants
-            list_obj.save(update_fields=['restaurants', 'updated_at'])
-
-        return Response({'success': True})
+        return Response({'success': True, **result})
 
     @action(detail=True, methods=['post'])
     def remove(self, request, pk=None):
         """
-        Remove restaurant from list.
+        Remove restaurant(s) from list.
+
+        Body: {"restaurantId": id} or {"restaurantIds": [...]}
+        """
+        restaurant_ids = self._restaurant_ids(request)
+        if not restaurant_ids:
+            return Response(
+                {'error': 'restaurantId is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            removed = ListItemService.remove(pk, restaurant_ids)
+        except List.DoesNotExist:
+            return Response(
+                {'error': 'List not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({'success': True, 'removed': removed})
+
+    @action(detail=True, methods=['post'])
+    def move(self, request, pk=None):
+        """
+        Move a restaurant within the list.
+
+        Body: {"restaurantId": id, "afterId": id or null (move to top)}
         """
         restaurant_id = request.data.get('restaurantId')
         if not restaurant_id:
@@ -199,18 +284,55 @@ class ListsViewSet(viewsets.ViewSet):
             )
 
         try:
-            list_obj = List.objects.get(id=pk)
+            ListItemService.move(pk, restaurant_id, after_id=request.data.get('afterId'))
         except List.DoesNotExist:
             return Response(
                 {'error': 'List not found'},
                 status=status.HTTP_404_NOT_FOUND
             )
-
-        restaurants = list_obj.restaurants or []
-        restaurant_uuid = uuid.UUID(restaurant_id)
-        if restaurant_uuid in restaurants:
-            restaurants.remove(restaurant_uuid)
-            list_obj.restaurants = restaurants
-            list_obj.save(update_fields=['restaurants', 'updated_at'])
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
         return Response({'success': True})
+
+    @action(detail=True, methods=['post', 'delete'])
+    def bookmark(self, request, pk=None):
+        """
+        Bookmark or un-bookmark a list.
+
+        Body (or query param on DELETE): userId
+        """
+        user_id = request.data.get('userId') or request.query_params.get('userId')
+        if not user_id:
+            return Response(
+                {'error': 'userId is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            if request.method == 'DELETE':
+                ListDiscoveryService.unbookmark(pk, user_id)
+                return Response({'success': True, 'bookmarked': False})
+
+            ListDiscoveryService.bookmark(pk, user_id)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except List.DoesNotExist:
+            return Response(
+                {'error': 'List not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        except User.DoesNotExist:
+            return Response(
+                {'error': 'User not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response({'success': True, 'bookmarked': True})
+
+    @staticmethod
+    def _restaurant_ids(request) -> list:
+        restaurant_ids = request.data.get('restaurantIds')
+        if isinstance(restaurant_ids, list):
+            return restaurant_ids
+        restaurant_id = request.data.get('restaurantId')
+        return [restaurant_id] if restaurant_id else []
@@ -0,0 +1,150 @@
+"""
+Dietary bitmap index over every restaurant's menu.
+
+Each menu item is encoded as one int: a bit per known dietary tag plus a
+bit for its category. Restaurants roll their items up into counts per
+distinct code, and every bit also gets a bitmap of the restaurants that
+have it, so questions like "restaurants with at least 3 vegan entrees" or
+"can everyone in this group eat here" are answered in memory without
+scanning menu_items per request.
+"""
+import threading
+import time
+from collections import defaultdict
+
+from .models import MenuItem
+
+# Bit positions for MenuItem.dietary_info tags; unknown tags are ignored
+DIETARY_FLAGS = ('vegetarian', 'vegan', 'gluten-free', 'dairy-free', 'nut-free', 'halal', 'kosher')
+DIETARY_BITS = {flag: 1 << i for i, flag in enumerate(DIETARY_FLAGS)}
+
+CATEGORY_BITS = {
+    category: 1 << (len(DIETARY_FLAGS) + i)
+    for i, (category, _) in enumerate(MenuItem.CATEGORY_CHOICES)
+}
+FOOD_CATEGORIES = [category for category in CATEGORY_BITS if category != 'drink']
+
+
+def dietary_mask(tags) -> int:
+    """Bitmask of the known dietary tags in a list (case-insensitive)."""
+    mask = 0
+    for tag in tags or ():
+        mask |= DIETARY_BITS.get(str(tag).strip().lower(), 0)
+    return mask
+
+
+def _set_bits(bitmap: int):
+    while bitmap:
+        low = bitmap & -bitmap
+        yield low.bit_length() - 1
+        bitmap ^= low
+
+
+class DietaryIndex:
+    """
+    Per-restaurant rollups of menu items by (dietary tags, category).
+
+    Built with one query and kept per process for REFRESH_SECONDS, like
+    RestaurantSpatialIndex; menus change rarely and a stale count only
+    nudges a filter or score.
+    """
+
+    REFRESH_SECONDS = 900  # 15 minutes
+
+    _instance = None
+    _built_at = 0.0
+    _lock = threading.Lock()
+
+    def __init__(self, rows):
+        """
+        Args:
+            rows: (restaurant id, category, dietary_info) per menu item
+        """
+        self.ids = []  # bitmap position -> restaurant id (str)
+        self.positions = {}
+        self.rollups = defaultdict(lambda: defaultdict(int))  # id -> item code -> count
+        self.bitmaps = defaultdict(int)  # single bit -> restaurants having it
+        self.with_menu = 0
+
+        for restaurant_id, category, dietary_info in rows:
+            restaurant_id = str(restaurant_id)
+            position = self.positions.get(restaurant_id)
+            if position is None:
+                position = self.positions[restaurant_id] = len(self.ids)
+                self.ids.append(restaurant_id)
+                self.with_menu |= 1 << position
+
+            code = dietary_mask(dietary_info) | CATEGORY_BITS.get(category, 0)
+            self.rollups[restaurant_id][code] += 1
+            for bit in _set_bits(code):
+                self.bitmaps[bit] |= 1 << position
+
+    @classmethod
+    def get(cls) -> 'DietaryIndex':
+        """Get the process-wide index, rebuilding it when stale."""
+        if cls._instance is None or time.monotonic() - cls._built_at > cls.REFRESH_SECONDS:
+            with cls._lock:
+                if cls._instance is None or time.monotonic() - cls._built_at > cls.REFRESH_SECONDS:
+                    cls._instance = cls(
+                        MenuItem.objects.values_list('restaurant_id', 'category', 'dietary_info').iterator()
+                    )
+                    cls._built_at = time.monotonic()
+        return cls._instance
+
+    def has_menu(self, restaurant_id) -> bool:
+        return str(restaurant_id) in self.positions
+
+    def count(self, restaurant_id, required: int, categories=None) -> int:
+        """
+        Items of a restaurant carrying every bit in `required`.
+
+        Args:
+            required: dietary_mask() of the restrictions
+            categories: Only count these categories (default: any)
+        """
+        rollup = self.rollups.get(str(restaurant_id))
+        if not rollup:
+            return 0
+        category_bits = 0
+        for category in categories or ():
+            category_bits |= CATEGORY_BITS.get(category, 0)
+        return sum(
+            n for code, n in rollup.items()
+            if code & required == required and (not category_bits or code & category_bits)
+        )
+
+    def restaurants_with(self, diets, category: str = None, min_count: int = 1) -> set:
+        """
+        Restaurants with at least min_count items meeting every diet.
+
+        Args:
+            diets: Dietary tags, e.g. ['vegan', 'gluten-free']
+            category: Menu category the items must be in (default: any food)
+
+        Returns:
+            Set of restaurant ids (str)
+        """
+        required = dietary_mask(diets)
+        categories = [category] if category else FOOD_CATEGORIES
+
+        # Restaurants that have every tag somewhere (and the category, if
+        # one was asked for) - a superset of the answer
+        candidates = self.with_menu
+        for bit in _set_bits(required | (CATEGORY_BITS.get(category, 0) if category else 0)):
+            candidates &= self.bitmaps.get(bit, 0)
+
+        return {
+            self.ids[position]
+            for position in _set_bits(candidates)
+            if self.count(self.ids[position], required, categories) >= min_count
+        }
+
+    def satisfied(self, restaurant_id, masks: list, min_options: int) -> int:
+        """
+        How many diners, given as restriction masks, have at least
+        min_options food items they can eat here.
+        """
+        return sum(
+            1 for mask in masks
+            if self.count(restaurant_id, mask, FOOD_CATEGORIES) >= min_options
+        )
@@ -0,0 +1,87 @@
+"""
+Benchmark OrderOptimizer on synthetic menus of increasing size.
+
+Menus are generated in memory (no database access) with random prices,
+popularity, portion sizes, categories and dietary tags, compiled the same
+way MenuCache compiles real menus, then solved for several party sizes
+with and without a budget.
+
+Usage:
+    python manage.py benchmark_order_optimizer
+    python manage.py benchmark_order_optimizer --sizes 50 500 5000 --parties 2 8 20 --repeat 50
+"""
+import random
+import statistics
+import time
+import uuid
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+
+from apps.menus.dietary import DIETARY_FLAGS
+from apps.menus.models import MenuItem
+from apps.menus.services import CompiledMenu, MENU_CATEGORIES, OrderOptimizer
+
+
+class Command(BaseCommand):
+    help = 'Time the budget/portion order optimizer across menu sizes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[25, 100, 500, 2000])
+        parser.add_argument('--parties', type=int, nargs='+', default=[2, 6, 12, 20])
+        parser.add_argument('--hunger', default='very-hungry', choices=['light', 'moderate', 'very-hungry'])
+        parser.add_argument('--budget-per-person', type=float, default=25.0,
+                            help='Budget for the budgeted runs, per diner')
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+
+        self.stdout.write(
+            f"{'items':>6} {'party':>5} {'mode':>9} {'p50 ms':>8} {'p95 ms':>8} "
+            f"{'points':>11} {'price':>9}"
+        )
+        for size in options['sizes']:
+            menu = CompiledMenu(self._menu_items(rng, size), version=(None, size))
+            for party_size in options['parties']:
+                for budget in (None, party_size * options['budget_per_person']):
+                    timings, order = self._time(menu, party_size, options['hunger'], budget, options['repeat'])
+                    self.stdout.write(
+                        f"{size:>6} {party_size:>5} {'budget' if budget else 'free':>9} "
+                        f"{statistics.median(timings):>8.2f} {self._p95(timings):>8.2f} "
+                        f"{order['points']:>5}/{order['target']:<5} {order['priceCents'] / 100:>9.2f}"
+                    )
+
+    @staticmethod
+    def _menu_items(rng, size):
+        portions = [choice for choice, _ in MenuItem.PORTION_CHOICES]
+        restaurant_id = uuid.uuid4()
+        return [
+            MenuItem(
+                id=uuid.uuid4(),
+                restaurant_id=restaurant_id,
+                name=f'Item {i}',
+                price=Decimal(rng.randint(300, 4500)) / 100,
+                category=rng.choice(MENU_CATEGORIES),
+                is_popular=rng.random() < 0.2,
+                popularity=rng.randint(0, 100),
+                portion_size=rng.choice(portions),
+                dietary_info=rng.sample(DIETARY_FLAGS, rng.randint(0, 2)),
+            )
+            for i in range(size)
+        ]
+
+    @staticmethod
+    def _time(menu, party_size, hunger, budget, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            order = OrderOptimizer.optimize(menu, party_size, hunger, budget=budget)
+            timings.append((time.perf_counter() - started) * 1000)
+        return timings, order
+
+    @staticmethod
+    def _p95(timings):
+        ordered = sorted(timings)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
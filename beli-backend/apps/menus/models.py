@@ -18,6 +18,13 @@ class MenuItem(models.Model):
         ('drink', 'Drink'),
     ]
 
+    PORTION_CHOICES = [
+        ('small', 'Small'),
+        ('medium', 'Medium'),
+        ('large', 'Large'),
+        ('shareable', 'Shareable'),
+    ]
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     restaurant = models.ForeignKey(
         'restaurants.Restaurant',
@@ -30,6 +37,8 @@ class MenuItem(models.Model):
     price = models.DecimalField(max_digits=8, decimal_places=2, blank=True, null=True)
     category = models.CharField(max_length=20, choices=CATEGORY_CHOICES, blank=True, null=True)
     is_popular = models.BooleanField(default=False)
+    popularity = models.IntegerField(default=0)  # 0-100
+    portion_size = models.CharField(max_length=20, choices=PORTION_CHOICES, default='medium')
     dietary_info = ArrayField(models.CharField(max_length=50), default=list)
     image_url = models.URLField(max_length=500, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
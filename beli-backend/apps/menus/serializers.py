@@ -11,6 +11,7 @@ class MenuItemSerializer(serializers.ModelSerializer):
     """
     restaurantId = serializers.UUIDField(source='restaurant_id')
     isPopular = serializers.BooleanField(source='is_popular')
+    portionSize = serializers.CharField(source='portion_size')
     dietaryInfo = serializers.ListField(source='dietary_info', child=serializers.CharField())
     imageUrl = serializers.URLField(source='image_url', allow_null=True)
 
@@ -24,6 +25,8 @@ class MenuItemSerializer(serializers.ModelSerializer):
             'price',
             'category',
             'isPopular',
+            'popularity',
+            'portionSize',
             'dietaryInfo',
             'imageUrl',
         ]
@@ -48,3 +51,14 @@ class OrderSuggestionRequestSerializer(serializers.Serializer):
         required=False,
         default=list
     )
+    mode = serializers.ChoiceField(
+        choices=['popular', 'optimized'],
+        default='popular'
+    )
+    budget = serializers.DecimalField(
+        max_digits=8,
+        decimal_places=2,
+        min_value=0,
+        required=False,
+        allow_null=True
+    )
@@ -1,10 +1,134 @@
 """
-Menu services - Order suggestion algorithm.
+Menu services - Compiled menu cache and order suggestion algorithm.
 
 Matches the TypeScript MenuService.generateOrderSuggestion() implementation.
 """
+import math
+import threading
+import time
 import uuid
+from collections import OrderedDict
+
+from django.db.models import Count, Max
+from rest_framework.renderers import JSONRenderer
+
+from .dietary import dietary_mask
 from .models import MenuItem
+from .serializers import MenuItemSerializer
+
+MENU_CATEGORIES = [choice for choice, _ in MenuItem.CATEGORY_CHOICES]
+
+
+class CompiledMenu:
+    """
+    One restaurant's menu, prepared once for every later request.
+
+    Items are bucketed by category and sorted most popular first, each with
+    a bitmask of its dietary tags, so applying restrictions is one AND per
+    item. The full menu response is rendered to JSON bytes up front.
+
+    Attributes:
+        version: (latest updated_at, item count) the menu was built from
+        by_category: category -> [(dietary mask, item dict)] in popularity order
+        portions: (dietary mask, portion size, price in cents, popularity,
+            item dict) for every food item (no drinks), for OrderOptimizer
+        json: Rendered MenuItemSerializer list for the menu endpoint
+    """
+
+    def __init__(self, items: list, version: tuple):
+        self.version = version
+        # Same order as the menu endpoint: category, popular first, name
+        items = sorted(items, key=lambda m: (m.category is None, m.category or '', not m.is_popular, m.name))
+
+        self.by_category = {category: [] for category in MENU_CATEGORIES}
+        self.portions = []
+        for item in items:
+            mask = dietary_mask(item.dietary_info)
+            entry = {
+                'id': str(item.id),
+                'name': item.name,
+                'description': item.description,
+                'price': float(item.price or 0),
+                'category': item.category,
+            }
+            self.by_category.setdefault(item.category, []).append((mask, entry))
+            if item.category != 'drink':
+                self.portions.append((
+                    mask,
+                    item.portion_size or 'medium',
+                    round((item.price or 0) * 100),
+                    item.popularity or 0,
+                    entry,
+                ))
+
+        self.json = JSONRenderer().render(MenuItemSerializer(items, many=True).data)
+
+    def __bool__(self):
+        return any(self.by_category.values())
+
+    def filtered(self, dietary_restrictions) -> dict:
+        """
+        Items satisfying every known restriction, by category.
+
+        Falls back to the whole menu if nothing qualifies, like the app does.
+        """
+        required = dietary_mask(dietary_restrictions)
+        if required:
+            buckets = {
+                category: [entry for mask, entry in entries if mask & required == required]
+                for category, entries in self.by_category.items()
+            }
+            if any(buckets.values()):
+                return buckets
+        return {category: [entry for _, entry in entries] for category, entries in self.by_category.items()}
+
+
+class MenuCache:
+    """
+    Per-process cache of CompiledMenus.
+
+    A cached menu is trusted for REVALIDATE_SECONDS, then checked against
+    the restaurant's MAX(updated_at) and item count (one aggregate on the
+    restaurant_id index) and only rebuilt if either moved. The count
+    catches deletions, which leave no newer updated_at behind.
+    """
+
+    REVALIDATE_SECONDS = 30
+    MAX_MENUS = 2000
+
+    _menus = OrderedDict()  # restaurant id -> (CompiledMenu, checked_at)
+    _lock = threading.Lock()
+
+    @classmethod
+    def get(cls, restaurant_id) -> CompiledMenu:
+        restaurant_id = str(restaurant_id)
+        with cls._lock:
+            cached = cls._menus.get(restaurant_id)
+            if cached is not None:
+                cls._menus.move_to_end(restaurant_id)
+        if cached is not None and time.monotonic() - cached[1] < cls.REVALIDATE_SECONDS:
+            return cached[0]
+
+        stats = MenuItem.objects.filter(restaurant_id=restaurant_id).aggregate(
+            latest=Max('updated_at'), count=Count('id')
+        )
+        version = (stats['latest'], stats['count'])
+        if cached is not None and cached[0].version == version:
+            menu = cached[0]
+        else:
+            menu = CompiledMenu(list(MenuItem.objects.filter(restaurant_id=restaurant_id)), version)
+
+        with cls._lock:
+            cls._menus[restaurant_id] = (menu, time.monotonic())
+            cls._menus.move_to_end(restaurant_id)
+            while len(cls._menus) > cls.MAX_MENUS:
+                cls._menus.popitem(last=False)
+        return menu
+
+    @classmethod
+    def invalidate(cls, restaurant_id) -> None:
+        with cls._lock:
+            cls._menus.pop(str(restaurant_id), None)
 
 
 class OrderSuggestionService:
@@ -35,7 +159,9 @@ class OrderSuggestionService:
         party_size: int,
         hunger_level: str = 'moderate',
         meal_time: str = 'dinner',
-        dietary_restrictions: list = None
+        dietary_restrictions: list = None,
+        mode: str = 'popular',
+        budget: float = None
     ) -> dict:
         """
         Generate personalized order suggestion.
@@ -46,13 +172,16 @@ class OrderSuggestionService:
             hunger_level: 'light', 'moderate', or 'very-hungry'
             meal_time: 'breakfast', 'lunch', 'dinner', or 'any-time'
             dietary_restrictions: List of dietary restrictions
+            mode: 'popular' (most popular per course) or 'optimized'
+                (OrderOptimizer: portion target, optional budget)
+            budget: Maximum total price for 'optimized' mode
 
         Returns:
             OrderSuggestion dict with items and reasoning
         """
-        menu_items = list(MenuItem.objects.filter(restaurant_id=restaurant_id))
+        menu = MenuCache.get(restaurant_id)
 
-        if not menu_items:
+        if not menu:
             return {
                 'id': str(uuid.uuid4()),
                 'restaurantId': restaurant_id,
@@ -65,37 +194,18 @@ class OrderSuggestionService:
                 'estimatedSharability': 'Unknown',
             }
 
-        dietary_restrictions = dietary_restrictions or []
-
-        # Filter by dietary restrictions
-        filtered_menu = menu_items
-        if 'vegetarian' in dietary_restrictions:
-            filtered_menu = [
-                m for m in filtered_menu
-                if 'vegetarian' in (m.dietary_info or [])
-            ]
-        if 'gluten-free' in dietary_restrictions:
-            filtered_menu = [
-                m for m in filtered_menu
-                if 'gluten-free' in (m.dietary_info or [])
-            ]
-
-        # If filtering removed all items, use original
-        if not filtered_menu:
-            filtered_menu = menu_items
-
-        # Separate by category
-        appetizers = [m for m in filtered_menu if m.category == 'appetizer']
-        entrees = [m for m in filtered_menu if m.category == 'entree']
-        sides = [m for m in filtered_menu if m.category == 'side']
-        desserts = [m for m in filtered_menu if m.category == 'dessert']
-        drinks = [m for m in filtered_menu if m.category == 'drink']
-
-        # Sort by popularity
-        appetizers.sort(key=lambda x: x.is_popular, reverse=True)
-        entrees.sort(key=lambda x: x.is_popular, reverse=True)
-        sides.sort(key=lambda x: x.is_popular, reverse=True)
-        desserts.sort(key=lambda x: x.is_popular, reverse=True)
+        if mode == 'optimized':
+            return OrderOptimizer.suggest(
+                menu, restaurant_id, party_size, hunger_level, meal_time,
+                dietary_restrictions, budget
+            )
+
+        # Filter by dietary restrictions; buckets are already popularity-sorted
+        buckets = menu.filtered(dietary_restrictions)
+        appetizers = buckets['appetizer']
+        entrees = buckets['entree']
+        sides = buckets['side']
+        desserts = buckets['dessert']
 
         selected_items = []
         reasoning = []
@@ -143,7 +253,7 @@ class OrderSuggestionService:
 
         # Calculate total price
         total_price = sum(
-            float(item['item'].price or 0) * item['quantity']
+            item['item']['price'] * item['quantity']
             for item in selected_items
         )
 
@@ -160,17 +270,266 @@ class OrderSuggestionService:
             'hungerLevel': hunger_level,
             'mealTime': meal_time,
             'items': [
-                {
-                    'id': str(item['item'].id),
-                    'name': item['item'].name,
-                    'description': item['item'].description,
-                    'price': float(item['item'].price or 0),
-                    'category': item['item'].category,
-                    'quantity': item['quantity'],
-                }
+                dict(item['item'], quantity=item['quantity'])
                 for item in selected_items
             ],
             'totalPrice': round(total_price, 2),
             'reasoning': reasoning,
             'estimatedSharability': sharability,
         }
+
+
+class OrderOptimizer:
+    """
+    Order selection as a bounded knapsack over portion points.
+
+    The party needs party_size * hunger multiplier * POINTS_PER_PERSON
+    portion points (PORTION_POINTS per item). Among orders near that
+    target, pick the one with the highest popularity per point eaten:
+    each copy of an item is worth popularity * points, overshooting the
+    target costs OVERSHOOT_PENALTY per point and falling short costs
+    SHORTFALL_PENALTY per point.
+
+    The DP runs over portion points only, which makes it exact without a
+    budget. A budget is handled by Lagrangian relaxation - price is charged
+    at rate lambda in the item scores, and lambda is moved to where the
+    best order crosses the budget (see _fit_budget) - followed by a greedy
+    pass that spends whatever budget is left. A budgeted order costs about
+    6 DP passes (9 at most) instead of 1, which is what
+    benchmark_order_optimizer's budget rows show.
+
+    Items of the same portion size only compete on score, so just the best
+    ceil(capacity / points / copies) of each size can appear in an optimal
+    order; large menus are cut down to that before the DP runs.
+    """
+
+    POINTS_PER_PERSON = 15  # one large portion
+    MAX_COPIES = 3  # of any one item, and at most one per two diners
+    OVERSHOOT_PENALTY = 100  # per point; >= any item's popularity per point
+    SHORTFALL_PENALTY = 1000  # per point
+    BUDGET_SEARCH_STEPS = 8  # DP passes after the unconstrained one
+    BUDGET_SLACK = 0.02  # of the budget; the greedy pass spends what's left
+
+    @classmethod
+    def target_points(cls, party_size: int, hunger_level: str) -> int:
+        multiplier = OrderSuggestionService.HUNGER_MULTIPLIERS.get(hunger_level, 1.2)
+        return math.ceil(party_size * multiplier * cls.POINTS_PER_PERSON)
+
+    @classmethod
+    def optimize(cls, menu: CompiledMenu, party_size: int, hunger_level: str = 'moderate',
+                 dietary_restrictions: list = None, budget: float = None) -> dict:
+        """
+        Choose item quantities for a party.
+
+        Returns:
+            {items: [(item dict, quantity)], points, target, priceCents}
+        """
+        target = cls.target_points(party_size, hunger_level)
+        portion_points = OrderSuggestionService.PORTION_POINTS
+        copies = max(1, min(cls.MAX_COPIES, math.ceil(party_size / 2)))
+
+        required = dietary_mask(dietary_restrictions)
+        candidates = [p for p in menu.portions if p[0] & required == required] or menu.portions
+
+        # Item vectors grouped by portion points: (price cents, value per copy, entry)
+        groups = {}
+        for _, portion_size, price_cents, popularity, entry in candidates:
+            points = portion_points.get(portion_size, portion_points['medium'])
+            groups.setdefault(points, []).append((price_cents, popularity * points, entry))
+        capacity = target + max(groups, default=1) - 1
+
+        quantities = cls._solve(groups, capacity, target, copies, 0.0)
+        budget_cents = None if budget is None else max(0, round(float(budget) * 100))
+        if budget_cents is not None and cls._price(groups, quantities) > budget_cents:
+            fitting = cls._fit_budget(groups, capacity, target, copies, quantities, budget_cents)
+            quantities = cls._spend_remaining(groups, fitting, target, copies, budget_cents)
+
+        items, points, price_cents = [], 0, 0
+        for item_points, entries in groups.items():
+            for item_price, _, entry in entries:
+                quantity = quantities.get(entry['id'])
+                if quantity:
+                    items.append((entry, quantity))
+                    points += item_points * quantity
+                    price_cents += item_price * quantity
+        return {'items': items, 'points': points, 'target': target, 'priceCents': price_cents}
+
+    @classmethod
+    def _fit_budget(cls, groups: dict, capacity: int, target: int, copies: int,
+                    unconstrained: dict, budget_cents: int) -> dict:
+        """
+        Find the lambda where the best order crosses the budget.
+
+        Every order is a line objective - lambda * price, and the DP
+        returns the top line at a given lambda. Starting from the
+        unconstrained order (over budget) and the empty order (fits), each
+        pass solves at the lambda where the current over- and under-budget
+        lines cross: either a new line beats both there and replaces one
+        of them, or the crossing is the breakpoint and the search is done.
+        It also stops once an order leaves less than BUDGET_SLACK of the
+        budget (or the cheapest item's price) unspent, and after
+        BUDGET_SEARCH_STEPS passes at most.
+
+        Returns:
+            item id -> quantity, within budget
+        """
+        def line(quantities):
+            return cls._score(groups, quantities, target), cls._price(groups, quantities)
+
+        cheapest = min(price_cents for entries in groups.values() for price_cents, _, _ in entries)
+        over_line = line(unconstrained)
+        fitting, fitting_line = {}, line({})
+        for _ in range(cls.BUDGET_SEARCH_STEPS):
+            rate = (over_line[0] - fitting_line[0]) / (over_line[1] - fitting_line[1])
+            attempt = cls._solve(groups, capacity, target, copies, max(rate, 0.0))
+            attempt_line = line(attempt)
+            top = max(over_line[0] - rate * over_line[1], fitting_line[0] - rate * fitting_line[1])
+            if attempt_line[0] - rate * attempt_line[1] <= top + 1e-9 * max(1.0, abs(top)):
+                break
+            if attempt_line[1] <= budget_cents:
+                fitting, fitting_line = attempt, attempt_line
+                if budget_cents - attempt_line[1] < max(cheapest, budget_cents * cls.BUDGET_SLACK):
+                    break
+            else:
+                over_line = attempt_line
+        return fitting
+
+    @classmethod
+    def _score(cls, groups: dict, quantities: dict, target: int) -> float:
+        """Objective of an order with price left out."""
+        value = points = 0
+        for item_points, entries in groups.items():
+            for _, item_value, entry in entries:
+                quantity = quantities.get(entry['id'], 0)
+                value += item_value * quantity
+                points += item_points * quantity
+        return cls._objective(value, points, target)
+
+    @classmethod
+    def _objective(cls, value: float, points: int, target: int) -> float:
+        if points >= target:
+            return value - cls.OVERSHOOT_PENALTY * (points - target)
+        return value - cls.SHORTFALL_PENALTY * (target - points)
+
+    @staticmethod
+    def _price(groups: dict, quantities: dict) -> int:
+        return sum(
+            price_cents * quantities.get(entry['id'], 0)
+            for entries in groups.values()
+            for price_cents, _, entry in entries
+        )
+
+    @classmethod
+    def _solve(cls, groups: dict, capacity: int, target: int, copies: int, price_rate: float) -> dict:
+        """
+        One DP pass with price charged at price_rate per cent.
+
+        Returns:
+            item id -> quantity
+        """
+        # Pieces for 0/1 knapsack: each item's copies split into 1, 2, 4, ...
+        pieces = []
+        for points, items in groups.items():
+            scored = sorted(
+                ((value - price_rate * price_cents, entry['id']) for price_cents, value, entry in items),
+                reverse=True,
+            )
+            for score, item_id in scored[:math.ceil(capacity // points / copies)]:
+                remaining, chunk = copies, 1
+                while remaining:
+                    chunk = min(chunk, remaining)
+                    pieces.append((points * chunk, score * chunk, item_id, chunk))
+                    remaining -= chunk
+                    chunk *= 2
+
+        unreachable = float('-inf')
+        best = [0.0] + [unreachable] * capacity
+        taken = []
+        for weight, score, _, _ in pieces:
+            flags = bytearray(capacity + 1)
+            for p in range(capacity, weight - 1, -1):
+                candidate = best[p - weight] + score
+                if candidate > best[p]:
+                    best[p] = candidate
+                    flags[p] = 1
+            taken.append(flags)
+
+        p = max(
+            (p for p in range(capacity + 1) if best[p] != unreachable),
+            key=lambda p: cls._objective(best[p], p, target),
+        )
+        quantities = {}
+        for i in range(len(pieces) - 1, -1, -1):
+            if taken[i][p]:
+                weight, _, item_id, chunk = pieces[i]
+                quantities[item_id] = quantities.get(item_id, 0) + chunk
+                p -= weight
+        return quantities
+
+    @classmethod
+    def _spend_remaining(cls, groups: dict, quantities: dict, target: int, copies: int,
+                         budget_cents: int) -> dict:
+        """Greedily add the copy that helps most and still fits the budget."""
+        quantities = dict(quantities)
+        vectors = [
+            (points, price_cents, value, entry['id'])
+            for points, entries in groups.items()
+            for price_cents, value, entry in entries
+        ]
+        lookup = {item_id: (points, price_cents, value) for points, price_cents, value, item_id in vectors}
+        points = sum(lookup[item_id][0] * q for item_id, q in quantities.items())
+        value = sum(lookup[item_id][2] * q for item_id, q in quantities.items())
+        remaining = budget_cents - sum(lookup[item_id][1] * q for item_id, q in quantities.items())
+
+        while True:
+            current = cls._objective(value, points, target)
+            best_gain, best_item = 0, None
+            for item_points, price_cents, item_value, item_id in vectors:
+                if price_cents <= remaining and quantities.get(item_id, 0) < copies:
+                    gain = cls._objective(value + item_value, points + item_points, target) - current
+                    if gain > best_gain:
+                        best_gain, best_item = gain, (item_points, price_cents, item_value, item_id)
+            if best_item is None:
+                return quantities
+            item_points, price_cents, item_value, item_id = best_item
+            quantities[item_id] = quantities.get(item_id, 0) + 1
+            points += item_points
+            value += item_value
+            remaining -= price_cents
+
+    @classmethod
+    def suggest(cls, menu: CompiledMenu, restaurant_id: str, party_size: int, hunger_level: str,
+                meal_time: str, dietary_restrictions: list, budget: float) -> dict:
+        """Optimized order in the OrderSuggestion response shape."""
+        order = cls.optimize(menu, party_size, hunger_level, dietary_restrictions, budget)
+
+        course_order = {category: i for i, category in enumerate(MENU_CATEGORIES)}
+        items = sorted(order['items'], key=lambda pair: (course_order.get(pair[0]['category'], len(course_order)),
+                                                         pair[0]['name']))
+
+        reasoning = [
+            f"Sized for {party_size} with a {hunger_level.replace('-', ' ')} appetite "
+            f"({order['points']} of {order['target']} portion points)"
+        ]
+        if budget is not None:
+            reasoning.append(f'Fits your ${float(budget):.2f} budget')
+            if order['points'] < order['target']:
+                reasoning.append(
+                    f"The budget covers about {order['points'] * 100 // order['target']}% of a full order"
+                )
+
+        return {
+            'id': str(uuid.uuid4()),
+            'restaurantId': restaurant_id,
+            'partySize': party_size,
+            'hungerLevel': hunger_level,
+            'mealTime': meal_time,
+            'items': [dict(entry, quantity=quantity) for entry, quantity in items],
+            'totalPrice': order['priceCents'] / 100,
+            'reasoning': reasoning,
+            'estimatedSharability': (
+                'Individual portions' if party_size == 1 else f'Ideal for your group of {party_size}'
+            ),
+            'portionPoints': order['points'],
+            'targetPortionPoints': order['target'],
+        }
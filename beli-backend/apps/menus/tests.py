@@ -0,0 +1,112 @@
+"""
+Tests for the order optimizer.
+"""
+import itertools
+import random
+import uuid
+from decimal import Decimal
+
+import pytest
+
+from .models import MenuItem
+from .services import CompiledMenu, OrderOptimizer, OrderSuggestionService
+
+
+def make_menu(seed: int, size: int) -> CompiledMenu:
+    rng = random.Random(seed)
+    restaurant_id = uuid.uuid4()
+    items = [
+        MenuItem(
+            id=uuid.uuid4(),
+            restaurant_id=restaurant_id,
+            name=f'Item {i}',
+            price=Decimal(rng.randint(300, 4500)) / 100,
+            category='entree',
+            popularity=rng.randint(0, 100),
+            portion_size=rng.choice([choice for choice, _ in MenuItem.PORTION_CHOICES]),
+            dietary_info=[],
+        )
+        for i in range(size)
+    ]
+    return CompiledMenu(items, version=(None, size))
+
+
+def vectors(menu: CompiledMenu) -> list:
+    """(id, points, price cents, value per copy) per item."""
+    portion_points = OrderSuggestionService.PORTION_POINTS
+    return [
+        (entry['id'], portion_points[portion_size], price_cents, popularity * portion_points[portion_size])
+        for _, portion_size, price_cents, popularity, entry in menu.portions
+    ]
+
+
+def objective(menu: CompiledMenu, order: dict) -> float:
+    lookup = {item_id: (points, value) for item_id, points, _, value in vectors(menu)}
+    points = sum(lookup[entry['id']][0] * quantity for entry, quantity in order['items'])
+    value = sum(lookup[entry['id']][1] * quantity for entry, quantity in order['items'])
+    return OrderOptimizer._objective(value, points, order['target'])
+
+
+def brute_force(menu: CompiledMenu, party_size: int, budget_cents: int = None) -> float:
+    """Best objective over every order, by enumeration."""
+    target = OrderOptimizer.target_points(party_size, 'moderate')
+    copies = max(1, min(OrderOptimizer.MAX_COPIES, -(-party_size // 2)))
+    items = vectors(menu)
+    best = float('-inf')
+    for quantities in itertools.product(range(copies + 1), repeat=len(items)):
+        price = sum(q * price_cents for q, (_, _, price_cents, _) in zip(quantities, items))
+        if budget_cents is not None and price > budget_cents:
+            continue
+        points = sum(q * item_points for q, (_, item_points, _, _) in zip(quantities, items))
+        value = sum(q * item_value for q, (_, _, _, item_value) in zip(quantities, items))
+        best = max(best, OrderOptimizer._objective(value, points, target))
+    return best
+
+
+@pytest.mark.parametrize('seed', range(5))
+@pytest.mark.parametrize('party_size', [2, 4])
+def test_unbudgeted_order_is_optimal(seed, party_size):
+    menu = make_menu(seed, 6)
+    order = OrderOptimizer.optimize(menu, party_size)
+
+    assert objective(menu, order) == brute_force(menu, party_size)
+
+
+@pytest.mark.parametrize('seed', range(5))
+@pytest.mark.parametrize('per_person', [8, 15, 25])
+def test_budgeted_order_fits_and_stays_close_to_optimal(seed, per_person):
+    menu, party_size = make_menu(seed, 6), 4
+    budget = party_size * per_person
+
+    order = OrderOptimizer.optimize(menu, party_size, budget=budget)
+
+    assert order['priceCents'] <= budget * 100
+    best = brute_force(menu, party_size, budget * 100)
+    # Lagrangian relaxation plus a greedy fill isn't exact; it must stay
+    # within one shortfall point per diner of the true optimum
+    assert objective(menu, order) >= best - OrderOptimizer.SHORTFALL_PENALTY * party_size
+
+
+def test_generous_budget_changes_nothing():
+    menu = make_menu(0, 40)
+    free = OrderOptimizer.optimize(menu, 12)
+
+    budgeted = OrderOptimizer.optimize(menu, 12, budget=free['priceCents'] / 100)
+
+    assert budgeted == free
+
+
+def test_budgeted_search_is_bounded(monkeypatch):
+    menu = make_menu(1, 500)
+    passes = []
+    solve = OrderOptimizer._solve.__func__
+
+    def counting(cls, *args):
+        passes.append(args[-1])
+        return solve(cls, *args)
+
+    monkeypatch.setattr(OrderOptimizer, '_solve', classmethod(counting))
+    order = OrderOptimizer.optimize(menu, 20, 'very-hungry', budget=300)
+
+    assert order['priceCents'] <= 30000
+    assert len(passes) <= 1 + OrderOptimizer.BUDGET_SEARCH_STEPS
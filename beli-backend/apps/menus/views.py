@@ -3,13 +3,13 @@ Menus API views.
 
 Provides REST endpoints for restaurant menus and order suggestions.
 """
+from django.http import HttpResponse
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
-from .models import MenuItem
-from .serializers import MenuItemSerializer, OrderSuggestionRequestSerializer
-from .services import OrderSuggestionService
+from .serializers import OrderSuggestionRequestSerializer
+from .services import MenuCache, OrderSuggestionService
 
 
 class MenusViewSet(viewsets.ViewSet):
@@ -27,13 +27,11 @@ class MenusViewSet(viewsets.ViewSet):
         Get menu for a restaurant.
 
         Maps to: MenuService.getRestaurantMenu()
-        """
-        menu_items = MenuItem.objects.filter(
-            restaurant_id=restaurant_id
-        ).order_by('category', '-is_popular', 'name')
 
-        serializer = MenuItemSerializer(menu_items, many=True)
-        return Response(serializer.data)
+        Served as JSON pre-rendered by the compiled menu cache.
+        """
+        menu = MenuCache.get(restaurant_id)
+        return HttpResponse(menu.json, content_type='application/json')
 
     @action(detail=False, methods=['post'])
     def suggest(self, request):
@@ -54,6 +52,8 @@ class MenusViewSet(viewsets.ViewSet):
             hunger_level=data['hungerLevel'],
             meal_time=data['mealTime'],
             dietary_restrictions=data.get('dietaryRestrictions', []),
+            mode=data['mode'],
+            budget=data.get('budget'),
         )
 
         return Response(suggestion)
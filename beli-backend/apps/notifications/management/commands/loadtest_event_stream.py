@@ -0,0 +1,185 @@
+"""
+Load test the notification SSE stream with many idle connections.
+
+Opens --connections streams against a running ASGI server (one asyncio
+socket each, so the client itself stays cheap), holds them for --duration
+seconds and reports how many stayed open, heartbeats received and - given
+the server's pid - the server process' CPU and memory over the hold.
+
+With --publish (PostgreSQL only, since the server must hear the NOTIFYs)
+that many notification events are published to random connected users
+during the hold and end-to-end delivery latency is reported.
+
+Usage:
+    uvicorn config.asgi:application --port 8000 &
+    python manage.py loadtest_event_stream --connections 5000 --server-pid $!
+    python manage.py loadtest_event_stream --connections 2000 --duration 120 --publish 500
+"""
+import asyncio
+import json
+import os
+import random
+import resource
+import statistics
+import time
+import uuid
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from apps.core.events import publish_many
+from apps.notifications.services import NotificationFanoutService
+
+
+class Command(BaseCommand):
+    help = 'Hold many idle SSE connections open and measure server cost'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000/api/v1/notifications/stream/')
+        parser.add_argument('--connections', type=int, default=2000)
+        parser.add_argument('--duration', type=float, default=60, help='Seconds to hold the connections')
+        parser.add_argument('--ramp', type=int, default=500, help='New connections per second')
+        parser.add_argument('--connect-timeout', type=float, default=120,
+                            help='Seconds to wait for every connection before holding')
+        parser.add_argument('--server-pid', type=int, help='Sample this process from /proc')
+        parser.add_argument('--publish', type=int, default=0, help='Events to publish during the hold')
+
+    def handle(self, *args, **options):
+        if options['publish'] and connection.vendor != 'postgresql':
+            raise CommandError('--publish needs DATABASE_URL pointing at PostgreSQL')
+        url = urlsplit(options['url'])
+        if url.scheme != 'http':
+            raise CommandError('Only plain http:// URLs are supported')
+
+        # Every stream is a socket; lift the soft file limit as far as allowed
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        if soft < options['connections'] + 100:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+            soft = hard
+        if soft < options['connections'] + 100:
+            raise CommandError(f'Open file limit is {soft}; raise it (ulimit -n) or use fewer connections')
+
+        stats = asyncio.run(self._run(url, options))
+
+        hold = stats['hold_seconds']
+        self.stdout.write(
+            f"connections: {stats['held']}/{options['connections']} open at the end, "
+            f"{stats['failed']} failed, {stats['closed']} closed early"
+        )
+        self.stdout.write(f"heartbeats: {stats['heartbeats']} over {hold:.0f}s")
+        if stats['latencies']:
+            latencies = sorted(stats['latencies'])
+            p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+            self.stdout.write(
+                f"events: {len(latencies)}/{options['publish']} delivered, "
+                f"latency p50 {statistics.median(latencies):.1f} ms, p99 {p99:.1f} ms"
+            )
+        if stats['server']:
+            cpu_seconds, rss_kb = stats['server']
+            self.stdout.write(
+                f"server: {100 * cpu_seconds / hold:.1f}% of one core during the hold, "
+                f"RSS {rss_kb / 1024:.0f} MiB ({rss_kb / max(stats['held'], 1):.1f} KiB per connection)"
+            )
+        self.stdout.write(f"client: {100 * stats['client_cpu'] / hold:.1f}% of one core")
+
+    async def _run(self, url, options) -> dict:
+        stats = {'open': 0, 'failed': 0, 'closed': 0, 'heartbeats': 0, 'latencies': []}
+        user_ids = [str(uuid.uuid4()) for _ in range(options['connections'])]
+        path = url.path or '/'
+
+        clients = []
+        for i, user_id in enumerate(user_ids):
+            clients.append(asyncio.create_task(
+                self._client(url.hostname, url.port or 80, f'{path}?userId={user_id}', stats)
+            ))
+            if (i + 1) % options['ramp'] == 0:
+                await asyncio.sleep(1)
+        # Wait for the handshakes to finish so the hold measures idle cost only
+        deadline = time.monotonic() + options['connect_timeout']
+        while stats['open'] + stats['failed'] < len(clients) and time.monotonic() < deadline:
+            await asyncio.sleep(0.5)
+        self.stdout.write(f"{stats['open']} connected, {stats['failed']} failed; holding")
+
+        server_before = self._sample(options['server_pid'])
+        client_before = time.process_time()
+        started = time.monotonic()
+        if options['publish']:
+            await self._publish(user_ids, options['publish'], options['duration'])
+        remaining = options['duration'] - (time.monotonic() - started)
+        if remaining > 0:
+            await asyncio.sleep(remaining)
+        stats['hold_seconds'] = time.monotonic() - started
+        stats['client_cpu'] = time.process_time() - client_before
+        server_after = self._sample(options['server_pid'])
+        stats['server'] = server_after and (server_after[0] - server_before[0], server_after[1])
+        stats['held'] = stats['open']
+
+        for client in clients:
+            client.cancel()
+        await asyncio.gather(*clients, return_exceptions=True)
+        return stats
+
+    async def _client(self, host, port, target, stats) -> None:
+        writer = None
+        connected = False
+        try:
+            reader, writer = await asyncio.open_connection(host, port)
+            writer.write(
+                f'GET {target} HTTP/1.1\r\nHost: {host}\r\nAccept: text/event-stream\r\n\r\n'.encode()
+            )
+            status_line = await reader.readline()
+            if b' 200 ' not in status_line:
+                stats['failed'] += 1
+                return
+            stats['open'] += 1
+            connected = True
+
+            event = None
+            while True:
+                line = await reader.readline()
+                if not line:
+                    stats['closed'] += 1
+                    return
+                line = line.strip()
+                if line.startswith(b': heartbeat'):
+                    stats['heartbeats'] += 1
+                elif line.startswith(b'event: '):
+                    event = line[7:].decode()
+                elif line.startswith(b'data: ') and event == 'notification':
+                    sent_at = json.loads(line[6:]).get('sentAt')
+                    if sent_at:
+                        stats['latencies'].append((time.time() - sent_at) * 1000)
+        except OSError:
+            stats['closed' if connected else 'failed'] += 1
+        finally:
+            if connected:
+                stats['open'] -= 1
+            if writer is not None:
+                writer.close()
+
+    @staticmethod
+    async def _publish(user_ids, count, duration) -> None:
+        """Publish count notification events spread over duration/2 seconds."""
+        interval = duration / 2 / count
+        for _ in range(count):
+            user_id = random.choice(user_ids)
+            data = {'id': 'loadtest', 'sentAt': time.time()}
+            await asyncio.to_thread(publish_many, [(NotificationFanoutService.topic(user_id), 'notification', data)])
+            await asyncio.sleep(interval)
+
+    @staticmethod
+    def _sample(pid):
+        """(CPU seconds used, RSS KiB) of a process, or None."""
+        if not pid:
+            return None
+        try:
+            with open(f'/proc/{pid}/stat') as f:
+                # Fields after the parenthesised command name; utime and stime are 14 and 15
+                fields = f.read().rsplit(')', 1)[1].split()
+            with open(f'/proc/{pid}/status') as f:
+                rss_kb = next(int(line.split()[1]) for line in f if line.startswith('VmRSS:'))
+        except (OSError, StopIteration):
+            return None
+        ticks = os.sysconf('SC_CLK_TCK')
+        return (int(fields[11]) + int(fields[12])) / ticks, rss_kb
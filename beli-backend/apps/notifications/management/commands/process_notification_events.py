@@ -0,0 +1,54 @@
+"""
+Notification fan-out worker.
+
+Drains notification_events in batches, coalescing events into
+notifications (see NotificationFanoutService). Several workers can run at
+once; each claims its batch with SKIP LOCKED.
+
+Usage:
+    python manage.py process_notification_events            # run until stopped
+    python manage.py process_notification_events --once     # drain the queue and exit
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.notifications.services import NotificationFanoutService
+
+
+class Command(BaseCommand):
+    help = 'Turn queued notification events into notifications'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit once the queue is empty',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=NotificationFanoutService.BATCH_SIZE,
+            help='Events claimed per transaction',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=2.0,
+            help='Seconds to sleep when the queue is empty',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.perf_counter()
+            result = NotificationFanoutService.process_batch(options['batch_size'])
+            if result['events']:
+                self.stdout.write(
+                    f"{result['events']} events -> {len(result['created'])} new, "
+                    f"{len(result['merged'])} merged notifications "
+                    f"in {time.perf_counter() - started:.2f}s"
+                )
+            if result['events'] < options['batch_size']:
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
@@ -47,8 +47,64 @@ class Notification(models.Model):
     streak_count = models.IntegerField(blank=True, null=True)
     action_description = models.CharField(max_length=500)
     is_read = models.BooleanField(default=False)
+    # Coalescing: unread notifications with the same group_key absorb new
+    # events ("devin and 4 others liked your rating of"). actor_ids holds
+    # the distinct actors, latest last; actor_count is its length
+    group_key = models.CharField(max_length=200, blank=True, default='')
+    actor_ids = models.JSONField(default=list, blank=True)
+    actor_count = models.IntegerField(default=1)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Bumped on read-state changes so incremental sync can pick them up
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         db_table = 'notifications'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'group_key', '-created_at']),
+        ]
+
+
+class NotificationEvent(models.Model):
+    """
+    Queued domain event waiting to become a notification.
+
+    Request handlers only insert one of these; the fan-out worker
+    (process_notification_events) coalesces them into notifications and
+    deletes them. The auto-increment id gives the worker a cheap FIFO.
+    A retraction (unlike, unfollow ...) takes its actor back out of the
+    coalesced notification.
+    """
+    id = models.BigAutoField(primary_key=True)
+    event_type = models.CharField(max_length=30, choices=Notification.TYPE_CHOICES)
+    recipient_id = models.UUIDField()
+    actor_id = models.UUIDField(blank=True, null=True)
+    target_restaurant_id = models.UUIDField(blank=True, null=True)
+    target_list = models.CharField(max_length=200, blank=True, null=True)
+    comment_text = models.TextField(blank=True, null=True)
+    streak_count = models.IntegerField(blank=True, null=True)
+    retract = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'notification_events'
+
+
+class NotificationCounter(models.Model):
+    """
+    A user's unread notification count, kept in step with notification
+    inserts and read/read-all (see UnreadCounterService) so badge polling
+    never counts rows. No row means the count hasn't been taken yet.
+    """
+    user = models.OneToOneField(
+        'users.User',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='notification_counter',
+        db_column='user_id'
+    )
+    unread_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'notification_counters'
@@ -18,6 +18,7 @@ class NotificationSerializer(serializers.ModelSerializer):
     commentText = serializers.CharField(source='comment_text', allow_null=True)
     streakCount = serializers.IntegerField(source='streak_count', allow_null=True)
     actionDescription = serializers.CharField(source='action_description')
+    actorCount = serializers.IntegerField(source='actor_count', read_only=True)
     isRead = serializers.BooleanField(source='is_read')
     timestamp = serializers.DateTimeField(source='created_at', read_only=True)
 
@@ -32,6 +33,7 @@ class NotificationSerializer(serializers.ModelSerializer):
             'commentText',
             'streakCount',
             'actionDescription',
+            'actorCount',
             'isRead',
             'timestamp',
         ]
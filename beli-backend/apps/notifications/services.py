@@ -0,0 +1,453 @@
+"""
+Notification services - incremental sync, the event fan-out pipeline and
+unread counters.
+"""
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Max
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from apps.core.events import publish_many
+from apps.core.sync import Watermark, changed_after, make_etag
+from .models import Notification, NotificationCounter, NotificationEvent
+
+
+class NotificationSyncService:
+    """
+    Builds notification pages, ETags and since-watermark deltas.
+
+    Notifications are never deleted, so a delta is just the rows whose
+    updated_at moved past the watermark (new or read-state changed).
+    """
+
+    @classmethod
+    def _base_queryset(cls, user_id: str = None):
+        queryset = Notification.objects.all()
+        if user_id:
+            queryset = queryset.filter(user_id=user_id)
+        return queryset
+
+    @classmethod
+    def get_notifications(cls, user_id: str = None, limit: int = 50):
+        """Latest notifications, newest first."""
+        return cls._base_queryset(user_id).select_related(
+            'actor_user', 'target_restaurant'
+        ).order_by('-created_at')[:limit]
+
+    @classmethod
+    def get_sync_state(cls, user_id: str = None, *extra) -> tuple:
+        """
+        Compute the ETag and current watermark for a user's notifications.
+
+        Returns:
+            (etag, watermark) - watermark is None when there are none
+        """
+        last_update = cls._base_queryset(user_id).aggregate(
+            last=Max('updated_at')
+        )['last']
+        etag = make_etag('notifications', user_id or 'all', last_update, *extra)
+        return etag, last_update
+
+    @classmethod
+    def get_changes(cls, user_id: str, since, limit: int = 50) -> dict:
+        """
+        Get notifications created or changed after a watermark.
+
+        Returns:
+            Dict with 'items', 'watermark' (Watermark to send next) and
+            'hasMore'
+        """
+        changed = list(
+            cls._base_queryset(user_id).filter(changed_after(since))
+            .select_related('actor_user', 'target_restaurant')
+            .order_by('updated_at', 'id')[:limit + 1]
+        )
+        has_more = len(changed) > limit
+        changed = changed[:limit]
+
+        return {
+            'items': changed,
+            'watermark': Watermark(changed[-1].updated_at, changed[-1].id) if changed else since,
+            'hasMore': has_more,
+        }
+
+
+class NotificationEvents:
+    """
+    Producer side of the notification pipeline.
+
+    Emitting is a single INSERT into notification_events, so the request
+    that caused an event never builds, coalesces or fans out notifications
+    itself; NotificationFanoutService does that in the background.
+    """
+
+    @classmethod
+    def emit(cls, event_type: str, recipient_id, actor_id=None, **targets) -> None:
+        """
+        Queue an event.
+
+        Args:
+            event_type: One of Notification.TYPE_CHOICES
+            recipient_id: User to notify
+            actor_id: User who caused the event
+            targets: target_restaurant_id, target_list, comment_text and/or
+                streak_count
+        """
+        cls.emit_many([
+            NotificationEvent(event_type=event_type, recipient_id=recipient_id, actor_id=actor_id, **targets)
+        ])
+
+    @classmethod
+    def retract(cls, event_type: str, recipient_id, actor_id, **targets) -> None:
+        """
+        Queue taking an actor back out of a coalesced notification (an
+        unlike, unfollow or removed bookmark). Same arguments as emit();
+        only COALESCED_TYPES can be retracted.
+        """
+        cls.emit_many([
+            NotificationEvent(
+                event_type=event_type, recipient_id=recipient_id, actor_id=actor_id, retract=True, **targets
+            )
+        ])
+
+    @classmethod
+    def emit_many(cls, events) -> None:
+        """Queue NotificationEvents, dropping users acting on their own content."""
+        events = [
+            event for event in events
+            if event.actor_id is None or str(event.actor_id) != str(event.recipient_id)
+        ]
+        if events:
+            NotificationEvent.objects.bulk_create(events)
+
+
+class NotificationFanoutService:
+    """
+    Consumer side: turns queued events into notifications in batches.
+
+    A batch is claimed with SELECT ... FOR UPDATE SKIP LOCKED, so several
+    workers can drain the queue without processing an event twice. Events
+    of a coalescing type are grouped per recipient and target, and a group
+    is merged into the recipient's latest unread notification with the
+    same key when there is a recent one - a burst of likes reads "devin
+    and 4 others liked your rating of" instead of five rows. New
+    notifications go out with bulk_create, merged ones with bulk_update.
+
+    A coalesced notification keeps its distinct actor ids, so an actor
+    who likes twice counts once and a retraction takes them back out; a
+    notification whose every actor retracted is marked read.
+    """
+
+    BATCH_SIZE = 500
+    COALESCE_WINDOW = timedelta(hours=24)
+    COALESCED_TYPES = {'rating_liked', 'bookmark_liked', 'follow', 'list_bookmark'}
+
+    # Rendered after the actor's name, before the target
+    ACTIONS = {
+        'rating_liked': 'liked your rating of',
+        'bookmark_liked': 'liked your bookmarking of',
+        'comment': 'commented on your rating of',
+        'follow': 'started following you',
+        'list_bookmark': 'bookmarked',
+        'recommendation': 'recommended',
+    }
+
+    @classmethod
+    def group_key(cls, event) -> str:
+        """Coalescing key of an event ('' for types that never coalesce)."""
+        if event.event_type not in cls.COALESCED_TYPES:
+            return ''
+        return f"{event.event_type}:{event.target_restaurant_id or ''}:{event.target_list or ''}"
+
+    @classmethod
+    def describe(cls, notification_type: str, actor_count: int = 1, streak_count: int = None) -> str:
+        if notification_type == 'streak':
+            return f"You've tried a new spot {streak_count} weeks in a row!"
+        action = cls.ACTIONS.get(notification_type, '')
+        others = actor_count - 1
+        if others <= 0:
+            return action
+        return f"and {others} other{'s' if others > 1 else ''} {action}"
+
+    @classmethod
+    def topic(cls, user_id) -> str:
+        """Realtime topic (see apps.core.events) for a user's notifications."""
+        return f'user:{user_id}'
+
+    @classmethod
+    def process_batch(cls, batch_size: int = None) -> dict:
+        """
+        Claim up to batch_size queued events and write their notifications.
+
+        Returns:
+            {'events': processed, 'created': [new Notifications],
+            'merged': [updated Notifications]}
+        """
+        batch_size = batch_size or cls.BATCH_SIZE
+        with transaction.atomic():
+            events = list(
+                NotificationEvent.objects.select_for_update(skip_locked=True).order_by('id')[:batch_size]
+            )
+            if not events:
+                return {'events': 0, 'created': [], 'merged': []}
+
+            # (recipient, group key) -> events, oldest first; events that
+            # don't coalesce get a group of their own
+            groups = {}
+            for event in events:
+                key = cls.group_key(event)
+                if event.retract and not key:
+                    continue
+                groups.setdefault((str(event.recipient_id), key or f'#{event.id}'), []).append(event)
+
+            open_notifications = cls._open_notifications(
+                [group for group in groups if not group[1].startswith('#')]
+            )
+            now = timezone.now()
+            created, merged = [], []
+            unread = Counter()
+            for (recipient_id, key), group in groups.items():
+                latest = group[-1]
+                if key.startswith('#'):
+                    created.append(cls._notification(recipient_id, latest, '', []))
+                    continue
+
+                notification = open_notifications.get((recipient_id, key))
+                before = cls._actor_ids(notification) if notification is not None else []
+                actor_ids = cls._apply(before, group)
+                if notification is None:
+                    if actor_ids:
+                        created.append(cls._notification(recipient_id, latest, key, actor_ids))
+                    continue
+                if actor_ids == before:
+                    continue
+
+                if actor_ids:
+                    notification.actor_user_id = actor_ids[-1]
+                    notification.actor_ids = actor_ids
+                    notification.actor_count = len(actor_ids)
+                    notification.action_description = cls.describe(
+                        notification.notification_type, notification.actor_count
+                    )
+                    # Only a new actor brings it back to the top
+                    if not set(actor_ids) <= set(before):
+                        notification.created_at = now
+                else:
+                    notification.is_read = True
+                    unread[recipient_id] -= 1
+                notification.updated_at = now
+                merged.append(notification)
+
+            Notification.objects.bulk_create(created, batch_size=cls.BATCH_SIZE)
+            unread.update(str(notification.user_id) for notification in created)
+            UnreadCounterService.add(unread)
+            Notification.objects.bulk_update(
+                merged,
+                ['actor_user', 'actor_ids', 'actor_count', 'action_description', 'is_read',
+                 'created_at', 'updated_at'],
+                batch_size=cls.BATCH_SIZE,
+            )
+            NotificationEvent.objects.filter(id__in=[event.id for event in events]).delete()
+            # Sent on commit, to any open SSE streams of the recipients
+            publish_many(
+                (cls.topic(notification.user_id), 'notification', {'id': notification.id})
+                for notification in created + merged
+            )
+
+        return {'events': len(events), 'created': created, 'merged': merged}
+
+    @classmethod
+    def _notification(cls, recipient_id, event, key: str, actor_ids: list) -> Notification:
+        """New notification for an event; coalesced ones carry their actors."""
+        actor_count = len(actor_ids) or 1
+        return Notification(
+            user_id=recipient_id,
+            notification_type=event.event_type,
+            actor_user_id=actor_ids[-1] if actor_ids else event.actor_id,
+            target_restaurant_id=event.target_restaurant_id,
+            target_list=event.target_list,
+            comment_text=event.comment_text,
+            streak_count=event.streak_count,
+            group_key=key,
+            actor_ids=actor_ids,
+            actor_count=actor_count,
+            action_description=cls.describe(event.event_type, actor_count, event.streak_count),
+        )
+
+    @staticmethod
+    def _actor_ids(notification) -> list:
+        """A notification's actors; rows from before actor_ids was kept only know the latest."""
+        if notification.actor_ids:
+            return list(notification.actor_ids)
+        return [str(notification.actor_user_id)] if notification.actor_user_id else []
+
+    @staticmethod
+    def _apply(actor_ids: list, events) -> list:
+        """Actor ids after a group's events, oldest first: distinct, latest last."""
+        actor_ids = list(actor_ids)
+        for event in events:
+            if event.actor_id is None:
+                continue
+            actor_id = str(event.actor_id)
+            if actor_id in actor_ids:
+                actor_ids.remove(actor_id)
+            if not event.retract:
+                actor_ids.append(actor_id)
+        return actor_ids
+
+    @classmethod
+    def _open_notifications(cls, wanted) -> dict:
+        """Latest recent unread notification per (recipient, group key)."""
+        if not wanted:
+            return {}
+        wanted = set(wanted)
+        rows = Notification.objects.filter(
+            user_id__in={recipient_id for recipient_id, _ in wanted},
+            group_key__in={key for _, key in wanted},
+            is_read=False,
+            created_at__gte=timezone.now() - cls.COALESCE_WINDOW,
+        ).order_by('created_at')
+
+        found = {}
+        for notification in rows:
+            key = (str(notification.user_id), notification.group_key)
+            if key in wanted:
+                found[key] = notification
+        return found
+
+
+class UnreadCounterService:
+    """
+    Per-user unread counts from notification_counters, fronted by a short
+    cache so a badge poll is one key lookup.
+
+    Counters move in the same transaction as the notifications they count
+    (fan-out inserts, read, read-all); cache entries are dropped after
+    commit rather than rewritten, so a racing poll can leave at most
+    CACHE_TTL of staleness. A missing row is filled from a COUNT on first
+    read, and reconcile() repairs any drift.
+    """
+
+    CACHE_TTL = 60  # 1 minute
+
+    @staticmethod
+    def cache_key(user_id) -> str:
+        return f"notification_unread:{user_id}"
+
+    @classmethod
+    def get(cls, user_id) -> int:
+        key = cls.cache_key(user_id)
+        count = cache.get(key)
+        if count is None:
+            count = NotificationCounter.objects.filter(user_id=user_id).values_list(
+                'unread_count', flat=True
+            ).first()
+            if count is None:
+                count = Notification.objects.filter(user_id=user_id, is_read=False).count()
+                NotificationCounter.objects.bulk_create(
+                    [NotificationCounter(user_id=user_id, unread_count=count)], ignore_conflicts=True
+                )
+            cache.set(key, count, cls.CACHE_TTL)
+        return count
+
+    @classmethod
+    def add(cls, counts: dict) -> None:
+        """
+        Add newly inserted unread notifications to counters.
+
+        Args:
+            counts: user id -> number of new notifications (negative for
+                notifications the fan-out marked read)
+
+        Users without a counter row are skipped; their first read counts.
+        """
+        by_delta = defaultdict(list)
+        for user_id, delta in counts.items():
+            if delta:
+                by_delta[delta].append(user_id)
+        for delta, user_ids in by_delta.items():
+            NotificationCounter.objects.filter(user_id__in=user_ids).update(
+                unread_count=Greatest(F('unread_count') + delta, 0), updated_at=timezone.now()
+            )
+        cls._invalidate(list(counts))
+
+    @classmethod
+    def mark_read(cls, notification_id) -> None:
+        """
+        Mark one notification read.
+
+        Raises:
+            Notification.DoesNotExist: If the notification doesn't exist
+        """
+        user_id = Notification.objects.values_list('user_id', flat=True).get(id=notification_id)
+        with transaction.atomic():
+            changed = Notification.objects.filter(id=notification_id, is_read=False).update(
+                is_read=True, updated_at=timezone.now()
+            )
+            if changed:
+                NotificationCounter.objects.filter(user_id=user_id, unread_count__gt=0).update(
+                    unread_count=F('unread_count') - 1, updated_at=timezone.now()
+                )
+                cls._invalidate([user_id])
+
+    @classmethod
+    def mark_all_read(cls, user_id) -> None:
+        with transaction.atomic():
+            now = timezone.now()
+            Notification.objects.filter(user_id=user_id, is_read=False).update(is_read=True, updated_at=now)
+            NotificationCounter.objects.update_or_create(user_id=user_id, defaults={'unread_count': 0})
+            cls._invalidate([user_id])
+
+    @classmethod
+    def reconcile(cls, batch_size: int = 1000) -> tuple:
+        """
+        Recount every counter row and fix the ones that drifted.
+
+        Each batch locks its counter rows first, so a concurrent fan-out
+        waits and then applies its increment on top of the corrected count.
+
+        Returns:
+            (counters checked, counters fixed)
+        """
+        checked = fixed = 0
+        last_user_id = None
+        while True:
+            with transaction.atomic():
+                counters = NotificationCounter.objects.select_for_update().order_by('user_id')
+                if last_user_id is not None:
+                    counters = counters.filter(user_id__gt=last_user_id)
+                counters = list(counters[:batch_size])
+                if not counters:
+                    break
+
+                actual = dict(
+                    Notification.objects.filter(
+                        user_id__in=[counter.user_id for counter in counters], is_read=False
+                    ).values('user_id').annotate(n=Count('id')).values_list('user_id', 'n')
+                )
+                now = timezone.now()
+                drifted = []
+                for counter in counters:
+                    count = actual.get(counter.user_id, 0)
+                    if counter.unread_count != count:
+                        counter.unread_count = count
+                        counter.updated_at = now
+                        drifted.append(counter)
+                NotificationCounter.objects.bulk_update(drifted, ['unread_count', 'updated_at'])
+                cls._invalidate([counter.user_id for counter in drifted])
+
+            checked += len(counters)
+            fixed += len(drifted)
+            last_user_id = counters[-1].user_id
+        return checked, fixed
+
+    @classmethod
+    def _invalidate(cls, user_ids) -> None:
+        """Drop cached counts once the surrounding transaction commits."""
+        keys = [cls.cache_key(user_id) for user_id in user_ids]
+        if keys:
+            transaction.on_commit(lambda: cache.delete_many(keys))
@@ -0,0 +1,155 @@
+"""
+Server-sent events stream of notifications and feed updates.
+
+One long-lived GET per signed-in client replaces polling the notification
+and feed endpoints: the stream pushes ids as things happen and the client
+fetches details (or runs a ?since= sync) only then.
+
+    GET /api/v1/notifications/stream/?userId=<uuid>
+
+Events:
+    notification      {"id"} - a notification was created or coalesced
+    activity          {"id"} - a followed user (or the viewer) posted to the feed
+    activity_deleted  {"id"} - a feed activity was removed
+    resync            {}     - updates were dropped; sync with ?since=
+
+The stream is a small ASGI app in front of Django (see config/asgi.py)
+rather than a view: Django 4.2's ASGI handler keeps a dedicated thread for
+every in-flight request, i.e. one per open stream, and never tells a
+streaming response that its client went away. Here an open stream is just
+a coroutine parked on its EventBroker subscription, which is what lets one
+process hold thousands of idle connections. It only needs the user's feed
+scope from the database, and applies the project's CORS origins itself.
+"""
+import asyncio
+import json
+import random
+import uuid
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+from apps.core.events import EventBroker
+from apps.feed.services import FeedEvents, FeedSyncService
+from .services import NotificationFanoutService
+
+STREAM_PATH = '/api/v1/notifications/stream/'
+
+HEARTBEAT_SECONDS = 15
+# Streams end after about this long and EventSource reconnects, which
+# picks up follows made since the stream opened
+MAX_STREAM_SECONDS = 900  # 15 minutes
+RETRY_MILLISECONDS = 5000
+
+
+def _feed_topics(user_id: str) -> list:
+    close_old_connections()
+    try:
+        scope = FeedSyncService.get_feed_scope(user_id)
+    finally:
+        close_old_connections()
+    return [NotificationFanoutService.topic(user_id)] + [FeedEvents.topic(uid) for uid in scope]
+
+
+class NotificationStreamApp:
+    """
+    ASGI app serving STREAM_PATH and passing everything else to Django.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http' and scope['path'] == STREAM_PATH:
+            await self.stream(scope, receive, send)
+        else:
+            await self.app(scope, receive, send)
+
+    async def stream(self, scope, receive, send):
+        headers = self._cors_headers(scope)
+        if scope['method'] != 'GET':
+            return await self._error(send, 405, 'Method not allowed', headers + [(b'allow', b'GET')])
+
+        query = parse_qs(scope['query_string'].decode('latin-1'))
+        try:
+            user_id = str(uuid.UUID(query.get('userId', [''])[0]))
+        except ValueError:
+            return await self._error(send, 400, 'userId is required', headers)
+
+        topics = await sync_to_async(_feed_topics, thread_sensitive=False)(user_id)
+        subscription = EventBroker.get().subscribe(topics)
+        if subscription is None:
+            retry_after = str(RETRY_MILLISECONDS // 1000).encode()
+            return await self._error(
+                send, 503, 'Too many open streams, try again later', headers + [(b'retry-after', retry_after)]
+            )
+
+        try:
+            await send({
+                'type': 'http.response.start',
+                'status': 200,
+                'headers': headers + [
+                    (b'content-type', b'text/event-stream'),
+                    (b'cache-control', b'no-cache'),
+                    (b'x-accel-buffering', b'no'),  # don't let nginx buffer the stream
+                ],
+            })
+            streamer = asyncio.ensure_future(self._events(subscription, send))
+            disconnect = asyncio.ensure_future(self._disconnect(receive))
+            try:
+                await asyncio.wait({streamer, disconnect}, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                streamer.cancel()
+                disconnect.cancel()
+            if streamer.done() and not streamer.cancelled() and streamer.exception() is None:
+                await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+        except OSError:
+            pass  # client went away mid-write
+        finally:
+            subscription.close()
+
+    @staticmethod
+    async def _events(subscription, send):
+        loop = asyncio.get_running_loop()
+        # Jittered so streams opened together don't all reconnect together
+        deadline = loop.time() + MAX_STREAM_SECONDS * random.uniform(0.9, 1.1)
+        body = f'retry: {RETRY_MILLISECONDS}\n\n'
+        while True:
+            await send({'type': 'http.response.body', 'body': body.encode(), 'more_body': True})
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return
+            message = await subscription.get(min(HEARTBEAT_SECONDS, remaining))
+            if message is None:
+                # Comment line: keeps proxies from timing out the connection
+                body = ': heartbeat\n\n'
+            else:
+                event, data = message
+                body = f'event: {event}\ndata: {json.dumps(data, default=str)}\n\n'
+
+    @staticmethod
+    async def _disconnect(receive):
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+    @staticmethod
+    def _cors_headers(scope) -> list:
+        """Access-Control-Allow-Origin for origins django-cors-headers would allow."""
+        origin = dict(scope['headers']).get(b'origin')
+        if origin is None:
+            return []
+        allowed = getattr(settings, 'CORS_ALLOW_ALL_ORIGINS', False) or (
+            origin.decode('latin-1') in getattr(settings, 'CORS_ALLOWED_ORIGINS', ())
+        )
+        return [(b'access-control-allow-origin', origin), (b'vary', b'origin')] if allowed else []
+
+    @staticmethod
+    async def _error(send, status: int, message: str, headers: list):
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': headers + [(b'content-type', b'application/json')],
+        })
+        await send({'type': 'http.response.body', 'body': json.dumps({'error': message}).encode()})
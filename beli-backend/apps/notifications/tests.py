@@ -0,0 +1,73 @@
+"""
+Tests for notification sync and fan-out.
+"""
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from apps.core.sync import Watermark
+from .models import Notification, NotificationEvent
+from .services import NotificationEvents, NotificationFanoutService, NotificationSyncService, UnreadCounterService
+
+
+@pytest.mark.django_db
+def test_changes_page_through_rows_sharing_a_timestamp(make_user):
+    user = make_user()
+    for _ in range(5):
+        Notification.objects.create(user=user, notification_type='follow', action_description='x')
+    # read-all stamps every row with the same instant
+    stamp = timezone.now()
+    Notification.objects.filter(user=user).update(is_read=True, updated_at=stamp)
+
+    since, seen = Watermark(stamp - timedelta(seconds=1)), []
+    while True:
+        changes = NotificationSyncService.get_changes(str(user.id), since, limit=2)
+        seen += [notification.id for notification in changes['items']]
+        since = changes['watermark']
+        if not changes['hasMore']:
+            break
+
+    assert sorted(seen) == sorted(Notification.objects.filter(user=user).values_list('id', flat=True))
+    assert NotificationSyncService.get_changes(str(user.id), since, limit=2)['items'] == []
+
+
+@pytest.mark.django_db
+def test_fanout_coalesces_likes_and_takes_back_retractions(
+    make_user, make_restaurant, django_capture_on_commit_callbacks
+):
+    owner, restaurant = make_user(), make_restaurant()
+    fans = [make_user() for _ in range(3)]
+    for fan in fans + [fans[0]]:
+        NotificationEvents.emit('rating_liked', owner.id, fan.id, target_restaurant_id=restaurant.id)
+    # Own actions and non-coalescing types
+    NotificationEvents.emit('rating_liked', owner.id, owner.id, target_restaurant_id=restaurant.id)
+    NotificationEvents.emit('streak', owner.id, streak_count=3)
+
+    assert NotificationFanoutService.process_batch()['events'] == 5
+    assert not NotificationEvent.objects.exists()
+
+    liked = Notification.objects.get(user=owner, notification_type='rating_liked')
+    assert liked.actor_ids == [str(fans[1].id), str(fans[2].id), str(fans[0].id)]
+    assert (liked.actor_count, liked.actor_user_id) == (3, fans[0].id)
+    assert Notification.objects.filter(user=owner).count() == 2
+    assert UnreadCounterService.get(owner.id) == 2
+
+    # Later events merge into the same unread notification
+    NotificationEvents.retract('rating_liked', owner.id, fans[0].id, target_restaurant_id=restaurant.id)
+    NotificationEvents.retract('rating_liked', owner.id, fans[1].id, target_restaurant_id=restaurant.id)
+    result = NotificationFanoutService.process_batch()
+
+    assert (len(result['created']), len(result['merged'])) == (0, 1)
+    liked.refresh_from_db()
+    assert (liked.actor_ids, liked.actor_count, liked.is_read) == ([str(fans[2].id)], 1, False)
+
+    # Once every actor retracted, the notification is marked read (the
+    # cached count is dropped on commit)
+    NotificationEvents.retract('rating_liked', owner.id, fans[2].id, target_restaurant_id=restaurant.id)
+    with django_capture_on_commit_callbacks(execute=True):
+        NotificationFanoutService.process_batch()
+
+    liked.refresh_from_db()
+    assert liked.is_read
+    assert UnreadCounterService.get(owner.id) == 1
@@ -5,8 +5,10 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
+from apps.core.sync import etag_matches, format_watermark, not_modified, parse_since
 from .models import Notification
 from .serializers import NotificationSerializer
+from .services import NotificationSyncService, UnreadCounterService
 
 
 class NotificationsViewSet(viewsets.ViewSet):
@@ -14,10 +16,11 @@ class NotificationsViewSet(viewsets.ViewSet):
     API endpoint for notifications.
 
     Supports:
-    - GET /api/v1/notifications/ - Get all notifications
+    - GET /api/v1/notifications/ - Get all notifications (?since= for incremental sync)
     - POST /api/v1/notifications/{id}/read/ - Mark as read
     - POST /api/v1/notifications/read-all/ - Mark all as read
-    - GET /api/v1/notifications/unread-count/ - Get unread count
+    - GET /api/v1/notifications/unread-count/ - Get unread count (cached counter)
+    - GET /api/v1/notifications/stream/ - Live notifications and feed updates (SSE, ASGI only, see stream.py)
     """
 
     def list(self, request):
@@ -26,23 +29,43 @@ class NotificationsViewSet(viewsets.ViewSet):
 
         Maps to: NotificationService.getNotifications()
 
+        Incremental sync:
+        - If-None-Match: returns 304 when nothing changed
+        - ?since=<watermark>: returns only new or updated notifications
+
         Note: Returns empty array if notifications table doesn't exist in Supabase.
         """
+        try:
+            since = parse_since(request.query_params.get('since'))
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
         try:
             user_id = request.query_params.get('userId')
             limit = int(request.query_params.get('limit', 50))
 
-            queryset = Notification.objects.select_related(
-                'actor_user', 'target_restaurant'
-            ).order_by('-created_at')
-
-            if user_id:
-                queryset = queryset.filter(user_id=user_id)
-
-            queryset = queryset[:limit]
-
-            serializer = NotificationSerializer(queryset, many=True)
-            return Response(serializer.data)
+            etag, watermark = NotificationSyncService.get_sync_state(user_id, limit, since)
+            if etag_matches(request, etag):
+                return not_modified(etag)
+
+            if since is None:
+                queryset = NotificationSyncService.get_notifications(user_id, limit)
+                response = Response(NotificationSerializer(queryset, many=True).data)
+                response['X-Sync-Watermark'] = format_watermark(watermark) or ''
+            else:
+                changes = NotificationSyncService.get_changes(user_id, since, limit)
+                if not changes['items']:
+                    return not_modified(etag)
+
+                response = Response({
+                    'items': NotificationSerializer(changes['items'], many=True).data,
+                    'deleted': [],
+                    'watermark': format_watermark(changes['watermark']),
+                    'hasMore': changes['hasMore'],
+                })
+
+            response['ETag'] = etag
+            return response
         except Exception:
             # Table doesn't exist yet in Supabase
             return Response([])
@@ -55,9 +78,7 @@ class NotificationsViewSet(viewsets.ViewSet):
         Maps to: NotificationService.markNotificationAsRead()
         """
         try:
-            notification = Notification.objects.get(id=pk)
-            notification.is_read = True
-            notification.save(update_fields=['is_read'])
+            UnreadCounterService.mark_read(pk)
             return Response({'success': True})
         except Notification.DoesNotExist:
             return Response(
@@ -79,10 +100,7 @@ class NotificationsViewSet(viewsets.ViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        Notification.objects.filter(
-            user_id=user_id,
-            is_read=False
-        ).update(is_read=True)
+        UnreadCounterService.mark_all_read(user_id)
 
         return Response({'success': True})
 
@@ -98,12 +116,7 @@ class NotificationsViewSet(viewsets.ViewSet):
             if not user_id:
                 return Response({'count': 0})
 
-            count = Notification.objects.filter(
-                user_id=user_id,
-                is_read=False
-            ).count()
-
-            return Response({'count': count})
+            return Response({'count': UnreadCounterService.get(user_id)})
         except Exception:
             # Table doesn't exist yet in Supabase
             return Response({'count': 0})
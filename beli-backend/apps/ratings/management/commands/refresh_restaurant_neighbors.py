@@ -0,0 +1,52 @@
+"""
+Refresh the item-item collaborative filtering neighbor matrix.
+
+Usage:
+    python manage.py refresh_restaurant_neighbors          # dirty restaurants only
+    python manage.py refresh_restaurant_neighbors --full   # rebuild everything
+
+Run the incremental form every few minutes and --full nightly.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.ratings.services import CollaborativeFilteringService
+
+
+class Command(BaseCommand):
+    help = 'Refresh restaurant_neighbors for collaborative filtering recommendations'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Rebuild the whole matrix instead of only dirty restaurants',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Dirty restaurants refreshed per transaction',
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+
+        if options['full']:
+            CollaborativeFilteringService.rebuild()
+            self.stdout.write(self.style.SUCCESS(
+                f'Rebuilt neighbor matrix in {time.perf_counter() - started:.2f}s'
+            ))
+            return
+
+        total = 0
+        while True:
+            refreshed = CollaborativeFilteringService.refresh_dirty(options['batch_size'])
+            total += refreshed
+            if refreshed < options['batch_size']:
+                break
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Refreshed {total} restaurants in {time.perf_counter() - started:.2f}s'
+        ))
@@ -4,4 +4,60 @@ Ratings models - reuses the Rating model from users app.
 This app provides CRUD endpoints for user-restaurant relationships.
 """
 # The Rating model is defined in apps/users/models.py
-# This file exists for Django app structure consistency
+# This file holds tables derived from ratings (recommendations)
+from django.db import models
+
+
+class FriendRecommendation(models.Model):
+    """
+    Materialized friend recommendation - maps to friend_recommendations table.
+
+    One row per (user, restaurant) that a followed user rated highly and
+    the user hasn't been to. Maintained by FriendRecommendationService.
+    """
+    user = models.ForeignKey(
+        'users.User',
+        on_delete=models.CASCADE,
+        related_name='friend_recommendations',
+        db_column='user_id'
+    )
+    restaurant = models.ForeignKey(
+        'restaurants.Restaurant',
+        on_delete=models.CASCADE,
+        related_name='+',
+        db_column='restaurant_id'
+    )
+    friend_rating = models.DecimalField(max_digits=3, decimal_places=1)
+    recommender_count = models.IntegerField()
+    top_recommender = models.ForeignKey(
+        'users.User',
+        on_delete=models.CASCADE,
+        related_name='+',
+        db_column='top_recommender_id'
+    )
+    updated_at = models.DateTimeField()
+
+    class Meta:
+        managed = False  # Table exists in Supabase
+        db_table = 'friend_recommendations'
+        unique_together = ('user', 'restaurant')
+
+
+class FriendRecommendationState(models.Model):
+    """
+    When a user's friend recommendations were last fully rebuilt.
+
+    A missing row means the user's recommendations were never materialized.
+    """
+    user = models.OneToOneField(
+        'users.User',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='+',
+        db_column='user_id'
+    )
+    refreshed_at = models.DateTimeField()
+
+    class Meta:
+        managed = False  # Table exists in Supabase
+        db_table = 'friend_recommendation_state'
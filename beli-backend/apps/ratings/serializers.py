@@ -85,3 +85,44 @@ class FriendRecommendationSerializer(serializers.Serializer):
     recommenderName = serializers.CharField()
     recommenderUsername = serializers.CharField()
     recommenderCount = serializers.IntegerField()
+
+
+class ReviewAuthorSerializer(serializers.ModelSerializer):
+    """
+    Minimal user info shown on a review (no stats - avoids per-row counts).
+    """
+    displayName = serializers.CharField(source='display_name')
+
+    class Meta:
+        model = User
+        fields = ['id', 'username', 'displayName', 'avatar']
+
+
+class RestaurantReviewSerializer(serializers.ModelSerializer):
+    """
+    Review (rating with notes) shown on a restaurant's detail page.
+    """
+    userId = serializers.UUIDField(source='user_id')
+    user = ReviewAuthorSerializer(read_only=True)
+    restaurantId = serializers.UUIDField(source='restaurant_id')
+    rating = serializers.FloatField(allow_null=True)
+    content = serializers.CharField(source='notes')
+    visitDate = serializers.DateField(source='visit_date', allow_null=True)
+    createdAt = serializers.DateTimeField(source='created_at', read_only=True)
+    likeCount = serializers.IntegerField(source='like_count', read_only=True)
+
+    class Meta:
+        model = Rating
+        fields = [
+            'id',
+            'userId',
+            'user',
+            'restaurantId',
+            'rating',
+            'content',
+            'photos',
+            'tags',
+            'visitDate',
+            'createdAt',
+            'likeCount',
+        ]
@@ -0,0 +1,974 @@
+"""
+Ratings services - bulk import, post-write side effects,
+friend recommendations, collaborative filtering, restaurant reviews
+and watchlist operations.
+"""
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Avg, Count, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Floor
+from django.utils import timezone
+
+from apps.core.pagination import decode_cursor, encode_cursor, keyset_filter
+from apps.feed.models import ActivityInteraction
+from apps.feed.services import FeedEvents
+from apps.restaurants.models import Restaurant
+from apps.users.models import Rating, User
+from .models import FriendRecommendation, FriendRecommendationState
+from .serializers import RatingCreateSerializer
+
+
+class RatingSideEffects:
+    """
+    Downstream updates that follow rating writes.
+
+    Called once per request (or once per bulk batch) with every user and
+    restaurant touched, so caches are invalidated in a single round trip.
+    User been/recommended counts are maintained by statement-level triggers
+    in the database (migration 00015).
+    """
+
+    @classmethod
+    def apply(cls, changes) -> None:
+        """
+        Update derived data after ratings were written or deleted.
+
+        Args:
+            changes: Iterable of (user_id, restaurant_id) pairs that changed
+        """
+        changes = {(str(uid), str(rid)) for uid, rid in changes}
+        if not changes:
+            return
+
+        user_ids = {uid for uid, _ in changes}
+        cache.delete_many(
+            [f"taste_profile:{uid}" for uid in user_ids] +
+            [f"cf_recs:{uid}" for uid in user_ids] +
+            [f"user_centroid:{uid}" for uid in user_ids]
+        )
+
+        restaurant_ids = {rid for _, rid in changes}
+        RestaurantReviewService.invalidate(restaurant_ids)
+        FriendRecommendationService.apply_rating_changes(changes)
+        CollaborativeFilteringService.mark_dirty(restaurant_ids)
+
+
+class BulkRatingImportService:
+    """
+    Validate and upsert many ratings with chunked INSERT ... ON CONFLICT.
+
+    Each chunk is one statement (plus one existence check per chunk), so
+    importing hundreds of ratings costs a handful of round trips instead
+    of two to three queries per rating. PostgreSQL only; the view rejects
+    the request on other databases.
+    """
+    MAX_BATCH_SIZE = 1000
+    CHUNK_SIZE = 200
+
+    UPSERT_COLUMNS = (
+        'id', 'user_id', 'restaurant_id', 'status', 'rating', 'notes',
+        'photos', 'tags', 'visit_date', 'companions', 'created_at', 'updated_at',
+    )
+    # Columns overwritten when (user_id, restaurant_id) already exists
+    UPDATE_COLUMNS = (
+        'status', 'rating', 'notes', 'photos', 'tags',
+        'visit_date', 'companions', 'updated_at',
+    )
+    ROW_PLACEHOLDER = (
+        '(%s::uuid, %s::uuid, %s::uuid, %s, %s, %s, %s::text[], %s::text[], '
+        '%s, %s::uuid[], %s, %s)'
+    )
+
+    @classmethod
+    def validate(cls, items: list, default_user_id: str = None) -> tuple:
+        """
+        Validate a batch with RatingCreateSerializer semantics.
+
+        Later items win when the same (user, restaurant) pair appears twice.
+
+        Args:
+            items: List of rating payloads (camelCase, as for POST /ratings/)
+            default_user_id: userId applied to items that omit it
+
+        Returns:
+            (valid, results) - valid is a list of (index, validated_data);
+            results maps index -> result dict for items that failed
+        """
+        valid = {}
+        results = {}
+
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                results[index] = cls._error(index, {'non_field_errors': ['Expected an object']})
+                continue
+
+            if default_user_id and 'userId' not in item:
+                item = {**item, 'userId': default_user_id}
+
+            serializer = RatingCreateSerializer(data=item)
+            if not serializer.is_valid():
+                results[index] = cls._error(index, serializer.errors)
+                continue
+
+            data = serializer.validated_data
+            key = (data['userId'], data['restaurantId'])
+            if key in valid:
+                superseded, _ = valid[key]
+                results[superseded] = {
+                    'index': superseded,
+                    'status': 'skipped',
+                    'reason': f'Superseded by item {index}',
+                }
+            valid[key] = (index, data)
+
+        return sorted(valid.values(), key=lambda pair: pair[0]), results
+
+    @classmethod
+    def upsert_chunk(cls, chunk: list) -> list:
+        """
+        Upsert one chunk of validated ratings.
+
+        Args:
+            chunk: List of (index, validated_data)
+
+        Returns:
+            List of per-item result dicts
+        """
+        results = []
+
+        # Unknown users/restaurants would abort the whole statement on FK
+        user_ids = {data['userId'] for _, data in chunk}
+        restaurant_ids = {data['restaurantId'] for _, data in chunk}
+        known_users = set(User.objects.filter(id__in=user_ids).values_list('id', flat=True))
+        known_restaurants = set(
+            Restaurant.objects.filter(id__in=restaurant_ids).values_list('id', flat=True)
+        )
+
+        rows = []
+        for index, data in chunk:
+            if data['userId'] not in known_users:
+                results.append(cls._error(index, {'userId': ['User not found']}))
+            elif data['restaurantId'] not in known_restaurants:
+                results.append(cls._error(index, {'restaurantId': ['Restaurant not found']}))
+            else:
+                rows.append((index, data))
+
+        if not rows:
+            return results
+
+        now = timezone.now()
+        params = []
+        for _, data in rows:
+            params.extend([
+                str(uuid.uuid4()),
+                str(data['userId']),
+                str(data['restaurantId']),
+                data['status'],
+                data.get('rating'),
+                data.get('notes', ''),
+                list(data.get('photos', [])),
+                list(data.get('tags', [])),
+                data.get('visitDate'),
+                [str(c) for c in data.get('companions', [])],
+                now,
+                now,
+            ])
+
+        sql = (
+            f"INSERT INTO ratings ({', '.join(cls.UPSERT_COLUMNS)}) "
+            f"VALUES {', '.join([cls.ROW_PLACEHOLDER] * len(rows))} "
+            f"ON CONFLICT (user_id, restaurant_id) DO UPDATE SET "
+            f"{', '.join(f'{col} = EXCLUDED.{col}' for col in cls.UPDATE_COLUMNS)} "
+            f"RETURNING id, user_id, restaurant_id, (xmax = 0) AS inserted"
+        )
+
+        saved = []
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            returned = {
+                (str(user_id), str(restaurant_id)): (str(rating_id), inserted)
+                for rating_id, user_id, restaurant_id, inserted in cursor.fetchall()
+            }
+            for index, data in rows:
+                rating_id, inserted = returned[(str(data['userId']), str(data['restaurantId']))]
+                saved.append((str(data['userId']), rating_id, data['status'], inserted))
+                results.append({
+                    'index': index,
+                    'status': 'created' if inserted else 'updated',
+                    'id': rating_id,
+                    'userId': str(data['userId']),
+                    'restaurantId': str(data['restaurantId']),
+                })
+            # Realtime feed updates go out in one batch when the chunk commits
+            FeedEvents.ratings_saved(saved)
+
+        return results
+
+    @classmethod
+    def run(cls, items: list, default_user_id: str = None):
+        """
+        Import a batch, yielding per-item results as each chunk commits.
+
+        Side effects (cache invalidation etc.) are applied once at the end,
+        covering every row written - even if the consumer stops early.
+
+        Yields:
+            Per-item result dicts, then a final {'summary': {...}} dict
+        """
+        valid, failed = cls.validate(items, default_user_id)
+        yield from (failed[index] for index in sorted(failed))
+
+        summary = {'created': 0, 'updated': 0, 'skipped': 0, 'errors': 0}
+        for result in failed.values():
+            summary['skipped' if result['status'] == 'skipped' else 'errors'] += 1
+
+        touched = set()
+        try:
+            for start in range(0, len(valid), cls.CHUNK_SIZE):
+                for result in cls.upsert_chunk(valid[start:start + cls.CHUNK_SIZE]):
+                    if result['status'] == 'error':
+                        summary['errors'] += 1
+                    else:
+                        summary[result['status']] += 1
+                        touched.add((result['userId'], result['restaurantId']))
+                    yield result
+        finally:
+            RatingSideEffects.apply(touched)
+
+        yield {'summary': {**summary, 'total': len(items)}}
+
+    @staticmethod
+    def _error(index: int, errors) -> dict:
+        return {'index': index, 'status': 'error', 'errors': errors}
+
+
+class FriendRecommendationService:
+    """
+    Per-user friend recommendations, materialized in SQL.
+
+    A recommendation is a restaurant that followed users rated at least
+    MIN_RATING and the user hasn't been to, aggregated per restaurant:
+    highest friend rating, distinct recommender count and the friend who
+    gave the highest rating.
+
+    Rows live in friend_recommendations. A user's set is rebuilt in full on
+    first read or when older than STALE_AFTER (which picks up follow
+    changes), and patched incrementally whenever a followee rates a place
+    or the user visits one.
+    """
+    MIN_RATING = 8.0  # Threshold for materialized rows
+    STALE_AFTER = timedelta(hours=6)
+
+    AGGREGATE_SQL = """
+        SELECT
+            uf.follower_id AS user_id,
+            rt.restaurant_id,
+            MAX(rt.rating) AS friend_rating,
+            COUNT(DISTINCT rt.user_id) AS recommender_count,
+            (ARRAY_AGG(rt.user_id ORDER BY rt.rating DESC, rt.updated_at DESC))[1]
+                AS top_recommender_id
+        FROM user_follows uf
+        JOIN ratings rt ON rt.user_id = uf.following_id
+        WHERE uf.follower_id = ANY(%(user_ids)s::uuid[])
+          AND rt.status = 'been'
+          AND rt.rating >= %(min_rating)s
+          {restaurant_filter}
+          AND NOT EXISTS (
+              SELECT 1 FROM ratings mine
+              WHERE mine.user_id = uf.follower_id
+                AND mine.restaurant_id = rt.restaurant_id
+                AND mine.status = 'been'
+          )
+        GROUP BY uf.follower_id, rt.restaurant_id
+    """
+    RESTAURANT_FILTER = "AND rt.restaurant_id = ANY(%(restaurant_ids)s::uuid[])"
+
+    INSERT_SQL = """
+        INSERT INTO friend_recommendations
+            (user_id, restaurant_id, friend_rating, recommender_count,
+             top_recommender_id, updated_at)
+        SELECT agg.*, %(now)s FROM ({aggregate}) agg
+    """
+
+    @classmethod
+    def _aggregate_sql(cls, restaurant_scoped: bool = False) -> str:
+        return cls.AGGREGATE_SQL.format(
+            restaurant_filter=cls.RESTAURANT_FILTER if restaurant_scoped else ''
+        )
+
+    @classmethod
+    def refresh_user(cls, user_id: str) -> None:
+        """Rebuild all materialized recommendations for one user."""
+        params = {
+            'user_id': str(user_id),
+            'user_ids': [str(user_id)],
+            'min_rating': cls.MIN_RATING,
+            'now': timezone.now(),
+        }
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                "DELETE FROM friend_recommendations WHERE user_id = %(user_id)s::uuid",
+                params
+            )
+            cursor.execute(cls.INSERT_SQL.format(aggregate=cls._aggregate_sql()), params)
+            cursor.execute(
+                """
+                INSERT INTO friend_recommendation_state (user_id, refreshed_at)
+                VALUES (%(user_id)s::uuid, %(now)s)
+                ON CONFLICT (user_id) DO UPDATE SET refreshed_at = EXCLUDED.refreshed_at
+                """,
+                params
+            )
+
+    @classmethod
+    def apply_rating_changes(cls, changes) -> None:
+        """
+        Patch materialized rows after ratings changed.
+
+        For each (rater, restaurant) pair, the affected rows are the rater's
+        own row for that restaurant (a visit removes it) and every
+        follower's row for it. Only users that are already materialized are
+        touched; everyone else is built on first read.
+
+        Args:
+            changes: Set of (user_id, restaurant_id) string pairs
+        """
+        rater_ids = sorted({uid for uid, _ in changes})
+        restaurant_ids = sorted({rid for _, rid in changes})
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT s.user_id FROM friend_recommendation_state s
+                WHERE s.user_id = ANY(%(rater_ids)s::uuid[])
+                   OR s.user_id IN (
+                       SELECT follower_id FROM user_follows
+                       WHERE following_id = ANY(%(rater_ids)s::uuid[])
+                   )
+                """,
+                {'rater_ids': rater_ids}
+            )
+            affected = [str(row[0]) for row in cursor.fetchall()]
+            if not affected:
+                return
+
+            params = {
+                'user_ids': affected,
+                'restaurant_ids': restaurant_ids,
+                'min_rating': cls.MIN_RATING,
+                'now': timezone.now(),
+            }
+            cursor.execute(
+                """
+                DELETE FROM friend_recommendations
+                WHERE user_id = ANY(%(user_ids)s::uuid[])
+                  AND restaurant_id = ANY(%(restaurant_ids)s::uuid[])
+                """,
+                params
+            )
+            cursor.execute(
+                cls.INSERT_SQL.format(aggregate=cls._aggregate_sql(restaurant_scoped=True)),
+                params
+            )
+
+    @classmethod
+    def get_recommendations(cls, user_id: str, min_rating: float = MIN_RATING, limit: int = 20) -> list:
+        """
+        Get friend recommendations for a user, best first.
+
+        The default threshold reads materialized rows; any other threshold
+        runs the same aggregate on demand so counts stay exact.
+
+        Args:
+            user_id: User's UUID
+            min_rating: Minimum friend rating to count
+            limit: Maximum recommendations
+
+        Returns:
+            List of dicts with restaurant, friendRating, recommenderName,
+            recommenderUsername and recommenderCount
+        """
+        if float(min_rating) == cls.MIN_RATING:
+            state = FriendRecommendationState.objects.filter(user_id=user_id).first()
+            if state is None or state.refreshed_at < timezone.now() - cls.STALE_AFTER:
+                cls.refresh_user(user_id)
+
+            rows = [
+                (rec.restaurant, rec.friend_rating, rec.top_recommender, rec.recommender_count)
+                for rec in FriendRecommendation.objects.filter(user_id=user_id)
+                .select_related('restaurant', 'top_recommender')
+                .order_by('-friend_rating', '-recommender_count')[:limit]
+            ]
+        else:
+            rows = cls._compute_on_demand(user_id, min_rating, limit)
+
+        return [
+            {
+                'restaurant': restaurant,
+                'friendRating': float(friend_rating),
+                'recommenderName': recommender.display_name,
+                'recommenderUsername': recommender.username,
+                'recommenderCount': recommender_count,
+            }
+            for restaurant, friend_rating, recommender, recommender_count in rows
+        ]
+
+    @classmethod
+    def _compute_on_demand(cls, user_id: str, min_rating: float, limit: int) -> list:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                SELECT restaurant_id, friend_rating, top_recommender_id, recommender_count
+                FROM ({cls._aggregate_sql()}) agg
+                ORDER BY friend_rating DESC, recommender_count DESC
+                LIMIT %(limit)s
+                """,
+                {'user_ids': [str(user_id)], 'min_rating': min_rating, 'limit': limit}
+            )
+            rows = cursor.fetchall()
+
+        restaurants = Restaurant.objects.in_bulk([row[0] for row in rows])
+        recommenders = User.objects.in_bulk([row[2] for row in rows])
+        return [
+            (restaurants[rid], friend_rating, recommenders[uid], count)
+            for rid, friend_rating, uid, count in rows
+            if rid in restaurants and uid in recommenders
+        ]
+
+
+class CollaborativeFilteringService:
+    """
+    Item-item collaborative filtering over the ratings table.
+
+    Similarity between two restaurants is the shrunk cosine of their
+    "been" visitor sets:
+
+        sim(i, j) = co(i, j) / sqrt(n_i * n_j) * co(i, j) / (co(i, j) + SHRINKAGE)
+
+    The co-visitation matrix is computed set-based in Postgres (one
+    self-join + GROUP BY, no per-pair Python loops) and only the TOP_N
+    neighbors per restaurant are stored in restaurant_neighbors.
+
+    Scoring a user is then a single indexed join of their ratings against
+    the neighbor lists. Rating writes mark restaurants dirty; refresh_dirty()
+    recomputes their lists, and rebuild() recomputes everything.
+    """
+    TOP_N = 50
+    SHRINKAGE = 5  # Damps similarity backed by few co-visitors
+    MIN_CO_VISITS = 2
+    MAX_ITEMS_PER_USER = 200  # Bounds the self-join for heavy raters
+    DEFAULT_WEIGHT_RATING = 7.0  # For "been" rows without a score
+    MAX_RESULTS = 100  # Scored once per user, sliced per request
+    CACHE_TTL = 300  # 5 minutes
+
+    NEIGHBORS_SQL = """
+        WITH user_items AS (
+            SELECT user_id, restaurant_id FROM (
+                SELECT user_id, restaurant_id,
+                       ROW_NUMBER() OVER (
+                           PARTITION BY user_id ORDER BY updated_at DESC
+                       ) AS rn
+                FROM ratings
+                WHERE status = 'been'
+            ) recent
+            WHERE rn <= %(max_items)s
+        ),
+        item_counts AS (
+            SELECT restaurant_id, COUNT(*) AS n
+            FROM user_items
+            GROUP BY restaurant_id
+        ),
+        pairs AS (
+            SELECT a.restaurant_id, b.restaurant_id AS neighbor_id, COUNT(*) AS co
+            FROM user_items a
+            JOIN user_items b
+              ON b.user_id = a.user_id AND b.restaurant_id <> a.restaurant_id
+            {restaurant_filter}
+            GROUP BY a.restaurant_id, b.restaurant_id
+            HAVING COUNT(*) >= %(min_co)s
+        ),
+        ranked AS (
+            SELECT p.restaurant_id, p.neighbor_id, p.co,
+                   (p.co / SQRT(ca.n * cb.n)) * (p.co::float / (p.co + %(shrinkage)s))
+                       AS similarity,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY p.restaurant_id
+                       ORDER BY (p.co / SQRT(ca.n * cb.n)) * (p.co::float / (p.co + %(shrinkage)s)) DESC
+                   ) AS rank
+            FROM pairs p
+            JOIN item_counts ca ON ca.restaurant_id = p.restaurant_id
+            JOIN item_counts cb ON cb.restaurant_id = p.neighbor_id
+        )
+        INSERT INTO restaurant_neighbors
+            (restaurant_id, neighbor_id, similarity, co_count, updated_at)
+        SELECT restaurant_id, neighbor_id, similarity, co, %(now)s
+        FROM ranked
+        WHERE rank <= %(top_n)s
+    """
+    RESTAURANT_FILTER = "WHERE a.restaurant_id = ANY(%(restaurant_ids)s::uuid[])"
+
+    SCORE_SQL = """
+        SELECT
+            n.neighbor_id,
+            SUM(n.similarity * COALESCE(r.rating, %(default_rating)s) / 10.0) AS score,
+            COUNT(*) AS support,
+            (ARRAY_AGG(
+                r.restaurant_id
+                ORDER BY n.similarity * COALESCE(r.rating, %(default_rating)s) DESC
+            ))[1] AS because_id
+        FROM ratings r
+        JOIN restaurant_neighbors n ON n.restaurant_id = r.restaurant_id
+        WHERE r.user_id = %(user_id)s::uuid
+          AND r.status = 'been'
+          AND NOT EXISTS (
+              SELECT 1 FROM ratings seen
+              WHERE seen.user_id = r.user_id
+                AND seen.restaurant_id = n.neighbor_id
+          )
+        GROUP BY n.neighbor_id
+        ORDER BY score DESC
+        LIMIT %(limit)s
+    """
+
+    @classmethod
+    def _neighbor_params(cls, **extra) -> dict:
+        return {
+            'max_items': cls.MAX_ITEMS_PER_USER,
+            'min_co': cls.MIN_CO_VISITS,
+            'shrinkage': cls.SHRINKAGE,
+            'top_n': cls.TOP_N,
+            'now': timezone.now(),
+            **extra,
+        }
+
+    @classmethod
+    def rebuild(cls) -> None:
+        """Recompute the full neighbor matrix (nightly batch)."""
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute("DELETE FROM restaurant_neighbors")
+            cursor.execute("DELETE FROM restaurant_neighbor_dirty")
+            cursor.execute(
+                cls.NEIGHBORS_SQL.format(restaurant_filter=''),
+                cls._neighbor_params()
+            )
+
+    @classmethod
+    def mark_dirty(cls, restaurant_ids) -> None:
+        """Queue restaurants whose neighbor lists need recomputing."""
+        restaurant_ids = sorted(str(rid) for rid in restaurant_ids)
+        if not restaurant_ids:
+            return
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                INSERT INTO restaurant_neighbor_dirty (restaurant_id, marked_at)
+                SELECT UNNEST(%(restaurant_ids)s::uuid[]), %(now)s
+                ON CONFLICT (restaurant_id) DO NOTHING
+                """,
+                {'restaurant_ids': restaurant_ids, 'now': timezone.now()}
+            )
+
+    @classmethod
+    def refresh_dirty(cls, batch_size: int = 500) -> int:
+        """
+        Recompute neighbor lists for queued restaurants.
+
+        Each dirty restaurant's own list is rebuilt exactly. Since
+        similarity is symmetric, the reverse entries other restaurants
+        already hold for it are updated in place; a neighbor that should
+        newly enter another restaurant's top-N waits for the next rebuild().
+
+        Returns:
+            Number of restaurants refreshed
+        """
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                """
+                DELETE FROM restaurant_neighbor_dirty
+                WHERE restaurant_id IN (
+                    SELECT restaurant_id FROM restaurant_neighbor_dirty
+                    ORDER BY marked_at
+                    LIMIT %(batch_size)s
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING restaurant_id
+                """,
+                {'batch_size': batch_size}
+            )
+            dirty = [str(row[0]) for row in cursor.fetchall()]
+            if not dirty:
+                return 0
+
+            params = cls._neighbor_params(restaurant_ids=dirty)
+            cursor.execute(
+                "DELETE FROM restaurant_neighbors WHERE restaurant_id = ANY(%(restaurant_ids)s::uuid[])",
+                params
+            )
+            cursor.execute(
+                cls.NEIGHBORS_SQL.format(restaurant_filter=cls.RESTAURANT_FILTER),
+                params
+            )
+            cursor.execute(
+                """
+                UPDATE restaurant_neighbors rev
+                SET similarity = fwd.similarity,
+                    co_count = fwd.co_count,
+                    updated_at = fwd.updated_at
+                FROM restaurant_neighbors fwd
+                WHERE fwd.restaurant_id = ANY(%(restaurant_ids)s::uuid[])
+                  AND rev.restaurant_id = fwd.neighbor_id
+                  AND rev.neighbor_id = fwd.restaurant_id
+                """,
+                params
+            )
+
+        return len(dirty)
+
+    @classmethod
+    def get_recommendations(cls, user_id: str, limit: int = 20) -> list:
+        """
+        Score restaurants the user hasn't rated from their "been" history.
+
+        Args:
+            user_id: User's UUID
+            limit: Maximum recommendations
+
+        Returns:
+            List of dicts with restaurant, score, support (how many of the
+            user's restaurants point at it) and becauseYouLiked
+        """
+        cache_key = f"cf_recs:{user_id}"
+        cached = cache.get(cache_key)
+        if cached is None:
+            with connection.cursor() as cursor:
+                cursor.execute(cls.SCORE_SQL, {
+                    'user_id': str(user_id),
+                    'default_rating': cls.DEFAULT_WEIGHT_RATING,
+                    'limit': cls.MAX_RESULTS,
+                })
+                cached = [
+                    (str(rid), float(score), support, str(because_id))
+                    for rid, score, support, because_id in cursor.fetchall()
+                ]
+            cache.set(cache_key, cached, cls.CACHE_TTL)
+        cached = cached[:limit]
+
+        restaurants = Restaurant.objects.in_bulk(
+            {rid for rid, _, _, _ in cached} | {bid for _, _, _, bid in cached}
+        )
+        restaurants = {str(rid): r for rid, r in restaurants.items()}
+
+        result = []
+        for rid, score, support, because_id in cached:
+            restaurant = restaurants.get(rid)
+            if restaurant is None:
+                continue
+            because = restaurants.get(because_id)
+            result.append({
+                'restaurant': restaurant,
+                'score': round(score, 4),
+                'support': support,
+                'becauseYouLiked': {
+                    'id': because_id,
+                    'name': because.name,
+                } if because else None,
+            })
+        return result
+
+
+class RestaurantReviewService:
+    """
+    Paginated restaurant reviews plus a cached summary block.
+
+    Reviews are 'been' ratings with notes. Pages use keyset cursors over
+    the sort key so deep pages cost the same as the first one; the summary
+    (count, average, histogram, top tags) is cached per restaurant and
+    dropped by RatingSideEffects whenever one of its ratings changes.
+    """
+
+    CACHE_TTL = 3600  # 1 hour - invalidated on write
+    DEFAULT_LIMIT = 20
+    MAX_LIMIT = 100
+    TOP_TAGS = 5
+
+    # Sort mode -> descending keyset fields (id breaks ties)
+    SORTS = {
+        'recent': ['created_at', 'id'],
+        'highest': ['sort_rating', 'created_at', 'id'],
+        'most-liked': ['like_count', 'created_at', 'id'],
+    }
+    DEFAULT_SORT = 'recent'
+
+    # Cursor values arrive as JSON strings/numbers
+    CURSOR_TYPES = {
+        'created_at': datetime.fromisoformat,
+        'sort_rating': Decimal,
+        'like_count': int,
+        'id': uuid.UUID,
+    }
+
+    TOP_TAGS_SQL = """
+        SELECT tag, COUNT(*) AS tag_count
+        FROM ratings, UNNEST(tags) AS tag
+        WHERE restaurant_id = %s AND status = 'been'
+        GROUP BY tag
+        ORDER BY tag_count DESC, tag
+        LIMIT %s
+    """
+
+    @staticmethod
+    def summary_cache_key(restaurant_id) -> str:
+        return f"review_summary:{restaurant_id}"
+
+    @classmethod
+    def invalidate(cls, restaurant_ids) -> None:
+        """Drop cached summaries for restaurants whose ratings changed."""
+        cache.delete_many([cls.summary_cache_key(rid) for rid in restaurant_ids])
+
+    @classmethod
+    def _reviews(cls, restaurant_id: str):
+        likes = ActivityInteraction.objects.filter(
+            rating=OuterRef('pk'),
+            interaction_type='like',
+        ).values('rating').annotate(c=Count('*')).values('c')
+
+        return Rating.objects.filter(
+            restaurant_id=restaurant_id,
+            status='been',
+            notes__isnull=False,
+        ).exclude(notes='').annotate(
+            like_count=Coalesce(Subquery(likes), 0),
+            # Unrated reviews sort after every rated one
+            sort_rating=Coalesce('rating', Value(Decimal('-1'))),
+        ).select_related('user')
+
+    @classmethod
+    def get_page(cls, restaurant_id: str, sort: str = DEFAULT_SORT,
+                 cursor: str = None, limit: int = DEFAULT_LIMIT) -> tuple:
+        """
+        Get one page of reviews.
+
+        Args:
+            restaurant_id: Restaurant UUID
+            sort: One of SORTS
+            cursor: Cursor from the previous page, or None for the first page
+            limit: Page size (capped at MAX_LIMIT)
+
+        Returns:
+            (reviews, next_cursor) - next_cursor is None on the last page
+
+        Raises:
+            ValueError: On an unknown sort or malformed cursor
+        """
+        if sort not in cls.SORTS:
+            raise ValueError(f"sort must be one of: {', '.join(cls.SORTS)}")
+        fields = cls.SORTS[sort]
+        limit = max(1, min(limit, cls.MAX_LIMIT))
+
+        queryset = cls._reviews(restaurant_id).order_by(*[f'-{f}' for f in fields])
+
+        if cursor:
+            values = decode_cursor(cursor)
+            try:
+                values = {f: cls.CURSOR_TYPES[f](values[f]) for f in fields}
+            except (KeyError, TypeError, ValueError, ArithmeticError) as e:
+                raise ValueError('Invalid cursor') from e
+            queryset = queryset.filter(keyset_filter(fields, values))
+
+        reviews = list(queryset[:limit + 1])
+        next_cursor = None
+        if len(reviews) > limit:
+            reviews = reviews[:limit]
+            last = reviews[-1]
+            next_cursor = encode_cursor({
+                f: getattr(last, f).isoformat() if f == 'created_at' else getattr(last, f)
+                for f in fields
+            })
+
+        return reviews, next_cursor
+
+    @classmethod
+    def get_summary(cls, restaurant_id: str) -> dict:
+        """
+        Get review/rating aggregates for a restaurant (cached).
+
+        Returns:
+            Dict with reviewCount, ratingCount, averageRating,
+            histogram (score bucket 0-10 -> count) and topTags
+        """
+        cache_key = cls.summary_cache_key(restaurant_id)
+        summary = cache.get(cache_key)
+        if summary is not None:
+            return summary
+
+        been = Rating.objects.filter(restaurant_id=restaurant_id, status='been')
+
+        totals = been.aggregate(
+            review_count=Count('id', filter=Q(notes__isnull=False) & ~Q(notes='')),
+            rating_count=Count('rating'),
+            average=Avg('rating'),
+        )
+
+        histogram = {str(bucket): 0 for bucket in range(11)}
+        buckets = been.filter(rating__isnull=False).annotate(
+            bucket=Floor('rating')
+        ).values('bucket').annotate(count=Count('id'))
+        for row in buckets:
+            histogram[str(int(row['bucket']))] = row['count']
+
+        with connection.cursor() as cursor:
+            cursor.execute(cls.TOP_TAGS_SQL, [restaurant_id, cls.TOP_TAGS])
+            top_tags = [{'tag': tag, 'count': count} for tag, count in cursor.fetchall()]
+
+        summary = {
+            'reviewCount': totals['review_count'],
+            'ratingCount': totals['rating_count'],
+            'averageRating': round(float(totals['average']), 1) if totals['average'] is not None else None,
+            'histogram': histogram,
+            'topTags': top_tags,
+        }
+        cache.set(cache_key, summary, cls.CACHE_TTL)
+        return summary
+
+
+class WatchlistService:
+    """
+    Atomic operations on users.watchlist (want-to-try restaurant ids).
+
+    The array stays the single source of truth (migration 00011), but it is
+    only ever modified with one UPDATE evaluated server-side, so concurrent
+    adds/removes can't overwrite each other the way load-mutate-save did.
+    Order is insertion order.
+    """
+
+    MAX_BATCH_SIZE = 500
+
+    # Remove first, then append ids not already present (first occurrence
+    # order). The SET expression only reads the target row, so on a
+    # concurrent update Postgres re-evaluates it against the latest
+    # version. Returns no row when the user doesn't exist.
+    # Parameters are normalized (lowercase) but stored entries may not be -
+    # older clients wrote uppercase UUIDs - so stored ids compare lowercased.
+    UPDATE_SQL = """
+        UPDATE users u SET watchlist = (
+            SELECT COALESCE(ARRAY_AGG(rid ORDER BY grp, ord), '{}'::text[])
+            FROM (
+                SELECT rid, 0 AS grp, ord
+                FROM UNNEST(COALESCE(u.watchlist, '{}'::text[])) WITH ORDINALITY AS k(rid, ord)
+                WHERE LOWER(rid) <> ALL(%(remove)s::text[])
+                UNION ALL
+                SELECT rid, 1, MIN(ord)
+                FROM UNNEST(%(add)s::text[]) WITH ORDINALITY AS a(rid, ord)
+                WHERE NOT (
+                    rid = ANY(ARRAY(SELECT LOWER(w) FROM UNNEST(u.watchlist) AS w))
+                    AND rid <> ALL(%(remove)s::text[])
+                )
+                GROUP BY rid
+            ) combined
+        )
+        WHERE u.id = %(user_id)s
+        RETURNING COALESCE(ARRAY_LENGTH(u.watchlist, 1), 0)
+    """
+
+    CONTAINS_SQL = """
+        SELECT rid, rid = ANY(ARRAY(SELECT LOWER(w) FROM UNNEST(u.watchlist) AS w))
+        FROM users u, UNNEST(%s::text[]) AS rid
+        WHERE u.id = %s
+    """
+
+    @staticmethod
+    def normalize_ids(ids) -> list:
+        """
+        Canonicalize restaurant ids (lowercase UUID strings).
+
+        Raises:
+            ValueError: If an id isn't a UUID
+        """
+        try:
+            return [str(uuid.UUID(str(rid))) for rid in ids]
+        except (ValueError, AttributeError, TypeError) as e:
+            raise ValueError('Restaurant ids must be UUIDs') from e
+
+    @classmethod
+    def update(cls, user_id: str, add=(), remove=()) -> dict:
+        """
+        Add and/or remove restaurants in one atomic statement.
+
+        Unknown restaurant ids in `add` are skipped and reported.
+
+        Args:
+            user_id: User UUID
+            add: Restaurant ids to append (existing entries keep their position)
+            remove: Restaurant ids to remove
+
+        Returns:
+            Dict with count (watchlist size) and notFound, or None if the
+            user doesn't exist
+
+        Raises:
+            ValueError: On non-UUID ids or too many ids
+        """
+        add = cls.normalize_ids(add)
+        remove = cls.normalize_ids(remove)
+        if len(add) + len(remove) > cls.MAX_BATCH_SIZE:
+            raise ValueError(f'At most {cls.MAX_BATCH_SIZE} restaurant ids per request')
+
+        not_found = []
+        if add:
+            existing = {
+                str(rid) for rid in
+                Restaurant.objects.filter(id__in=add).values_list('id', flat=True)
+            }
+            not_found = [rid for rid in add if rid not in existing]
+            add = [rid for rid in add if rid in existing]
+
+        with connection.cursor() as cursor:
+            cursor.execute(cls.UPDATE_SQL, {
+                'user_id': str(user_id),
+                'add': add,
+                'remove': remove,
+            })
+            row = cursor.fetchone()
+
+        if row is None:
+            return None
+        return {'count': row[0], 'notFound': not_found}
+
+    @classmethod
+    def contains(cls, user_id: str, restaurant_ids) -> dict:
+        """
+        Check membership for many restaurants at once.
+
+        Returns:
+            Dict of restaurant id -> bool, or None if the user doesn't exist
+        """
+        restaurant_ids = cls.normalize_ids(restaurant_ids)
+        if len(restaurant_ids) > cls.MAX_BATCH_SIZE:
+            raise ValueError(f'At most {cls.MAX_BATCH_SIZE} restaurant ids per request')
+        if not User.objects.filter(id=user_id).exists():
+            return None
+        if not restaurant_ids:
+            return {}
+
+        with connection.cursor() as cursor:
+            cursor.execute(cls.CONTAINS_SQL, [restaurant_ids, str(user_id)])
+            return dict(cursor.fetchall())
+
+    @staticmethod
+    def get_restaurants(user: User) -> list:
+        """Get the user's watchlist restaurants in watchlist order."""
+        if not user.watchlist:
+            return []
+        restaurants = Restaurant.objects.in_bulk([str(rid) for rid in user.watchlist])
+        ordered = []
+        for rid in user.watchlist:
+            restaurant = restaurants.get(uuid.UUID(str(rid)))
+            if restaurant is not None:
+                ordered.append(restaurant)
+        return ordered
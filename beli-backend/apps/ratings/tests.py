@@ -0,0 +1,86 @@
+"""
+Tests for rating services.
+"""
+import uuid
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+
+from apps.users.models import Rating
+from .services import BulkRatingImportService, RatingSideEffects, WatchlistService
+
+
+def _set_watchlist(user, ids):
+    with connection.cursor() as cursor:
+        cursor.execute('UPDATE users SET watchlist = %s::text[] WHERE id = %s', [ids, str(user.id)])
+
+
+def _watchlist(user):
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT watchlist FROM users WHERE id = %s', [str(user.id)])
+        return cursor.fetchone()[0]
+
+
+@pytest.mark.django_db
+def test_watchlist_matches_legacy_uppercase_ids(make_user, make_restaurant):
+    user = make_user()
+    legacy, other = make_restaurant(), make_restaurant()
+    _set_watchlist(user, [str(legacy.id).upper(), str(other.id)])
+
+    assert WatchlistService.contains(user.id, [str(legacy.id)]) == {str(legacy.id): True}
+
+    # Re-adding doesn't duplicate it; removing finds it
+    WatchlistService.update(user.id, add=[str(legacy.id)])
+    assert _watchlist(user) == [str(legacy.id).upper(), str(other.id)]
+    result = WatchlistService.update(user.id, remove=[str(legacy.id)])
+    assert result == {'count': 1, 'notFound': []}
+    assert _watchlist(user) == [str(other.id)]
+
+
+@pytest.mark.django_db
+def test_watchlist_update_keeps_order_and_reports_unknown_ids(make_user, make_restaurant):
+    user = make_user()
+    first, second = make_restaurant(), make_restaurant()
+    unknown = str(uuid.uuid4())
+
+    result = WatchlistService.update(user.id, add=[str(second.id), unknown, str(first.id), str(second.id)])
+
+    assert result == {'count': 2, 'notFound': [unknown]}
+    assert _watchlist(user) == [str(second.id), str(first.id)]
+    assert WatchlistService.update(uuid.uuid4(), add=[str(first.id)]) is None
+
+
+@pytest.mark.django_db
+def test_bulk_import_upserts_and_reports_each_item(make_user, make_restaurant, monkeypatch):
+    # Side effects write to SQL-only tables (restaurant_neighbor_dirty ...)
+    touched = []
+    monkeypatch.setattr(RatingSideEffects, 'apply', lambda changes: touched.append(set(changes)))
+    user = make_user()
+    first, second = make_restaurant(), make_restaurant()
+    items = [
+        {'restaurantId': str(first.id), 'status': 'been', 'rating': '7.0'},
+        {'restaurantId': str(second.id), 'status': 'want_to_try'},
+        {'restaurantId': str(first.id), 'status': 'been', 'rating': '8.5'},
+        {'restaurantId': str(uuid.uuid4()), 'status': 'been'},
+        {'status': 'been'},
+    ]
+
+    results = list(BulkRatingImportService.run(items, default_user_id=str(user.id)))
+
+    summary = results.pop()['summary']
+    assert summary == {'created': 2, 'updated': 0, 'skipped': 1, 'errors': 2, 'total': 5}
+    statuses = {result['index']: result['status'] for result in results}
+    assert statuses == {0: 'skipped', 1: 'created', 2: 'created', 3: 'error', 4: 'error'}
+    assert Rating.objects.get(user=user, restaurant=first).rating == Decimal('8.5')
+    assert touched.pop() == {(str(user.id), str(first.id)), (str(user.id), str(second.id))}
+
+    # Re-importing a pair updates the existing row
+    results = list(BulkRatingImportService.run(
+        [{'restaurantId': str(second.id), 'status': 'been', 'rating': '6.0'}], default_user_id=str(user.id),
+    ))
+    assert results[0]['status'] == 'updated'
+    assert results[-1]['summary']['updated'] == 1
+    rating = Rating.objects.get(user=user, restaurant=second)
+    assert (rating.status, rating.rating) == ('been', Decimal('6.0'))
+    assert Rating.objects.filter(user=user).count() == 2
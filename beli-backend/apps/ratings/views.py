@@ -4,21 +4,32 @@ Ratings API views.
 Provides CRUD endpoints for user-restaurant relationships,
 matching UserRestaurantService methods.
 """
-import uuid
+import json
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.db import connection
 from django.db.models import Avg, Count, Q
+from django.http import StreamingHttpResponse
 from django.utils import timezone
 from datetime import timedelta
 
-from apps.users.models import Rating, User, UserFollow
-from apps.restaurants.models import Restaurant
+from apps.feed.services import FeedEvents
+from apps.users.models import Rating, User
 from apps.restaurants.serializers import RestaurantListSerializer
 from .serializers import (
     RatingCreateSerializer,
     RatingDetailSerializer,
     RatingListSerializer,
+    RestaurantReviewSerializer,
+)
+from .services import (
+    BulkRatingImportService,
+    CollaborativeFilteringService,
+    FriendRecommendationService,
+    RatingSideEffects,
+    RestaurantReviewService,
+    WatchlistService,
 )
 
 
@@ -30,12 +41,17 @@ class RatingsViewSet(viewsets.ViewSet):
     - GET /api/v1/ratings/user/{userId}/ - Get user's ratings
     - GET /api/v1/ratings/user/{userId}/status/{status}/ - Get by status
     - POST /api/v1/ratings/ - Add rating
+    - POST /api/v1/ratings/bulk/ - Import/upsert many ratings (streams results)
     - PATCH /api/v1/ratings/{userId}/{restaurantId}/ - Update rating
     - DELETE /api/v1/ratings/{userId}/{restaurantId}/ - Remove rating
     - GET /api/v1/ratings/watchlist/{userId}/ - Get watchlist
     - POST /api/v1/ratings/watchlist/{userId}/ - Add to watchlist
+    - POST /api/v1/ratings/watchlist/{userId}/bulk/ - Add/remove many at once
+    - GET /api/v1/ratings/watchlist/{userId}/contains/?ids= - Membership check for many restaurants
     - DELETE /api/v1/ratings/watchlist/{userId}/{restaurantId}/ - Remove from watchlist
     - GET /api/v1/ratings/friend-recs/{userId}/ - Get friend recommendations
+    - GET /api/v1/ratings/recommendations/{userId}/ - Get personalized recommendations
+    - GET /api/v1/ratings/reviews/restaurant/{restaurantId}/ - Get reviews (paginated, with summary)
     """
 
     def create(self, request):
@@ -64,12 +80,65 @@ class RatingsViewSet(viewsets.ViewSet):
                 'companions': data.get('companions', []),
             }
         )
+        RatingSideEffects.apply([(data['userId'], data['restaurantId'])])
+        FeedEvents.rating_saved(rating, created)
 
         return Response(
             RatingDetailSerializer(rating).data,
             status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
         )
 
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        Import or upsert many ratings in one request.
+
+        Used when onboarding users import history from another app.
+
+        Request body:
+            { "userId": "uuid" (optional default), "ratings": [ {...}, ... ] }
+        Each item uses the same fields as POST /api/v1/ratings/.
+
+        Streams newline-delimited JSON: one result per item
+        ({index, status: created|updated|skipped|error, ...}) as each chunk
+        commits, then a final {"summary": {...}} line.
+        Pass ?stream=false to get a single JSON body instead.
+        """
+        if connection.vendor != 'postgresql':
+            # The upsert is raw PostgreSQL SQL (ON CONFLICT, uuid[]/text[] casts)
+            return Response(
+                {'error': 'Bulk import requires PostgreSQL'},
+                status=status.HTTP_501_NOT_IMPLEMENTED
+            )
+
+        items = request.data.get('ratings') if isinstance(request.data, dict) else request.data
+        if not isinstance(items, list) or not items:
+            return Response(
+                {'error': 'ratings must be a non-empty array'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if len(items) > BulkRatingImportService.MAX_BATCH_SIZE:
+            return Response(
+                {'error': f'At most {BulkRatingImportService.MAX_BATCH_SIZE} ratings per request'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        default_user_id = request.data.get('userId') if isinstance(request.data, dict) else None
+        results = BulkRatingImportService.run(items, default_user_id)
+
+        if request.query_params.get('stream', 'true').lower() == 'false':
+            results = list(results)
+            return Response({
+                'results': results[:-1],
+                'summary': results[-1]['summary'],
+            })
+
+        return StreamingHttpResponse(
+            (json.dumps(result, default=str) + '\n' for result in results),
+            content_type='application/x-ndjson',
+        )
+
     @action(detail=False, methods=['get'], url_path='user/(?P<user_id>[^/.]+)')
     def user_ratings(self, request, user_id=None):
         """
@@ -101,7 +170,7 @@ class RatingsViewSet(viewsets.ViewSet):
         serializer = RestaurantListSerializer(restaurants, many=True)
         return Response(serializer.data)
 
-    @action(detail=False, methods=['get', 'delete'], url_path='(?P<user_id>[^/.]+)/(?P<restaurant_id>[^/.]+)')
+    @action(detail=False, methods=['get', 'delete'], url_path=r'(?P<user_id>[0-9a-fA-F-]{36})/(?P<restaurant_id>[0-9a-fA-F-]{36})')
     def rating_detail(self, request, user_id=None, restaurant_id=None):
         """
         Get or delete a specific rating.
@@ -123,12 +192,14 @@ class RatingsViewSet(viewsets.ViewSet):
                 )
 
         elif request.method == 'DELETE':
-            deleted, _ = Rating.objects.filter(
-                user_id=user_id,
-                restaurant_id=restaurant_id
-            ).delete()
+            ratings = Rating.objects.filter(user_id=user_id, restaurant_id=restaurant_id)
+            rating_ids = list(ratings.values_list('id', flat=True))
+            deleted, _ = ratings.delete()
 
             if deleted:
+                RatingSideEffects.apply([(user_id, restaurant_id)])
+                for rating_id in rating_ids:
+                    FeedEvents.rating_deleted(user_id, rating_id)
                 return Response(status=status.HTTP_204_NO_CONTENT)
             return Response(
                 {'error': 'Rating not found'},
@@ -143,20 +214,17 @@ class RatingsViewSet(viewsets.ViewSet):
         Maps to: UserRestaurantService.getWatchlist()
         Maps to: UserRestaurantService.addToWatchlist()
         """
-        try:
-            user = User.objects.get(id=user_id)
-        except User.DoesNotExist:
-            return Response(
-                {'error': 'User not found'},
-                status=status.HTTP_404_NOT_FOUND
-            )
-
         if request.method == 'GET':
-            # Return restaurants in watchlist
-            if not user.watchlist:
-                return Response([])
+            try:
+                user = User.objects.get(id=user_id)
+            except User.DoesNotExist:
+                return Response(
+                    {'error': 'User not found'},
+                    status=status.HTTP_404_NOT_FOUND
+                )
 
-            restaurants = Restaurant.objects.filter(id__in=user.watchlist)
+            # Return restaurants in watchlist order
+            restaurants = WatchlistService.get_restaurants(user)
             serializer = RestaurantListSerializer(restaurants, many=True)
             return Response(serializer.data)
 
@@ -168,39 +236,88 @@ class RatingsViewSet(viewsets.ViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            # Add to watchlist if not already there
-            watchlist = user.watchlist or []
-            restaurant_uuid = uuid.UUID(restaurant_id)
-            if restaurant_uuid not in watchlist:
-                watchlist.append(restaurant_uuid)
-                user.watchlist = watchlist
-                user.save(update_fields=['watchlist'])
+            return self._update_watchlist(user_id, add=[restaurant_id], in_watchlist=True)
+
+    @action(detail=False, methods=['post'], url_path='watchlist/(?P<user_id>[^/.]+)/bulk')
+    def watchlist_bulk(self, request, user_id=None):
+        """
+        Add and/or remove many restaurants in one atomic update.
+
+        Body: {"add": [restaurantId, ...], "remove": [restaurantId, ...]}
+        """
+        add = request.data.get('add') or []
+        remove = request.data.get('remove') or []
+        if not isinstance(add, list) or not isinstance(remove, list):
+            return Response(
+                {'error': 'add and remove must be lists of restaurant ids'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not add and not remove:
+            return Response(
+                {'error': 'add or remove is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return self._update_watchlist(user_id, add=add, remove=remove)
+
+    @action(detail=False, methods=['get'], url_path='watchlist/(?P<user_id>[^/.]+)/contains')
+    def watchlist_contains(self, request, user_id=None):
+        """
+        Check which of many restaurants are in the user's watchlist.
+
+        Query params:
+            ids: Comma-separated restaurant ids
+
+        Returns:
+            {restaurantId: bool, ...}
+        """
+        ids = [rid for rid in request.query_params.get('ids', '').split(',') if rid]
+        try:
+            membership = WatchlistService.contains(user_id, ids)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-            return Response({'success': True, 'inWatchlist': True})
+        if membership is None:
+            return Response(
+                {'error': 'User not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response(membership)
 
-    @action(detail=False, methods=['delete'], url_path='watchlist/(?P<user_id>[^/.]+)/(?P<restaurant_id>[^/.]+)')
+    @action(
+        detail=False,
+        methods=['delete'],
+        url_path=r'watchlist/(?P<user_id>[^/.]+)/(?P<restaurant_id>[0-9a-fA-F-]{36})'
+    )
     def watchlist_remove(self, request, user_id=None, restaurant_id=None):
         """
         Remove from user's watchlist.
 
         Maps to: UserRestaurantService.removeFromWatchlist()
         """
+        return self._update_watchlist(user_id, remove=[restaurant_id], in_watchlist=False)
+
+    def _update_watchlist(self, user_id, add=(), remove=(), in_watchlist=None):
         try:
-            user = User.objects.get(id=user_id)
-        except User.DoesNotExist:
+            result = WatchlistService.update(user_id, add=add, remove=remove)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if result is None:
             return Response(
                 {'error': 'User not found'},
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        watchlist = user.watchlist or []
-        restaurant_uuid = uuid.UUID(restaurant_id)
-        if restaurant_uuid in watchlist:
-            watchlist.remove(restaurant_uuid)
-            user.watchlist = watchlist
-            user.save(update_fields=['watchlist'])
+        if in_watchlist is not None:
+            if in_watchlist and result['notFound']:
+                return Response(
+                    {'error': 'Restaurant not found'},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+            return Response({'success': True, 'inWatchlist': in_watchlist})
 
-        return Response({'success': True, 'inWatchlist': False})
+        return Response({'success': True, **result})
 
     @action(detail=False, methods=['get'], url_path='friend-recs/(?P<user_id>[^/.]+)')
     def friend_recommendations(self, request, user_id=None):
@@ -210,68 +327,44 @@ class RatingsViewSet(viewsets.ViewSet):
 
         Maps to: UserRestaurantService.getFriendRecommendations()
         """
-        min_rating = float(request.query_params.get('minRating', 8.0))
+        min_rating = float(request.query_params.get(
+            'minRating', FriendRecommendationService.MIN_RATING
+        ))
         limit = int(request.query_params.get('limit', 20))
 
-        # Get users this person follows
-        following_ids = list(
-            UserFollow.objects.filter(follower_id=user_id)
-            .values_list('following_id', flat=True)
+        recommendations = FriendRecommendationService.get_recommendations(
+            user_id, min_rating=min_rating, limit=limit
         )
 
-        if not following_ids:
-            return Response([])
+        result = []
+        for rec in recommendations:
+            result.append({
+                **rec,
+                'restaurant': RestaurantListSerializer(rec['restaurant']).data,
+            })
 
-        # Get restaurants the user has already been to
-        user_visited = set(
-            Rating.objects.filter(user_id=user_id, status='been')
-            .values_list('restaurant_id', flat=True)
+        return Response(result)
+
+    @action(detail=False, methods=['get'], url_path='recommendations/(?P<user_id>[^/.]+)')
+    def recommendations(self, request, user_id=None):
+        """
+        Get personalized recommendations from item-item collaborative filtering.
+
+        Scores restaurants the user hasn't rated by their similarity to the
+        places the user has been (co-visitation across all users).
+        """
+        limit = min(
+            int(request.query_params.get('limit', 20)),
+            CollaborativeFilteringService.MAX_RESULTS
         )
 
-        # Get high-rated restaurants from friends
-        friend_ratings = Rating.objects.filter(
-            user_id__in=following_ids,
-            status='been',
-            rating__gte=min_rating
-        ).exclude(
-            restaurant_id__in=user_visited
-        ).select_related('user', 'restaurant').order_by('-rating')[:limit * 2]
-
-        # Aggregate by restaurant
-        recommendations = {}
-        for rating in friend_ratings:
-            rid = str(rating.restaurant_id)
-            if rid not in recommendations:
-                recommendations[rid] = {
-                    'restaurant': rating.restaurant,
-                    'friendRating': float(rating.rating),
-                    'recommenderName': rating.user.display_name,
-                    'recommenderUsername': rating.user.username,
-                    'recommenderCount': 1,
-                }
-            else:
-                recommendations[rid]['recommenderCount'] += 1
-                # Use highest rating
-                if float(rating.rating) > recommendations[rid]['friendRating']:
-                    recommendations[rid]['friendRating'] = float(rating.rating)
-                    recommendations[rid]['recommenderName'] = rating.user.display_name
-                    recommendations[rid]['recommenderUsername'] = rating.user.username
-
-        # Sort by rating and limit
-        sorted_recs = sorted(
-            recommendations.values(),
-            key=lambda x: (-x['friendRating'], -x['recommenderCount'])
-        )[:limit]
-
-        # Format response
+        recommendations = CollaborativeFilteringService.get_recommendations(user_id, limit=limit)
+
         result = []
-        for rec in sorted_recs:
+        for rec in recommendations:
             result.append({
+                **rec,
                 'restaurant': RestaurantListSerializer(rec['restaurant']).data,
-                'friendRating': rec['friendRating'],
-                'recommenderName': rec['recommenderName'],
-                'recommenderUsername': rec['recommenderUsername'],
-                'recommenderCount': rec['recommenderCount'],
             })
 
         return Response(result)
@@ -279,34 +372,34 @@ class RatingsViewSet(viewsets.ViewSet):
     @action(detail=False, methods=['get'], url_path='reviews/restaurant/(?P<restaurant_id>[^/.]+)')
     def restaurant_reviews(self, request, restaurant_id=None):
         """
-        Get reviews for a restaurant.
+        Get reviews for a restaurant, one page at a time.
+
+        Query params:
+            sort: recent (default), highest or most-liked
+            cursor: nextCursor from the previous page
+            limit: Page size (default 20, max 100)
+
+        The first page (no cursor) also carries the cached summary block.
 
         Maps to: UserRestaurantService.getRestaurantReviews()
         """
-        reviews = Rating.objects.filter(
-            restaurant_id=restaurant_id,
-            status='been',
-            notes__isnull=False
-        ).exclude(notes='').select_related('user').order_by('-created_at')
-
-        result = []
-        for review in reviews:
-            result.append({
-                'id': str(review.id),
-                'userId': str(review.user_id),
-                'user': {
-                    'id': str(review.user.id),
-                    'username': review.user.username,
-                    'displayName': review.user.display_name,
-                    'avatar': review.user.avatar,
-                },
-                'restaurantId': str(review.restaurant_id),
-                'rating': float(review.rating) if review.rating else None,
-                'content': review.notes,
-                'photos': review.photos or [],
-                'tags': review.tags or [],
-                'visitDate': review.visit_date.isoformat() if review.visit_date else None,
-                'createdAt': review.created_at.isoformat(),
-            })
+        cursor = request.query_params.get('cursor')
+        try:
+            limit = int(request.query_params.get('limit', RestaurantReviewService.DEFAULT_LIMIT))
+            reviews, next_cursor = RestaurantReviewService.get_page(
+                restaurant_id,
+                sort=request.query_params.get('sort', RestaurantReviewService.DEFAULT_SORT),
+                cursor=cursor,
+                limit=limit,
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        result = {
+            'results': RestaurantReviewSerializer(reviews, many=True).data,
+            'nextCursor': next_cursor,
+        }
+        if not cursor:
+            result['summary'] = RestaurantReviewService.get_summary(restaurant_id)
 
         return Response(result)
@@ -0,0 +1,60 @@
+"""
+Restaurant services - shared restaurant card cache.
+"""
+from django.core.cache import cache
+
+from .models import Restaurant
+from .serializers import RestaurantListSerializer
+
+
+class RestaurantCardCache:
+    """
+    Rendered RestaurantListSerializer data, cached per restaurant.
+
+    Lists, feeds and recommendation pages show the same handful of popular
+    restaurants over and over; hydrating through this cache costs one
+    get_many plus a single query for the misses, and keeps the caller's
+    order. Restaurants are edited in Supabase, so entries simply expire.
+    """
+
+    CACHE_TTL = 900  # 15 minutes
+
+    @staticmethod
+    def cache_key(restaurant_id) -> str:
+        return f"restaurant_card:{restaurant_id}"
+
+    @classmethod
+    def get_many(cls, restaurant_ids) -> list:
+        """
+        Get restaurant cards in the given order.
+
+        Args:
+            restaurant_ids: Restaurant UUIDs (duplicates allowed)
+
+        Returns:
+            List of serialized restaurants; ids that no longer exist are skipped
+        """
+        restaurant_ids = [str(rid) for rid in restaurant_ids]
+        if not restaurant_ids:
+            return []
+
+        keys = {rid: cls.cache_key(rid) for rid in restaurant_ids}
+        cached = cache.get_many(list(keys.values()))
+        cards = {rid: cached[key] for rid, key in keys.items() if key in cached}
+
+        missing = [rid for rid in keys if rid not in cards]
+        if missing:
+            fetched = {
+                str(card['id']): card
+                for card in RestaurantListSerializer(
+                    Restaurant.objects.filter(id__in=missing), many=True
+                ).data
+            }
+            cache.set_many({cls.cache_key(rid): card for rid, card in fetched.items()}, cls.CACHE_TTL)
+            cards.update(fetched)
+
+        return [cards[rid] for rid in restaurant_ids if rid in cards]
+
+    @classmethod
+    def invalidate(cls, restaurant_ids) -> None:
+        cache.delete_many([cls.cache_key(rid) for rid in restaurant_ids])
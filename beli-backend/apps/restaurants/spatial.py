@@ -0,0 +1,96 @@
+"""
+In-memory spatial index over restaurant coordinates.
+
+restaurants.coordinates is a PostGIS geography column that the ORM doesn't
+map, so callers that need distances for many restaurants (group dinner
+location scoring, centroids of rating history) use this index instead of
+issuing ST_Distance queries per restaurant.
+"""
+import math
+import threading
+import time
+from collections import defaultdict
+
+from django.db import connection
+
+from apps.core.geo import haversine_km
+
+
+class RestaurantSpatialIndex:
+    """
+    Uniform lat/lng grid of restaurant points.
+
+    Built with one query and kept per process for REFRESH_SECONDS; the
+    restaurant catalogue changes rarely, and a stale coordinate only
+    shifts a score slightly.
+    """
+
+    REFRESH_SECONDS = 900  # 15 minutes
+    CELL_DEGREES = 0.01  # ~1.1 km of latitude
+
+    COORDINATES_SQL = """
+        SELECT id::text, ST_Y(coordinates::geometry), ST_X(coordinates::geometry)
+        FROM restaurants
+        WHERE coordinates IS NOT NULL
+    """
+
+    _instance = None
+    _built_at = 0.0
+    _lock = threading.Lock()
+
+    def __init__(self, points: dict):
+        """
+        Args:
+            points: restaurant id (str) -> (lat, lng)
+        """
+        self.points = points
+        self.cells = defaultdict(list)
+        for restaurant_id, (lat, lng) in points.items():
+            self.cells[self._cell(lat, lng)].append(restaurant_id)
+
+    @classmethod
+    def get(cls) -> 'RestaurantSpatialIndex':
+        """Get the process-wide index, rebuilding it when stale."""
+        if cls._instance is None or time.monotonic() - cls._built_at > cls.REFRESH_SECONDS:
+            with cls._lock:
+                if cls._instance is None or time.monotonic() - cls._built_at > cls.REFRESH_SECONDS:
+                    cls._instance = cls._load()
+                    cls._built_at = time.monotonic()
+        return cls._instance
+
+    @classmethod
+    def _load(cls) -> 'RestaurantSpatialIndex':
+        with connection.cursor() as cursor:
+            cursor.execute(cls.COORDINATES_SQL)
+            return cls({rid: (lat, lng) for rid, lat, lng in cursor.fetchall()})
+
+    def _cell(self, lat: float, lng: float) -> tuple:
+        return (math.floor(lat / self.CELL_DEGREES), math.floor(lng / self.CELL_DEGREES))
+
+    def location(self, restaurant_id):
+        """(lat, lng) of a restaurant, or None if it has no coordinates."""
+        return self.points.get(str(restaurant_id))
+
+    def within(self, lat: float, lng: float, radius_km: float) -> dict:
+        """
+        Restaurants within radius_km of a point.
+
+        Only the grid cells overlapping the radius are scanned.
+
+        Returns:
+            restaurant id -> distance in km
+        """
+        lat_cells = math.ceil(radius_km / 111.0 / self.CELL_DEGREES)
+        lng_km = 111.0 * max(math.cos(math.radians(lat)), 0.01)
+        lng_cells = math.ceil(radius_km / lng_km / self.CELL_DEGREES)
+        center_lat, center_lng = self._cell(lat, lng)
+
+        found = {}
+        for cell_lat in range(center_lat - lat_cells, center_lat + lat_cells + 1):
+            for cell_lng in range(center_lng - lng_cells, center_lng + lng_cells + 1):
+                for restaurant_id in self.cells.get((cell_lat, cell_lng), ()):
+                    point_lat, point_lng = self.points[restaurant_id]
+                    distance = haversine_km(lat, lng, point_lat, point_lng)
+                    if distance <= radius_km:
+                        found[restaurant_id] = distance
+        return found
@@ -0,0 +1,27 @@
+"""
+Tests for restaurant search filters.
+"""
+import pytest
+from rest_framework.test import APIClient
+
+SEARCH_URL = '/api/v1/restaurants/search/'
+
+
+@pytest.mark.parametrize('params', [
+    {'diet': 'vegan,paleo'},
+    {'diet': 'vegan', 'dietCategory': 'brunch'},
+])
+def test_unknown_diet_filters_are_rejected(params):
+    response = APIClient().get(SEARCH_URL, params)
+
+    assert response.status_code == 400
+    assert 'Unknown' in response.json()['error']
+
+
+@pytest.mark.django_db
+def test_known_diet_filters_are_case_insensitive(make_restaurant):
+    make_restaurant()
+
+    response = APIClient().get(SEARCH_URL, {'diet': 'Vegan, Gluten-Free', 'dietCategory': 'entree'})
+
+    assert response.status_code == 200
@@ -11,6 +11,7 @@ from django.db.models import Q
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
 
+from apps.menus.dietary import CATEGORY_BITS, DIETARY_BITS, DIETARY_FLAGS, DietaryIndex
 from .models import Restaurant
 from .serializers import (
     RestaurantSerializer,
@@ -56,6 +57,10 @@ class RestaurantViewSet(viewsets.ReadOnlyModelViewSet):
         - neighborhood: Filter by neighborhood
         - category: Filter by category
         - isOpen: Filter by open status
+        - diet: Dietary tags the menu must cater for (comma-separated, all
+          required; unknown tags are a 400)
+        - dietCategory: Menu category those items must be in (default: any food)
+        - dietMinItems: How many such items (default: 1)
 
         Note: cuisine, tags are stored as JSONB arrays in Supabase.
         We use icontains for simple text matching within the JSON.
@@ -107,6 +112,34 @@ class RestaurantViewSet(viewsets.ReadOnlyModelViewSet):
         if is_open.lower() == 'true':
             queryset = queryset.filter(is_open=True)
 
+        # Dietary filter - answered from the in-memory menu index
+        diets = request.query_params.get('diet', '')
+        if diets:
+            try:
+                min_items = max(1, int(request.query_params.get('dietMinItems', 1)))
+            except ValueError:
+                return Response(
+                    {'error': 'dietMinItems must be an integer'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            diet_list = [d.strip().lower() for d in diets.split(',') if d.strip()]
+            unknown = [d for d in diet_list if d not in DIETARY_BITS]
+            if unknown:
+                return Response(
+                    {'error': f"Unknown diet: {', '.join(unknown)} (expected {', '.join(DIETARY_FLAGS)})"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            diet_category = request.query_params.get('dietCategory') or None
+            if diet_category is not None and diet_category not in CATEGORY_BITS:
+                return Response(
+                    {'error': f"Unknown dietCategory: {diet_category} (expected {', '.join(CATEGORY_BITS)})"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            restaurant_ids = DietaryIndex.get().restaurants_with(
+                diet_list, category=diet_category, min_count=min_items,
+            )
+            queryset = queryset.filter(id__in=restaurant_ids)
+
         serializer = RestaurantListSerializer(queryset[:50], many=True)
         return Response(serializer.data)
 
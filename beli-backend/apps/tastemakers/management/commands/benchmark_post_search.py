@@ -0,0 +1,168 @@
+"""
+Benchmark tastemaker post search on a synthetic corpus.
+
+Posts are generated from a food vocabulary plus filler words drawn with a
+Zipf-like skew, so common terms have long postings and rare ones short,
+like real text.
+
+Backends:
+    memory    Build PostSearchIndex from the generated rows in memory (no
+              database access) and time queries and snippets against it
+    postgres  Insert the posts (the search_vector trigger indexes them)
+              and time PostSearchService against the GIN index; the posts
+              are deleted afterwards unless --keep is given
+
+Usage:
+    python manage.py benchmark_post_search
+    python manage.py benchmark_post_search --posts 100000 --repeat 50
+    python manage.py benchmark_post_search --backend postgres --posts 100000
+"""
+import itertools
+import random
+import statistics
+import time
+import uuid
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from apps.tastemakers.models import TastemakerPost
+from apps.tastemakers.search import PostSearchIndex, PostSearchService, highlight, parse_query
+from apps.users.models import User
+
+FOOD_WORDS = (
+    'taco ramen pizza sushi burger dumpling noodle curry pasta brunch bakery croissant '
+    'espresso omakase bbq brisket pho bibimbap falafel shawarma gelato mezcal natural wine '
+    'cocktail oyster crudo tasting menu chef counter spicy smoky crispy tender seasonal '
+    'vegan vegetarian gluten free halal kosher michelin neighborhood brooklyn queens '
+    'manhattan harlem williamsburg chinatown koreatown date night group dinner patio '
+    'rooftop late night cheap eats splurge hidden gem classic new opening'
+).split()
+
+QUERIES = [
+    'pizza',                 # common single term
+    'omakase',               # rarer single term
+    'spicy ramen',           # two terms
+    'vegan brunch brooklyn', # three terms
+    'taco -cheap',           # exclusion
+    'hidden gem date night', # four terms
+]
+
+
+class Command(BaseCommand):
+    help = 'Time post full-text search on a synthetic corpus'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=100000)
+        parser.add_argument('--words', type=int, default=120, help='Content words per post')
+        parser.add_argument('--backend', choices=['memory', 'postgres'], default='memory')
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--limit', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--keep', action='store_true', help="Don't delete inserted posts (postgres)")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        # Zipf-ish: weight of the k-th word ~ 1/k, food words spread over
+        # the first thousand ranks
+        vocabulary = [self._filler(rng) for _ in range(20000)]
+        for word in FOOD_WORDS:
+            vocabulary.insert(rng.randrange(1000), word)
+        cum_weights = list(itertools.accumulate(1 / (k + 1) for k in range(len(vocabulary))))
+
+        started = time.perf_counter()
+        rows = [self._post(rng, vocabulary, cum_weights, options['words']) for _ in range(options['posts'])]
+        self.stdout.write(f"Generated {len(rows)} posts in {time.perf_counter() - started:.1f}s")
+
+        if options['backend'] == 'memory':
+            self._run_memory(rows, options)
+        else:
+            self._run_postgres(rows, options)
+
+    @staticmethod
+    def _filler(rng) -> str:
+        return ''.join(rng.choice('bcdfghklmnprstvz') + rng.choice('aeiou') for _ in range(rng.randint(2, 4)))
+
+    @staticmethod
+    def _post(rng, vocabulary, cum_weights, words) -> tuple:
+        def text(n):
+            return ' '.join(rng.choices(vocabulary, cum_weights=cum_weights, k=n))
+
+        return (
+            uuid.uuid4(),
+            text(rng.randint(4, 9)).title(),
+            text(rng.randint(8, 14)),
+            text(words),
+            rng.sample(FOOD_WORDS, 3),
+        )
+
+    def _run_memory(self, rows, options):
+        started = time.perf_counter()
+        index = PostSearchIndex(rows)
+        self.stdout.write(
+            f"Built index in {time.perf_counter() - started:.1f}s: {len(index.postings)} terms, "
+            f"{sum(len(docs) for docs, _ in index.postings.values())} postings"
+        )
+
+        content = {str(row[0]): row[3] for row in rows}
+        self._header()
+        for query in QUERIES:
+            timings = []
+            for _ in range(options['repeat']):
+                started = time.perf_counter()
+                hits = index.search(query, options['limit'])
+                terms = set(parse_query(query)[0])
+                for post_id, _ in hits:
+                    highlight(content[post_id], terms, PostSearchService.SNIPPET_MAX_WORDS)
+                timings.append((time.perf_counter() - started) * 1000)
+            self._row(query, timings, len(hits))
+
+    def _run_postgres(self, rows, options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('The postgres backend needs DATABASE_URL pointing at PostgreSQL')
+        author_id = User.objects.values_list('id', flat=True).first()
+        if author_id is None:
+            raise CommandError('Need at least one user (run the seeds)')
+
+        marker = f'benchmark:{uuid.uuid4()}'
+        now = timezone.now()
+        try:
+            started = time.perf_counter()
+            TastemakerPost.objects.bulk_create([
+                TastemakerPost(
+                    id=post_id,
+                    user_id=author_id,
+                    title=title,
+                    subtitle=subtitle,
+                    content=content,
+                    cover_image='https://example.com/cover.jpg',
+                    tags=tags + [marker],
+                    published_at=now - timedelta(minutes=i),
+                )
+                for i, (post_id, title, subtitle, content, tags) in enumerate(rows)
+            ], batch_size=2000)
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE tastemaker_posts')
+            self.stdout.write(f"Inserted and indexed in {time.perf_counter() - started:.1f}s")
+
+            self._header()
+            for query in QUERIES:
+                timings = []
+                for _ in range(options['repeat']):
+                    started = time.perf_counter()
+                    results = PostSearchService.search(query, options['limit'])
+                    timings.append((time.perf_counter() - started) * 1000)
+                self._row(query, timings, len(results))
+        finally:
+            if not options['keep']:
+                TastemakerPost.objects.filter(tags__contains=[marker]).delete()
+
+    def _header(self):
+        self.stdout.write(f"{'query':<26} {'p50 ms':>8} {'p95 ms':>8} {'hits':>5}")
+
+    def _row(self, query, timings, hits):
+        ordered = sorted(timings)
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+        self.stdout.write(f"{query:<26} {statistics.median(timings):>8.2f} {p95:>8.2f} {hits:>5}")
@@ -0,0 +1,40 @@
+"""
+Recompute tastemaker post hot scores from stored data.
+
+Views, likes and bookmarks made through the API keep hot_score current on
+their own; run this after posts or interactions are written directly to
+the database (imports, admin edits) so those posts are ranked too.
+
+Usage:
+    python manage.py refresh_post_scores                 # every post
+    python manage.py refresh_post_scores --posts <id> <id>
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.tastemakers.services import PostRankingService
+
+
+class Command(BaseCommand):
+    help = 'Recompute hot_score for tastemaker posts'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--posts',
+            nargs='+',
+            help='Only refresh these post ids',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Posts updated per bulk UPDATE',
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        refreshed = PostRankingService.refresh(options['posts'], options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Refreshed {refreshed} posts in {time.perf_counter() - started:.2f}s'
+        ))
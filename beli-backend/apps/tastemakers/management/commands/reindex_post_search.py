@@ -0,0 +1,38 @@
+"""
+Recompute tastemaker post search vectors (Postgres only).
+
+A database trigger keeps search_vector current (00025); run this after
+loading posts with triggers disabled.
+
+Usage:
+    python manage.py reindex_post_search
+    python manage.py reindex_post_search --posts <id> <id>
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from apps.tastemakers.search import PostSearchService
+
+
+class Command(BaseCommand):
+    help = 'Recompute search_vector for tastemaker posts'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--posts',
+            nargs='+',
+            help='Only reindex these post ids',
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            self.stdout.write('Not on PostgreSQL - the in-memory search index rebuilds itself')
+            return
+
+        started = time.perf_counter()
+        reindexed = PostSearchService.reindex(options['posts'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Reindexed {reindexed} posts in {time.perf_counter() - started:.2f}s'
+        ))
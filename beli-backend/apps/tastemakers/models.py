@@ -4,6 +4,8 @@ Tastemakers models - Expert profiles and posts.
 import uuid
 from django.db import models
 from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 
 
 class TastemakerPost(models.Model):
@@ -32,12 +34,25 @@ class TastemakerPost(models.Model):
     published_at = models.DateTimeField()
     updated_at = models.DateTimeField(auto_now=True)
 
-    # Engagement
+    # Engagement (like/bookmark counters are kept by PostInteractionService)
     view_count = models.IntegerField(default=0)
+    like_count = models.IntegerField(default=0)
+    bookmark_count = models.IntegerField(default=0)
+    # Forward-decayed engagement score, in log space (see PostRankingService)
+    hot_score = models.FloatField(default=0)
+
+    # Weighted title/tags/subtitle/content tsvector, kept by a database
+    # trigger (Postgres only, see apps.tastemakers.search)
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         db_table = 'tastemaker_posts'
         ordering = ['-published_at']
+        indexes = [
+            models.Index(fields=['-hot_score']),
+            models.Index(fields=['is_featured', '-hot_score']),
+            GinIndex(fields=['search_vector']),
+        ]
 
 
 class TastemakerPostInteraction(models.Model):
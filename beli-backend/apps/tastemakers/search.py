@@ -0,0 +1,366 @@
+"""
+Full-text search over tastemaker posts.
+
+On Postgres every post carries a weighted tsvector (title A, tags and
+subtitle B, content C) in search_vector, kept current by a trigger
+(supabase/migrations/00025) and served by a GIN index; queries go through websearch_to_tsquery, ts_rank and
+ts_headline.
+
+Other databases (SQLite in development) get the same API from
+PostSearchIndex, a per-process inverted index ranked with BM25 using the
+same field weights. Its stemming is cruder than Postgres' english config,
+so the two can disagree on edge cases.
+"""
+import heapq
+import html
+import math
+import re
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import Counter
+
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import Count, F, Func, Max, TextField, Value
+
+from .models import TastemakerPost
+
+SEARCH_CONFIG = 'english'
+
+# ts_rank's default weights for A/B/C, so both backends rank alike
+FIELD_BOOSTS = {'title': 1.0, 'tags': 0.4, 'subtitle': 0.4, 'content': 0.2}
+
+HIGHLIGHT_START = '<mark>'
+HIGHLIGHT_STOP = '</mark>'
+# ts_headline marks matches with these; the headline is HTML-escaped (which
+# leaves control characters alone) before they become <mark> tags
+_HEADLINE_START = '\x02'
+_HEADLINE_STOP = '\x03'
+
+STOP_WORDS = frozenset(
+    'a an and are as at be but by for from has have i in is it its of on or our so '
+    'that the their this to was we were what with you your'.split()
+)
+
+_WORD_RE = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+
+def search_vector():
+    """Expression for TastemakerPost.search_vector, as the trigger computes it."""
+    tags = Func(F('tags'), Value(' '), function='array_to_string', output_field=TextField())
+    return (
+        SearchVector('title', weight='A', config=SEARCH_CONFIG)
+        + SearchVector(tags, weight='B', config=SEARCH_CONFIG)
+        + SearchVector('subtitle', weight='B', config=SEARCH_CONFIG)
+        + SearchVector('content', weight='C', config=SEARCH_CONFIG)
+    )
+
+
+def normalize(word: str) -> str:
+    """Light suffix stripping so 'tacos' finds 'taco' and 'grilled' finds 'grill'."""
+    if word.endswith("'s"):
+        word = word[:-2]
+    word = word.replace("'", '')
+    if len(word) > 4 and word.endswith('ies'):
+        return word[:-3] + 'y'
+    if len(word) > 5 and word.endswith('ing'):
+        return word[:-3]
+    if len(word) > 4 and word.endswith('ed'):
+        return word[:-2]
+    if len(word) > 4 and word.endswith(('ches', 'shes', 'sses', 'xes', 'zes')):
+        return word[:-2]
+    if len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+        return word[:-1]
+    return word
+
+
+def tokenize(text) -> list:
+    """Normalized, stop-word-free terms of a text."""
+    return [
+        normalize(word)
+        for word in _WORD_RE.findall((text or '').lower())
+        if word not in STOP_WORDS
+    ]
+
+
+def parse_query(text: str) -> tuple:
+    """
+    Split a search box query into (required terms, excluded terms).
+
+    Mirrors the subset of websearch_to_tsquery the fallback supports:
+    every word is required and '-word' excludes; quotes and 'or' are
+    treated as plain words.
+    """
+    required, excluded = [], set()
+    for part in (text or '').split():
+        if part.startswith('-') and len(part) > 1:
+            excluded.update(tokenize(part[1:]))
+        else:
+            required.extend(tokenize(part))
+    return list(dict.fromkeys(required)), excluded
+
+
+def highlight(text, terms, max_words: int = None) -> str:
+    """
+    HTML-escape text and wrap words matching any of the (normalized)
+    terms in <mark>.
+
+    With max_words, return only a window of that many words starting a
+    little before the first match, like ts_headline's MaxWords.
+    """
+    words = (text or '').split()
+    hits = [
+        i for i, word in enumerate(words)
+        if any(normalize(token) in terms for token in _WORD_RE.findall(word.lower()))
+    ]
+    if max_words and len(words) > max_words:
+        start = max(0, min(hits[0] - max_words // 3, len(words) - max_words)) if hits else 0
+        window = range(start, start + max_words)
+    else:
+        window = range(len(words))
+    marked = set(hits)
+    escaped = (html.escape(words[i]) for i in window)
+    return ' '.join(
+        f'{HIGHLIGHT_START}{word}{HIGHLIGHT_STOP}' if i in marked else word
+        for i, word in zip(window, escaped)
+    )
+
+
+def _escape_headline(headline) -> str:
+    """HTML-escape ts_headline output, then turn its markers into <mark>."""
+    return (
+        html.escape(headline or '')
+        .replace(_HEADLINE_START, HIGHLIGHT_START)
+        .replace(_HEADLINE_STOP, HIGHLIGHT_STOP)
+    )
+
+
+class PostSearchIndex:
+    """
+    In-memory inverted index of posts, for databases without tsvector.
+
+    Postings are parallel arrays of document numbers and field-weighted
+    term frequencies, appended in document order so each list is sorted
+    and can be probed with bisect. AND queries walk the rarest term's
+    postings and probe the others.
+
+    Kept per process and rebuilt when the posts' MAX(updated_at)/COUNT
+    moves, checked at most every REVALIDATE_SECONDS (the same versioning
+    as MenuCache).
+    """
+
+    REVALIDATE_SECONDS = 30
+
+    # BM25 parameters
+    K1 = 1.2
+    B = 0.75
+
+    _instance = None
+    _checked_at = 0.0
+    _lock = threading.Lock()
+
+    def __init__(self, rows, version=None):
+        """
+        Args:
+            rows: (id, title, subtitle, content, tags) per post
+        """
+        self.version = version
+        self.ids = []  # document number -> post id (str)
+        self.lengths = array('f')
+        self.postings = {}  # term -> (array of document numbers, array of weighted tf)
+
+        for post_id, title, subtitle, content, tags in rows:
+            self._add(post_id, {
+                'title': title,
+                'subtitle': subtitle,
+                'content': content,
+                'tags': ' '.join(tags or ()),
+            })
+        # BM25's length normalization, K1 * (1 - B + B * length / average), per document
+        avg_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 1.0
+        self.norms = array('f', (
+            self.K1 * (1 - self.B + self.B * length / avg_length) for length in self.lengths
+        ))
+
+    @classmethod
+    def get(cls) -> 'PostSearchIndex':
+        """Get the process-wide index, rebuilding it if posts changed."""
+        with cls._lock:
+            index = cls._instance
+            if index is not None and time.monotonic() - cls._checked_at < cls.REVALIDATE_SECONDS:
+                return index
+
+            stats = TastemakerPost.objects.aggregate(latest=Max('updated_at'), count=Count('id'))
+            version = (stats['latest'], stats['count'])
+            if index is None or index.version != version:
+                index = cls._instance = cls(
+                    TastemakerPost.objects.values_list(
+                        'id', 'title', 'subtitle', 'content', 'tags'
+                    ).iterator(),
+                    version,
+                )
+            cls._checked_at = time.monotonic()
+            return index
+
+    def _add(self, post_id, fields: dict) -> None:
+        doc = len(self.ids)
+        self.ids.append(str(post_id))
+
+        weighted = Counter()
+        for field, text in fields.items():
+            boost = FIELD_BOOSTS[field]
+            for term in tokenize(text):
+                weighted[term] += boost
+        self.lengths.append(sum(weighted.values()))
+
+        for term, tf in weighted.items():
+            entry = self.postings.get(term)
+            if entry is None:
+                entry = self.postings[term] = (array('i'), array('f'))
+            entry[0].append(doc)
+            entry[1].append(tf)
+
+    def _idf(self, df: int) -> float:
+        return math.log(1 + (len(self.ids) - df + 0.5) / (df + 0.5)) * (self.K1 + 1)
+
+    @staticmethod
+    def _find(docs, doc: int):
+        at = bisect_left(docs, doc)
+        return at if at < len(docs) and docs[at] == doc else None
+
+    def search(self, query: str, limit: int, offset: int = 0) -> list:
+        """
+        Posts containing every query term, best first.
+
+        Returns:
+            List of (post id, score)
+        """
+        required, excluded = parse_query(query)
+        postings = [self.postings.get(term) for term in required]
+        if not postings or any(entry is None for entry in postings):
+            return []
+
+        postings.sort(key=lambda entry: len(entry[0]))
+        norms = self.norms
+        docs, tfs = postings[0]
+        idf = self._idf(len(docs))
+        scores = {doc: idf * tf / (tf + norms[doc]) for doc, tf in zip(docs, tfs)}
+        for docs, tfs in postings[1:]:
+            idf = self._idf(len(docs))
+            matched = {}
+            for doc, score in scores.items():
+                at = self._find(docs, doc)
+                if at is not None:
+                    tf = tfs[at]
+                    matched[doc] = score + idf * tf / (tf + norms[doc])
+            scores = matched
+            if not scores:
+                return []
+
+        for term in excluded:
+            entry = self.postings.get(term)
+            if entry is not None:
+                if len(entry[0]) < len(scores):
+                    for doc in entry[0]:
+                        scores.pop(doc, None)
+                else:
+                    scores = {doc: score for doc, score in scores.items() if self._find(entry[0], doc) is None}
+
+        ranked = heapq.nlargest(offset + limit, scores.items(), key=lambda item: item[1])
+        return [(self.ids[doc], score) for doc, score in ranked[offset:]]
+
+
+class PostSearchService:
+    """
+    Ranked post search with highlighted title and content snippet.
+    """
+
+    MAX_RESULTS = 50
+    SNIPPET_MAX_WORDS = 35
+    SNIPPET_MIN_WORDS = 15
+
+    @classmethod
+    def search(cls, query: str, limit: int = 20, offset: int = 0) -> list:
+        """
+        Search post titles, subtitles, content and tags.
+
+        Args:
+            query: Search box text; words are ANDed, '-word' excludes
+                (Postgres also supports "quoted phrases" and 'or')
+
+        Returns:
+            List of (post with user selected, rank, {title, snippet}), best
+            first; highlights are HTML-escaped with matched words wrapped
+            in <mark>
+        """
+        limit = max(1, min(limit, cls.MAX_RESULTS))
+        offset = max(0, offset)
+        if not (query or '').strip():
+            return []
+        if connection.vendor == 'postgresql':
+            return cls._search_postgres(query, limit, offset)
+        return cls._search_index(query, limit, offset)
+
+    @classmethod
+    def reindex(cls, post_ids=None) -> int:
+        """
+        Recompute search_vector, for posts written while the trigger was
+        disabled (bulk loads with triggers off). No-op off Postgres, where
+        PostSearchIndex tracks changes itself.
+
+        Returns:
+            Number of posts updated
+        """
+        if connection.vendor != 'postgresql':
+            return 0
+        posts = TastemakerPost.objects.all()
+        if post_ids is not None:
+            posts = posts.filter(id__in=post_ids)
+        return posts.update(search_vector=search_vector())
+
+    @classmethod
+    def _search_postgres(cls, query, limit, offset) -> list:
+        tsquery = SearchQuery(query, search_type='websearch', config=SEARCH_CONFIG)
+        # ts_headline is costly; Postgres evaluates it only for the rows
+        # that survive ORDER BY ... LIMIT
+        posts = TastemakerPost.objects.filter(search_vector=tsquery).annotate(
+            rank=SearchRank(F('search_vector'), tsquery),
+            title_highlight=SearchHeadline(
+                'title', tsquery, config=SEARCH_CONFIG,
+                start_sel=_HEADLINE_START, stop_sel=_HEADLINE_STOP, highlight_all=True,
+            ),
+            snippet=SearchHeadline(
+                'content', tsquery, config=SEARCH_CONFIG,
+                start_sel=_HEADLINE_START, stop_sel=_HEADLINE_STOP,
+                max_words=cls.SNIPPET_MAX_WORDS, min_words=cls.SNIPPET_MIN_WORDS,
+            ),
+        ).select_related('user').order_by('-rank', '-published_at')[offset:offset + limit]
+
+        return [
+            (post, post.rank, {
+                'title': _escape_headline(post.title_highlight),
+                'snippet': _escape_headline(post.snippet),
+            })
+            for post in posts
+        ]
+
+    @classmethod
+    def _search_index(cls, query, limit, offset) -> list:
+        hits = PostSearchIndex.get().search(query, limit, offset)
+        posts = {
+            str(post.id): post
+            for post in TastemakerPost.objects.filter(
+                id__in=[post_id for post_id, _ in hits]
+            ).select_related('user')
+        }
+        terms = set(parse_query(query)[0])
+        return [
+            (posts[post_id], score, {
+                'title': highlight(posts[post_id].title, terms),
+                'snippet': highlight(posts[post_id].content, terms, cls.SNIPPET_MAX_WORDS),
+            })
+            for post_id, score in hits
+            if post_id in posts
+        ]
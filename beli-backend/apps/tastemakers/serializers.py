@@ -3,7 +3,44 @@ Tastemakers serializers.
 """
 from rest_framework import serializers
 from .models import TastemakerPost
-from apps.users.serializers import UserListSerializer
+from apps.users.serializers import UserListSerializer, UserSerializer
+
+
+class TastemakerCardSerializer(UserSerializer):
+    """
+    UserSerializer card for the tastemaker directory.
+
+    Stats come precomputed from context['stats'] (user id -> stats dict)
+    instead of per-user count queries.
+    """
+
+    def get_stats(self, obj):
+        return self.context['stats'][obj.id]
+
+
+def post_interactions(post, context) -> dict:
+    """
+    Counts plus the viewer's own state for a post.
+
+    context['viewerId'] / context['viewerState'] come from
+    PostInteractionService.viewer_state(). likes/bookmarks hold just the
+    viewer's id when they have liked/bookmarked the post, so clients that
+    check `likes.includes(userId)` keep working; totals are in
+    likeCount/bookmarkCount.
+    """
+    viewer_id = context.get('viewerId')
+    state = context.get('viewerState') or {}
+    liked = str(post.id) in state.get('like', ())
+    bookmarked = str(post.id) in state.get('bookmark', ())
+    return {
+        'likes': [str(viewer_id)] if liked else [],
+        'bookmarks': [str(viewer_id)] if bookmarked else [],
+        'likeCount': post.like_count,
+        'bookmarkCount': post.bookmark_count,
+        'views': post.view_count,
+        'liked': liked,
+        'bookmarked': bookmarked,
+    }
 
 
 class TastemakerPostSerializer(serializers.ModelSerializer):
@@ -44,12 +81,8 @@ class TastemakerPostSerializer(serializers.ModelSerializer):
         ]
 
     def get_interactions(self, obj):
-        """Get likes and bookmarks count."""
-        return {
-            'likes': [],
-            'bookmarks': [],
-            'views': obj.view_count,
-        }
+        """Get like/bookmark counts and the viewer's state."""
+        return post_interactions(obj, self.context)
 
 
 class TastemakerPostListSerializer(serializers.ModelSerializer):
@@ -60,6 +93,7 @@ class TastemakerPostListSerializer(serializers.ModelSerializer):
     coverImage = serializers.URLField(source='cover_image')
     publishedAt = serializers.DateTimeField(source='published_at')
     viewCount = serializers.IntegerField(source='view_count')
+    interactions = serializers.SerializerMethodField()
 
     class Meta:
         model = TastemakerPost
@@ -72,4 +106,9 @@ class TastemakerPostListSerializer(serializers.ModelSerializer):
             'tags',
             'publishedAt',
             'viewCount',
+            'interactions',
         ]
+
+    def get_interactions(self, obj):
+        """Get like/bookmark counts and the viewer's state."""
+        return post_interactions(obj, self.context)
@@ -0,0 +1,420 @@
+"""
+Tastemaker services - cached, ranked tastemaker directory, post
+likes/bookmarks, post engagement ranking and post hydration.
+"""
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.utils import timezone
+
+from apps.core import decay
+from apps.lists.services import ListHeaderCache
+from apps.restaurants.services import RestaurantCardCache
+from apps.users.models import Rating, User, UserFollow
+from .models import TastemakerPost, TastemakerPostInteraction
+from .serializers import TastemakerCardSerializer
+
+
+class TastemakerDirectoryService:
+    """
+    Precomputed tastemaker roster, ranked by followers, then posts, then
+    total post views.
+
+    The whole roster - rank order plus a rendered card per tastemaker - is
+    one cache entry built with a handful of grouped count queries. Follows
+    and post views made through the API adjust it in place; follows and
+    tastemaker flags written straight to Supabase are picked up by the
+    periodic rebuild.
+    """
+
+    CACHE_KEY = 'tastemaker_directory'
+    CACHE_TTL = 600  # 10 minutes - full rebuild interval
+
+    @classmethod
+    def get_directory(cls, limit: int = 50) -> list:
+        """Top tastemaker cards in rank order."""
+        roster = cls._get_roster()
+        return [roster['cards'][uid] for uid in roster['order'][:limit]]
+
+    @classmethod
+    def get_by_username(cls, username: str):
+        """A tastemaker's card, or None if there's no such tastemaker."""
+        roster = cls._get_roster()
+        user_id = roster['usernames'].get(username)
+        return roster['cards'][user_id] if user_id else None
+
+    @classmethod
+    def apply_follow(cls, follower_id, following_id, delta: int) -> None:
+        """Adjust counts after a follow (delta=1) or unfollow (delta=-1)."""
+        cls._adjust({
+            str(following_id): {'followers': delta},
+            str(follower_id): {'following': delta},
+        })
+
+    @classmethod
+    def apply_views(cls, user_id, delta: int = 1) -> None:
+        """Adjust a tastemaker's total post views."""
+        cls._adjust({str(user_id): {'totalViews': delta}})
+
+    @classmethod
+    def invalidate(cls) -> None:
+        cache.delete(cls.CACHE_KEY)
+
+    @classmethod
+    def _get_roster(cls) -> dict:
+        roster = cache.get(cls.CACHE_KEY)
+        if roster is None or time.time() - roster['builtAt'] > cls.CACHE_TTL:
+            roster = cls._build()
+            cache.set(cls.CACHE_KEY, roster, cls.CACHE_TTL * 2)
+        return roster
+
+    @classmethod
+    def _build(cls) -> dict:
+        users = list(User.objects.filter(is_tastemaker=True))
+        user_ids = [user.id for user in users]
+
+        def grouped(queryset, key, **aggregates):
+            return {row[key]: row for row in queryset.values(key).annotate(**aggregates)}
+
+        followers = grouped(UserFollow.objects.filter(following_id__in=user_ids), 'following_id', n=Count('follower_id'))
+        following = grouped(UserFollow.objects.filter(follower_id__in=user_ids), 'follower_id', n=Count('following_id'))
+        been = grouped(Rating.objects.filter(user_id__in=user_ids, status='been'), 'user_id', n=Count('id'))
+        posts = grouped(
+            TastemakerPost.objects.filter(user_id__in=user_ids), 'user_id',
+            n=Count('id'), views=Sum('view_count'),
+        )
+
+        stats = {
+            user.id: {
+                'followers': followers.get(user.id, {}).get('n', 0),
+                'following': following.get(user.id, {}).get('n', 0),
+                'beenCount': been.get(user.id, {}).get('n', 0),
+                'wantToTryCount': len(user.watchlist) if user.watchlist else 0,
+                'posts': posts.get(user.id, {}).get('n', 0),
+                'totalViews': posts.get(user.id, {}).get('views') or 0,
+            }
+            for user in users
+        }
+        cards = {
+            str(card['id']): card
+            for card in TastemakerCardSerializer(users, many=True, context={'stats': stats}).data
+        }
+        return {
+            'order': cls._rank(cards),
+            'cards': cards,
+            'usernames': {card['username']: uid for uid, card in cards.items()},
+            'builtAt': time.time(),
+        }
+
+    @staticmethod
+    def _rank(cards: dict) -> list:
+        return sorted(cards, key=lambda uid: (
+            -cards[uid]['stats']['followers'],
+            -cards[uid]['stats']['posts'],
+            -cards[uid]['stats']['totalViews'],
+            cards[uid]['username'],
+        ))
+
+    @classmethod
+    def _adjust(cls, deltas: dict) -> None:
+        """
+        Apply stat deltas to cached cards and re-rank.
+
+        Read-modify-write on one cache entry, so a concurrent update can
+        be lost; the next rebuild corrects it.
+        """
+        roster = cache.get(cls.CACHE_KEY)
+        if roster is None:
+            return
+        touched = False
+        for user_id, changes in deltas.items():
+            card = roster['cards'].get(user_id)
+            if card is None:
+                continue
+            for stat, delta in changes.items():
+                card['stats'][stat] = max(0, card['stats'][stat] + delta)
+            touched = True
+        if touched:
+            roster['order'] = cls._rank(roster['cards'])
+            remaining = cls.CACHE_TTL * 2 - (time.time() - roster['builtAt'])
+            cache.set(cls.CACHE_KEY, roster, max(1, int(remaining)))
+
+
+class PostRankingService:
+    """
+    Hot score for tastemaker posts.
+
+    hot_score is a forward-decayed sum of a post's events (publishing,
+    views, likes, bookmarks), stored in log space (see apps.core.decay), so
+    recent engagement counts exponentially more, untouched posts never need
+    rewriting and ORDER BY hot_score is served from the hot_score indexes.
+    The half-life is short - posts are news-like, and a day-old like should
+    count for noticeably less than a fresh one. Publishing counts as an
+    event too, so a new post starts above old ones nobody reads.
+
+    Views, likes and bookmarks made through the API move the score with
+    one UPDATE each; refresh() recomputes it from stored data for posts
+    written directly to the database.
+    """
+
+    HOT_HALF_LIFE = timedelta(days=2)
+    PUBLISH_WEIGHT = 20.0
+    VIEW_WEIGHT = 1.0
+    LIKE_WEIGHT = 4.0
+    BOOKMARK_WEIGHT = 8.0
+    WEIGHTS = {'like': LIKE_WEIGHT, 'bookmark': BOOKMARK_WEIGHT}
+
+    POPULAR_WINDOW = timedelta(days=7)
+
+    @classmethod
+    def score(cls, weight: float, at: datetime = None) -> float:
+        """Log-space hot_score contribution of one event."""
+        return decay.log_weight(weight, cls.HOT_HALF_LIFE, at)
+
+    @classmethod
+    def record_view(cls, post_id):
+        """
+        Count a view.
+
+        Returns:
+            The new view count, or None if the post doesn't exist
+        """
+        updated = TastemakerPost.objects.filter(id=post_id).update(
+            view_count=F('view_count') + 1,
+            hot_score=decay.add_expression('hot_score', cls.score(cls.VIEW_WEIGHT)),
+        )
+        if not updated:
+            return None
+        return TastemakerPost.objects.filter(id=post_id).values_list('view_count', flat=True).first()
+
+    @classmethod
+    def featured(cls):
+        """Featured posts, hottest first."""
+        return TastemakerPost.objects.filter(is_featured=True).order_by('-hot_score')
+
+    @classmethod
+    def popular(cls):
+        """Posts published within POPULAR_WINDOW, hottest first."""
+        return TastemakerPost.objects.filter(
+            published_at__gte=timezone.now() - cls.POPULAR_WINDOW
+        ).order_by('-hot_score')
+
+    @classmethod
+    def refresh(cls, post_ids=None, batch_size: int = 500) -> int:
+        """
+        Recompute hot_score from publish time, interaction rows and views.
+
+        View timestamps aren't stored, so a rebuild credits views at
+        publish time; run it for posts whose counters were written outside
+        the API (imports, admin edits), not as a replacement for them.
+
+        Args:
+            post_ids: Posts to refresh (default: all)
+
+        Returns:
+            Number of posts updated
+        """
+        posts = TastemakerPost.objects.order_by('id').only('id', 'published_at', 'view_count')
+        if post_ids is not None:
+            posts = posts.filter(id__in=post_ids)
+
+        updated = 0
+        batch = []
+        for post in posts.iterator(chunk_size=batch_size):
+            batch.append(post)
+            if len(batch) >= batch_size:
+                updated += cls._refresh_batch(batch)
+                batch = []
+        if batch:
+            updated += cls._refresh_batch(batch)
+        return updated
+
+    @classmethod
+    def _refresh_batch(cls, posts: list) -> int:
+        scores = {
+            post.id: cls.score(cls.PUBLISH_WEIGHT + cls.VIEW_WEIGHT * post.view_count, post.published_at)
+            for post in posts
+        }
+        interactions = TastemakerPostInteraction.objects.filter(
+            post_id__in=list(scores)
+        ).values_list('post_id', 'interaction_type', 'created_at')
+        for post_id, interaction_type, created_at in interactions:
+            if interaction_type in cls.WEIGHTS:
+                scores[post_id] = decay.log_add(
+                    scores[post_id], cls.score(cls.WEIGHTS[interaction_type], created_at)
+                )
+
+        for post in posts:
+            post.hot_score = scores[post.id]
+        TastemakerPost.objects.bulk_update(posts, ['hot_score'])
+        return len(posts)
+
+
+class PostInteractionService:
+    """
+    Likes and bookmarks on tastemaker posts.
+
+    Each post carries like_count and bookmark_count, moved (along with its
+    hot_score) by a single UPDATE in the same transaction as the
+    interaction row, so totals never need a COUNT. Each user's liked and
+    bookmarked post ids are cached as sets built with one query, so a page
+    of posts gets its viewer state from one cache lookup instead of an
+    EXISTS per post.
+    """
+
+    CACHE_TTL = 3600  # 1 hour
+    COUNTERS = {'like': 'like_count', 'bookmark': 'bookmark_count'}
+
+    @staticmethod
+    def cache_key(user_id) -> str:
+        return f"post_interactions:{user_id}"
+
+    @classmethod
+    def set(cls, post_id, user_id, interaction_type: str, active: bool) -> dict:
+        """
+        Add (active=True) or remove a like/bookmark. Idempotent.
+
+        Returns:
+            {changed, likeCount, bookmarkCount} after the change
+
+        Raises:
+            ValueError: If post_id or user_id isn't a UUID
+            TastemakerPost.DoesNotExist: If the post doesn't exist
+            User.DoesNotExist: If the user doesn't exist
+        """
+        counter = cls.COUNTERS[interaction_type]
+        weight = PostRankingService.WEIGHTS[interaction_type]
+        try:
+            post_id = uuid.UUID(str(post_id))
+        except ValueError as e:
+            raise ValueError('postId must be a UUID') from e
+        try:
+            user_id = uuid.UUID(str(user_id))
+        except ValueError as e:
+            raise ValueError('userId must be a UUID') from e
+        post = TastemakerPost.objects.only('id').get(id=post_id)
+        if not User.objects.filter(id=user_id).exists():
+            raise User.DoesNotExist('User not found')
+        with transaction.atomic():
+            if active:
+                _, changed = TastemakerPostInteraction.objects.get_or_create(
+                    post=post, user_id=user_id, interaction_type=interaction_type
+                )
+                score = decay.add_expression('hot_score', PostRankingService.score(weight))
+            else:
+                # Take back exactly the score the interaction added
+                interaction = TastemakerPostInteraction.objects.select_for_update().filter(
+                    post=post, user_id=user_id, interaction_type=interaction_type
+                ).first()
+                changed = interaction is not None
+                if changed:
+                    interaction.delete()
+                    score = decay.remove_expression(
+                        'hot_score', PostRankingService.score(weight, interaction.created_at)
+                    )
+            if changed:
+                TastemakerPost.objects.filter(id=post.id).update(**{
+                    counter: F(counter) + (1 if active else -1),
+                    'hot_score': score,
+                })
+        if changed:
+            cls._update_cached(user_id, interaction_type, post.id, active)
+
+        counts = TastemakerPost.objects.filter(id=post.id).values('like_count', 'bookmark_count').first()
+        return {
+            'changed': changed,
+            'likeCount': counts['like_count'],
+            'bookmarkCount': counts['bookmark_count'],
+        }
+
+    @classmethod
+    def viewer_state(cls, user_id) -> dict:
+        """
+        Post ids (str) a user has liked and bookmarked.
+
+        Returns:
+            {'like': set, 'bookmark': set}
+        """
+        key = cls.cache_key(user_id)
+        state = cache.get(key)
+        if state is None:
+            state = {interaction_type: set() for interaction_type in cls.COUNTERS}
+            rows = TastemakerPostInteraction.objects.filter(user_id=user_id).values_list(
+                'post_id', 'interaction_type'
+            )
+            for post_id, interaction_type in rows:
+                state.setdefault(interaction_type, set()).add(str(post_id))
+            cache.set(key, state, cls.CACHE_TTL)
+        return state
+
+    @classmethod
+    def _update_cached(cls, user_id, interaction_type: str, post_id, active: bool) -> None:
+        """Apply a change to the user's cached sets, if they're cached."""
+        key = cls.cache_key(user_id)
+        state = cache.get(key)
+        if state is None:
+            return
+        post_ids = state.setdefault(interaction_type, set())
+        if active:
+            post_ids.add(str(post_id))
+        else:
+            post_ids.discard(str(post_id))
+        cache.set(key, state, cls.CACHE_TTL)
+
+
+class PostHydrationService:
+    """
+    Expands a page of posts' restaurant_ids and list_ids into cards.
+
+    Ids are collected across the whole page and fetched once per type
+    through RestaurantCardCache and ListHeaderCache, so a page costs the
+    same handful of queries (none when warm) whatever its size.
+    """
+
+    EXPANSIONS = ('restaurants', 'lists')
+
+    @staticmethod
+    def parse_expand(value) -> set:
+        """?expand=restaurants,lists -> {'restaurants', 'lists'}"""
+        return {part.strip() for part in (value or '').split(',')} & set(PostHydrationService.EXPANSIONS)
+
+    @classmethod
+    def hydrate(cls, posts, data, expand) -> list:
+        """
+        Add 'restaurants' and/or 'lists' to serialized posts.
+
+        Args:
+            posts: TastemakerPost instances
+            data: Their serialized dicts, in the same order
+            expand: Subset of EXPANSIONS
+
+        Returns:
+            data, with each post's cards in its own id order (ids that no
+            longer exist are skipped)
+        """
+        data = [dict(item) for item in data]
+        if 'restaurants' in expand:
+            cards = cls._by_id(
+                RestaurantCardCache.get_many(cls._unique(post.restaurant_ids for post in posts))
+            )
+            for post, item in zip(posts, data):
+                item['restaurants'] = [cards[str(rid)] for rid in post.restaurant_ids or () if str(rid) in cards]
+        if 'lists' in expand:
+            headers = cls._by_id(
+                ListHeaderCache.get_many(cls._unique(post.list_ids for post in posts))
+            )
+            for post, item in zip(posts, data):
+                item['lists'] = [headers[str(lid)] for lid in post.list_ids or () if str(lid) in headers]
+        return data
+
+    @staticmethod
+    def _unique(id_lists) -> list:
+        return list(dict.fromkeys(str(i) for ids in id_lists for i in ids or ()))
+
+    @staticmethod
+    def _by_id(items) -> dict:
+        return {str(item['id']): item for item in items}
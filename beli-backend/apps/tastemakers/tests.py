@@ -0,0 +1,133 @@
+"""
+Tests for tastemaker post interactions and search.
+"""
+import uuid
+
+import pytest
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .models import TastemakerPost
+from .search import PostSearchIndex, PostSearchService, highlight
+from .services import PostInteractionService, PostRankingService
+
+
+@pytest.fixture
+def make_post(make_user):
+    def make(**fields):
+        fields.setdefault('user', make_user(is_tastemaker=True))
+        fields.setdefault('title', 'Best tacos')
+        fields.setdefault('cover_image', 'https://example.com/cover.jpg')
+        fields.setdefault('content', 'Where to eat.')
+        fields.setdefault('published_at', timezone.now())
+        return TastemakerPost.objects.create(**fields)
+    return make
+
+
+@pytest.mark.django_db
+def test_likes_and_bookmarks_move_the_counters(make_post, make_user):
+    post, client = make_post(), APIClient()
+    fan, other = make_user(), make_user()
+    url = f'/api/v1/tastemakers/posts/{post.id}'
+
+    assert client.post(f'{url}/like/', {'userId': str(fan.id)}).json()['likeCount'] == 1
+    assert client.post(f'{url}/like/', {'userId': str(fan.id)}).json()['likeCount'] == 1
+    assert client.post(f'{url}/like/', {'userId': str(other.id)}).json()['likeCount'] == 2
+    response = client.post(f'{url}/bookmark/', {'userId': str(fan.id)}).json()
+    assert (response['likeCount'], response['bookmarkCount']) == (2, 1)
+
+    response = client.delete(f'{url}/like/?userId={fan.id}').json()
+    assert (response['likeCount'], response['bookmarkCount']) == (1, 1)
+    post.refresh_from_db()
+    assert (post.like_count, post.bookmark_count) == (1, 1)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('user_id, expected', [
+    ('not-a-uuid', 400),
+    (str(uuid.uuid4()), 404),
+])
+def test_like_rejects_bad_user_ids(make_post, user_id, expected):
+    post = make_post()
+
+    response = APIClient().post(f'/api/v1/tastemakers/posts/{post.id}/like/', {'userId': user_id})
+
+    assert response.status_code == expected
+    post.refresh_from_db()
+    assert post.like_count == 0
+
+
+def test_interaction_routes_only_match_uuids():
+    response = APIClient().post('/api/v1/tastemakers/posts/featured/like/', {'userId': str(uuid.uuid4())})
+
+    assert response.status_code == 404
+
+
+@pytest.mark.django_db
+def test_search_vector_trigger_tracks_post_edits(make_post):
+    post = make_post(title='Late night ramen', tags=['noodles'])
+
+    def found(query):
+        return [hit.id for hit, _, _ in PostSearchService.search(query)]
+
+    assert found('ramen') == [post.id]
+    assert found('noodles') == [post.id]
+
+    TastemakerPost.objects.filter(pk=post.pk).update(title='Early morning congee')
+    assert found('ramen') == []
+    assert found('congee') == [post.id]
+
+    # The trigger builds the same vector as search_vector() / reindex()
+    stored = TastemakerPost.objects.values_list('search_vector', flat=True).get(pk=post.pk)
+    PostSearchService.reindex([post.pk])
+    assert TastemakerPost.objects.values_list('search_vector', flat=True).get(pk=post.pk) == stored
+
+
+@pytest.mark.django_db
+def test_interactions_move_hot_score_like_a_rebuild(make_post, make_user):
+    post = make_post()
+    fan, other = make_user(), make_user()
+    # Posts are written outside the API, and get their publish score here
+    PostRankingService.refresh([post.id])
+
+    def scores():
+        post.refresh_from_db()
+        live = post.hot_score
+        PostRankingService.refresh([post.id])
+        post.refresh_from_db()
+        return live, post.hot_score
+
+    PostInteractionService.set(post.id, fan.id, 'like', True)
+    PostInteractionService.set(post.id, other.id, 'bookmark', True)
+    live, rebuilt = scores()
+    assert live > PostRankingService.score(PostRankingService.PUBLISH_WEIGHT, post.published_at)
+    assert live == pytest.approx(rebuilt)
+
+    PostInteractionService.set(post.id, fan.id, 'like', False)
+    PostInteractionService.set(post.id, other.id, 'bookmark', False)
+    live, rebuilt = scores()
+    assert live == pytest.approx(rebuilt)
+    assert live == pytest.approx(PostRankingService.score(PostRankingService.PUBLISH_WEIGHT, post.published_at))
+
+
+def test_search_fallback_ranks_and_excludes():
+    index = PostSearchIndex([
+        ('a', 'Tacos in Austin', None, 'Brisket and tacos.', ['texmex']),
+        ('b', 'Brunch spots', 'Tacos too', 'Eggs, coffee and a taco truck.', []),
+        ('c', 'Ramen guide', None, 'Noodles everywhere.', ['noodles', 'tacos']),
+        ('d', 'Pizza', None, 'Nothing else.', []),
+    ])
+
+    # A title match outranks subtitle/tag matches, which outrank content
+    assert [post_id for post_id, _ in index.search('taco', limit=10)][0] == 'a'
+    assert {post_id for post_id, _ in index.search('tacos', limit=10)} == {'a', 'b', 'c'}
+    assert [post_id for post_id, _ in index.search('tacos noodles', limit=10)] == ['c']
+    assert {post_id for post_id, _ in index.search('tacos -noodles', limit=10)} == {'a', 'b'}
+    assert index.search('sushi', limit=10) == []
+    assert len(index.search('tacos', limit=1, offset=1)) == 1
+
+
+def test_search_fallback_highlight_escapes_html():
+    assert highlight('Best <b>tacos</b> & more', {'taco'}) == (
+        'Best <mark>&lt;b&gt;tacos&lt;/b&gt;</mark> &amp; more'
+    )
@@ -6,12 +6,17 @@ Provides REST endpoints for tastemaker profiles and posts.
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Count
 
+from apps.users.models import User
 from .models import TastemakerPost
+from .search import PostSearchService
 from .serializers import TastemakerPostSerializer, TastemakerPostListSerializer
-from apps.users.models import User
-from apps.users.serializers import UserSerializer, UserListSerializer
+from .services import (
+    PostHydrationService,
+    PostInteractionService,
+    PostRankingService,
+    TastemakerDirectoryService,
+)
 
 
 class TastemakersViewSet(viewsets.ViewSet):
@@ -19,14 +24,21 @@ class TastemakersViewSet(viewsets.ViewSet):
     API endpoint for tastemakers.
 
     Supports:
-    - GET /api/v1/tastemakers/ - Get all tastemakers
+    - GET /api/v1/tastemakers/ - Get all tastemakers (cached ranked directory)
     - GET /api/v1/tastemakers/username/{username}/ - Get by username
     - GET /api/v1/tastemakers/posts/ - Get all posts
-    - GET /api/v1/tastemakers/posts/featured/ - Get featured posts
+    - GET /api/v1/tastemakers/posts/featured/ - Get featured posts (hottest first)
+    - GET /api/v1/tastemakers/posts/popular/ - Get this week's hottest posts
+    - GET /api/v1/tastemakers/posts/search/?q= - Full-text search posts
     - GET /api/v1/tastemakers/posts/{id}/ - Get single post
     - GET /api/v1/tastemakers/posts/user/{userId}/ - Get user's posts
-    - POST /api/v1/tastemakers/posts/{id}/like/ - Like a post
+    - POST/DELETE /api/v1/tastemakers/posts/{id}/like/ - Like / unlike a post
+    - POST/DELETE /api/v1/tastemakers/posts/{id}/bookmark/ - Bookmark / un-bookmark a post
     - POST /api/v1/tastemakers/posts/{id}/view/ - Increment view count
+
+    Post endpoints take an optional ?userId= to include that viewer's
+    liked/bookmarked state, and ?expand=restaurants,lists to inline the
+    referenced restaurant cards and list headers.
     """
 
     def list(self, request):
@@ -36,15 +48,7 @@ class TastemakersViewSet(viewsets.ViewSet):
         Maps to: TastemakerService.getTastemakers()
         """
         limit = int(request.query_params.get('limit', 50))
-
-        tastemakers = User.objects.filter(
-            is_tastemaker=True
-        ).annotate(
-            follower_count=Count('followers_set')
-        ).order_by('-follower_count')[:limit]
-
-        serializer = UserSerializer(tastemakers, many=True)
-        return Response(serializer.data)
+        return Response(TastemakerDirectoryService.get_directory(limit))
 
     @action(detail=False, methods=['get'], url_path='username/(?P<username>[^/.]+)')
     def by_username(self, request, username=None):
@@ -53,16 +57,14 @@ class TastemakersViewSet(viewsets.ViewSet):
 
         Maps to: TastemakerService.getTastemakerByUsername()
         """
-        try:
-            user = User.objects.get(username=username, is_tastemaker=True)
-        except User.DoesNotExist:
+        card = TastemakerDirectoryService.get_by_username(username)
+        if card is None:
             return Response(
                 {'error': 'Tastemaker not found'},
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        serializer = UserSerializer(user)
-        return Response(serializer.data)
+        return Response(card)
 
     @action(detail=False, methods=['get'])
     def posts(self, request):
@@ -74,8 +76,7 @@ class TastemakersViewSet(viewsets.ViewSet):
         limit = int(request.query_params.get('limit', 50))
 
         posts = TastemakerPost.objects.select_related('user').order_by('-published_at')[:limit]
-        serializer = TastemakerPostListSerializer(posts, many=True)
-        return Response(serializer.data)
+        return Response(self._render(request, list(posts), TastemakerPostListSerializer))
 
     @action(detail=False, methods=['get'], url_path='posts/featured')
     def featured_posts(self, request):
@@ -86,14 +87,50 @@ class TastemakersViewSet(viewsets.ViewSet):
         """
         limit = int(request.query_params.get('limit', 10))
 
-        posts = TastemakerPost.objects.filter(
-            is_featured=True
-        ).select_related('user').order_by('-view_count')[:limit]
+        posts = PostRankingService.featured().select_related('user')[:limit]
+
+        return Response(self._render(request, list(posts), TastemakerPostListSerializer))
+
+    @action(detail=False, methods=['get'], url_path='posts/popular')
+    def popular_posts(self, request):
+        """
+        Get the hottest posts published this week.
+        """
+        limit = int(request.query_params.get('limit', 10))
+
+        posts = PostRankingService.popular().select_related('user')[:limit]
+
+        return Response(self._render(request, list(posts), TastemakerPostListSerializer))
 
-        serializer = TastemakerPostListSerializer(posts, many=True)
-        return Response(serializer.data)
+    @action(detail=False, methods=['get'], url_path='posts/search')
+    def search_posts(self, request):
+        """
+        Full-text search over post titles, subtitles, content and tags.
+
+        Query params: q (required), limit, offset
 
-    @action(detail=False, methods=['get'], url_path='posts/(?P<post_id>[^/.]+)')
+        Each result carries its rank and a highlight of the title and a
+        content snippet, HTML-escaped with matches wrapped in <mark>.
+        """
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response(
+                {'error': 'q is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        limit = int(request.query_params.get('limit', 20))
+        offset = int(request.query_params.get('offset', 0))
+
+        results = PostSearchService.search(query, limit, offset)
+        data = self._render(request, [post for post, _, _ in results], TastemakerPostListSerializer)
+        for item, (_, rank, highlight) in zip(data, results):
+            item['rank'] = rank
+            item['highlight'] = highlight
+        return Response(data)
+
+    # Only UUIDs, so posts/featured/, posts/popular/ and posts/search/ aren't
+    # taken for post ids
+    @action(detail=False, methods=['get'], url_path='posts/(?P<post_id>[0-9a-fA-F-]{36})')
     def post_detail(self, request, post_id=None):
         """
         Get a single tastemaker post.
@@ -108,8 +145,7 @@ class TastemakersViewSet(viewsets.ViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        serializer = TastemakerPostSerializer(post)
-        return Response(serializer.data)
+        return Response(self._render(request, [post], TastemakerPostSerializer)[0])
 
     @action(detail=False, methods=['get'], url_path='posts/user/(?P<user_id>[^/.]+)')
     def user_posts(self, request, user_id=None):
@@ -124,33 +160,93 @@ class TastemakersViewSet(viewsets.ViewSet):
             user_id=user_id
         ).select_related('user').order_by('-published_at')[:limit]
 
-        serializer = TastemakerPostListSerializer(posts, many=True)
-        return Response(serializer.data)
+        return Response(self._render(request, list(posts), TastemakerPostListSerializer))
 
-    @action(detail=False, methods=['post'], url_path='posts/(?P<post_id>[^/.]+)/like')
+    @action(detail=False, methods=['post', 'delete'], url_path='posts/(?P<post_id>[0-9a-fA-F-]{36})/like')
     def like_post(self, request, post_id=None):
         """
-        Like a tastemaker post.
+        Like (POST) or unlike (DELETE) a tastemaker post.
+
+        Maps to: TastemakerService.likeTastemakerPost() / unlikeTastemakerPost()
+
+        Body (or query param on DELETE): userId
+        """
+        return self._set_interaction(request, post_id, 'like')
+
+    @action(detail=False, methods=['post', 'delete'], url_path='posts/(?P<post_id>[0-9a-fA-F-]{36})/bookmark')
+    def bookmark_post(self, request, post_id=None):
+        """
+        Bookmark (POST) or un-bookmark (DELETE) a tastemaker post.
 
-        Maps to: TastemakerService.likeTastemakerPost()
+        Body (or query param on DELETE): userId
         """
-        user_id = request.data.get('userId')
-        return Response({'success': True, 'postId': post_id, 'liked': True})
+        return self._set_interaction(request, post_id, 'bookmark')
 
-    @action(detail=False, methods=['post'], url_path='posts/(?P<post_id>[^/.]+)/view')
+    @action(detail=False, methods=['post'], url_path='posts/(?P<post_id>[0-9a-fA-F-]{36})/view')
     def view_post(self, request, post_id=None):
         """
         Increment post view count.
 
         Maps to: TastemakerService.incrementPostViews()
         """
+        author_id = TastemakerPost.objects.filter(id=post_id).values_list('user_id', flat=True).first()
+        views = PostRankingService.record_view(post_id) if author_id else None
+        if views is None:
+            return Response(
+                {'error': 'Post not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        TastemakerDirectoryService.apply_views(author_id)
+        return Response({'success': True, 'views': views})
+
+    def _set_interaction(self, request, post_id, interaction_type):
+        user_id = request.data.get('userId') or request.query_params.get('userId')
+        if not user_id:
+            return Response(
+                {'error': 'userId is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        active = request.method == 'POST'
         try:
-            post = TastemakerPost.objects.get(id=post_id)
-            post.view_count += 1
-            post.save(update_fields=['view_count'])
-            return Response({'success': True, 'views': post.view_count})
+            result = PostInteractionService.set(post_id, user_id, interaction_type, active)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except TastemakerPost.DoesNotExist:
             return Response(
                 {'error': 'Post not found'},
                 status=status.HTTP_404_NOT_FOUND
             )
+        except User.DoesNotExist:
+            return Response(
+                {'error': 'User not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        return Response({
+            'success': True,
+            'postId': post_id,
+            'liked' if interaction_type == 'like' else 'bookmarked': active,
+            'likeCount': result['likeCount'],
+            'bookmarkCount': result['bookmarkCount'],
+        })
+
+    def _render(self, request, posts, serializer_class) -> list:
+        """Serialize posts with viewer state and any ?expand= hydration."""
+        data = serializer_class(posts, many=True, context=self._viewer_context(request)).data
+        expand = PostHydrationService.parse_expand(request.query_params.get('expand'))
+        if expand:
+            data = PostHydrationService.hydrate(posts, data, expand)
+        return data
+
+    @staticmethod
+    def _viewer_context(request) -> dict:
+        """Serializer context with the ?userId= viewer's liked/bookmarked sets."""
+        viewer_id = request.query_params.get('userId')
+        if not viewer_id:
+            return {}
+        return {
+            'viewerId': viewer_id,
+            'viewerState': PostInteractionService.viewer_state(viewer_id),
+        }
@@ -27,6 +27,13 @@ class User(models.Model):
     # Tastemaker status
     is_tastemaker = models.BooleanField(default=False)
 
+    # Dietary restrictions ('Vegetarian', 'Gluten-Free', ...)
+    dietary_restrictions = ArrayField(
+        models.CharField(max_length=50),
+        default=list,
+        blank=True
+    )
+
     # Watchlist (want-to-try restaurants)
     # This is the source of truth for want-to-try list
     watchlist = ArrayField(
@@ -51,6 +58,7 @@ class UserFollow(models.Model):
     """
     User follow relationships - maps to Supabase user_follows table.
     """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     follower = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
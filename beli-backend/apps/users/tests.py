@@ -0,0 +1,36 @@
+"""
+Tests for following users.
+"""
+import uuid
+
+import pytest
+from rest_framework.test import APIClient
+
+from .models import UserFollow
+
+
+def follow_url(user) -> str:
+    return f'/api/v1/users/{user.id}/follow/'
+
+
+@pytest.mark.django_db
+def test_follow_and_unfollow(make_user):
+    user, follower = make_user(), make_user()
+    client = APIClient()
+
+    assert client.post(follow_url(user), {'userId': str(follower.id)}).status_code == 200
+    assert UserFollow.objects.filter(follower=follower, following=user).exists()
+
+    assert client.delete(f'{follow_url(user)}?userId={follower.id}').status_code == 200
+    assert not UserFollow.objects.filter(follower=follower, following=user).exists()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('follower_id, expected', [
+    ('not-a-uuid', 400),
+    (str(uuid.uuid4()), 404),
+])
+def test_follow_rejects_bad_follower_ids(make_user, follower_id, expected):
+    response = APIClient().post(follow_url(make_user()), {'userId': follower_id})
+
+    assert response.status_code == expected
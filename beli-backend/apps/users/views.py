@@ -4,11 +4,15 @@ User API views.
 Provides REST endpoints for user data, matching the frontend
 UserService and UserRestaurantService methods.
 """
+import uuid
+
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.db.models import Q, Count
 
+from apps.notifications.services import NotificationEvents
+from apps.tastemakers.services import TastemakerDirectoryService
 from .models import User, UserFollow, Rating
 from .serializers import (
     UserSerializer,
@@ -29,6 +33,7 @@ class UserViewSet(viewsets.ReadOnlyModelViewSet):
     - GET /api/v1/users/leaderboard/ - Get leaderboard
     - GET /api/v1/users/{id}/followers/ - Get user's followers
     - GET /api/v1/users/{id}/following/ - Get users this user follows
+    - POST/DELETE /api/v1/users/{id}/follow/ - Follow / unfollow a user
     """
     queryset = User.objects.all()
     serializer_class = UserSerializer
@@ -141,6 +146,55 @@ class UserViewSet(viewsets.ReadOnlyModelViewSet):
         serializer = UserListSerializer(following, many=True)
         return Response(serializer.data)
 
+    @action(detail=True, methods=['post', 'delete'])
+    def follow(self, request, id=None):
+        """
+        Follow (POST) or unfollow (DELETE) this user.
+
+        Maps to: UserService.followUser() / UserService.unfollowUser()
+
+        Body (or query param): {"userId": follower's id}
+        """
+        follower_id = request.data.get('userId') or request.query_params.get('userId')
+        if not follower_id:
+            return Response(
+                {'error': 'userId is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            follower_id = uuid.UUID(str(follower_id))
+        except ValueError:
+            return Response(
+                {'error': 'userId must be a UUID'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        user = self.get_object()
+        if user.id == follower_id:
+            return Response(
+                {'error': 'You cannot follow yourself'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not User.objects.filter(id=follower_id).exists():
+            return Response(
+                {'error': 'User not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        if request.method == 'POST':
+            _, changed = UserFollow.objects.get_or_create(follower_id=follower_id, following=user)
+            delta = 1
+        else:
+            changed, _ = UserFollow.objects.filter(follower_id=follower_id, following=user).delete()
+            delta = -1
+        if changed:
+            TastemakerDirectoryService.apply_follow(follower_id, user.id, delta)
+            if delta > 0:
+                NotificationEvents.emit('follow', user.id, follower_id)
+            else:
+                NotificationEvents.retract('follow', user.id, follower_id)
+
+        return Response({'success': True, 'following': request.method == 'POST'})
+
     @action(detail=True, methods=['get'])
     def ratings(self, request, id=None):
         """
@@ -167,13 +221,10 @@ class UserViewSet(viewsets.ReadOnlyModelViewSet):
         """
         user = self.get_object()
 
-        if not user.watchlist:
-            return Response([])
-
-        from apps.restaurants.models import Restaurant
+        from apps.ratings.services import WatchlistService
         from apps.restaurants.serializers import RestaurantListSerializer
 
-        restaurants = Restaurant.objects.filter(id__in=user.watchlist)
+        restaurants = WatchlistService.get_restaurants(user)
         serializer = RestaurantListSerializer(restaurants, many=True)
         return Response(serializer.data)
 
@@ -0,0 +1,21 @@
+"""
+ASGI config for beli-backend project.
+
+Serves the same API as wsgi.py, plus the notification stream
+(/api/v1/notifications/stream/), which needs an async server:
+
+    uvicorn config.asgi:application --host 0.0.0.0 --port 8000
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+django_application = get_asgi_application()
+
+# Imported after setup, it needs the app registry
+from apps.notifications.stream import NotificationStreamApp  # noqa: E402
+
+application = NotificationStreamApp(django_application)
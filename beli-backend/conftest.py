@@ -0,0 +1,74 @@
+"""
+Shared pytest setup.
+
+Tests that touch the database need PostgreSQL (DATABASE_URL=postgres://...):
+the Supabase tables the models map to use ArrayField, and much of the SQL
+is PostgreSQL-only. On other databases those tests are skipped and only the
+pure-Python ones run.
+
+Supabase owns several tables (managed = False), so the test database would
+otherwise lack them; they are created from the models for the test run.
+"""
+import itertools
+from pathlib import Path
+
+import pytest
+from django.apps import apps
+from django.db import connection
+
+_sequence = itertools.count()
+
+MIGRATIONS = Path(__file__).resolve().parent.parent / 'supabase' / 'migrations'
+
+
+def pytest_collection_modifyitems(config, items):
+    if connection.vendor == 'postgresql':
+        return
+    skip = pytest.mark.skip(reason='database tests need DATABASE_URL pointing at PostgreSQL')
+    for item in items:
+        if item.get_closest_marker('django_db'):
+            item.add_marker(skip)
+
+
+@pytest.fixture(scope='session', autouse=True)
+def _manage_supabase_tables():
+    """Let the test database create tables owned by Supabase migrations."""
+    for model in apps.get_models():
+        model._meta.managed = True
+
+
+@pytest.fixture(scope='session')
+def django_db_setup(django_db_setup, django_db_blocker):
+    """Match Supabase column types and triggers the models can't express."""
+    with django_db_blocker.unblock(), connection.cursor() as cursor:
+        # users.watchlist is TEXT[] (00010), not uuid[]
+        cursor.execute('ALTER TABLE users ALTER COLUMN watchlist TYPE text[] USING watchlist::text[]')
+        # tastemaker_posts.search_vector trigger
+        cursor.execute((MIGRATIONS / '00025_tastemaker_post_search.sql').read_text())
+
+
+@pytest.fixture
+def make_user(db):
+    """Create users with unique usernames."""
+    from apps.users.models import User
+
+    def make(**fields):
+        n = next(_sequence)
+        fields.setdefault('username', f'user{n}')
+        fields.setdefault('display_name', f'User {n}')
+        return User.objects.create(**fields)
+    return make
+
+
+@pytest.fixture
+def make_restaurant(db):
+    """Create restaurants with placeholder address fields."""
+    from apps.restaurants.models import Restaurant
+
+    def make(**fields):
+        n = next(_sequence)
+        fields.setdefault('name', f'Restaurant {n}')
+        for field in ('address', 'city', 'state', 'neighborhood'):
+            fields.setdefault(field, '')
+        return Restaurant.objects.create(**fields)
+    return make
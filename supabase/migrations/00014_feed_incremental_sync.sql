@@ -0,0 +1,75 @@
+-- Migration: Incremental Feed Sync
+--
+-- Problem: Mobile clients re-download the full 50-item feed on every refresh.
+-- The API can return only changed activities (ratings.updated_at > since),
+-- but deleted ratings leave no trace, so clients can't drop them.
+--
+-- Solution:
+-- 1. Record deleted ratings in a rating_tombstones table via trigger
+-- 2. Index ratings.updated_at so "changed since" and ETag lookups are cheap
+--
+-- The Django API uses these for ?since= deltas and ETag/304 responses on
+-- /feed/ and /feed/user/{userId}/.
+
+-- ============================================
+-- STEP 1: Tombstones table
+-- ============================================
+
+CREATE TABLE IF NOT EXISTS public.rating_tombstones (
+  rating_id UUID PRIMARY KEY,
+  user_id UUID NOT NULL,
+  restaurant_id UUID NOT NULL,
+  deleted_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_rating_tombstones_deleted_at
+  ON public.rating_tombstones (deleted_at DESC);
+CREATE INDEX IF NOT EXISTS idx_rating_tombstones_user_deleted_at
+  ON public.rating_tombstones (user_id, deleted_at DESC);
+
+COMMENT ON TABLE public.rating_tombstones IS 'Deleted ratings, kept so feed clients can sync deletions incrementally. Safe to prune rows older than the longest client sync gap.';
+
+ALTER TABLE public.rating_tombstones ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Anyone can view rating tombstones"
+  ON public.rating_tombstones FOR SELECT
+  USING (true);
+
+-- ============================================
+-- STEP 2: Trigger to record deletions
+-- ============================================
+
+CREATE OR REPLACE FUNCTION record_rating_tombstone()
+RETURNS TRIGGER AS $$
+BEGIN
+  INSERT INTO public.rating_tombstones (rating_id, user_id, restaurant_id, deleted_at)
+  VALUES (OLD.id, OLD.user_id, OLD.restaurant_id, NOW())
+  ON CONFLICT (rating_id) DO UPDATE SET deleted_at = EXCLUDED.deleted_at;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON FUNCTION record_rating_tombstone() IS 'Records deleted ratings in rating_tombstones for incremental feed sync';
+
+DROP TRIGGER IF EXISTS record_rating_tombstone_trigger ON public.ratings;
+CREATE TRIGGER record_rating_tombstone_trigger
+  AFTER DELETE ON public.ratings
+  FOR EACH ROW EXECUTE FUNCTION record_rating_tombstone();
+
+-- ============================================
+-- STEP 3: Indexes for "changed since" queries
+-- ============================================
+
+-- Global feed delta + ETag (MAX(updated_at))
+CREATE INDEX IF NOT EXISTS idx_ratings_updated_at
+  ON public.ratings (updated_at DESC);
+
+-- Personalized feed delta + ETag (user_id IN (...) AND updated_at > since)
+CREATE INDEX IF NOT EXISTS idx_ratings_user_updated_at
+  ON public.ratings (user_id, updated_at DESC);
+
+-- ============================================
+-- Summary
+-- ============================================
+-- - Added rating_tombstones table filled by AFTER DELETE trigger on ratings
+-- - Added updated_at indexes on ratings for delta and ETag queries
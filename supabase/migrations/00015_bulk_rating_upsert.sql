@@ -0,0 +1,112 @@
+-- Migration: Bulk Rating Upsert Support
+--
+-- Problem: Importing rating history (hundreds of ratings per user) through
+-- POST /ratings/ costs 2-3 queries per rating, and the row-level count
+-- triggers from 00013 then issue one UPDATE users per inserted row.
+--
+-- Solution:
+-- 1. Guarantee a unique (user_id, restaurant_id) index so the API can
+--    upsert chunks with INSERT ... ON CONFLICT (user_id, restaurant_id)
+-- 2. Replace the row-level rating count trigger with statement-level
+--    triggers using transition tables, so a 200-row chunk updates each
+--    affected user once instead of 200 times
+--
+-- Counts stay identical to 00013 for single-row writes.
+
+-- ============================================
+-- STEP 1: Unique index for ON CONFLICT
+-- ============================================
+
+-- Seeds already rely on ON CONFLICT (user_id, restaurant_id); make it explicit
+CREATE UNIQUE INDEX IF NOT EXISTS idx_ratings_user_restaurant_unique
+  ON public.ratings (user_id, restaurant_id);
+
+-- ============================================
+-- STEP 2: Statement-level count maintenance
+-- ============================================
+
+-- Apply per-user deltas computed from a set of (user_id, status, sign) rows
+CREATE OR REPLACE FUNCTION apply_user_rating_count_deltas()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    UPDATE public.users u SET
+      been_count = u.been_count + d.been,
+      recommended_count = u.recommended_count + d.recommended
+    FROM (
+      SELECT user_id,
+        COUNT(*) FILTER (WHERE status = 'been') AS been,
+        COUNT(*) FILTER (WHERE status = 'recommended') AS recommended
+      FROM new_rows
+      GROUP BY user_id
+    ) d
+    WHERE u.id = d.user_id AND (d.been <> 0 OR d.recommended <> 0);
+
+  ELSIF TG_OP = 'DELETE' THEN
+    UPDATE public.users u SET
+      been_count = u.been_count - d.been,
+      recommended_count = u.recommended_count - d.recommended
+    FROM (
+      SELECT user_id,
+        COUNT(*) FILTER (WHERE status = 'been') AS been,
+        COUNT(*) FILTER (WHERE status = 'recommended') AS recommended
+      FROM old_rows
+      GROUP BY user_id
+    ) d
+    WHERE u.id = d.user_id AND (d.been <> 0 OR d.recommended <> 0);
+
+  ELSIF TG_OP = 'UPDATE' THEN
+    -- Net effect of status changes: +1 for the new status, -1 for the old
+    UPDATE public.users u SET
+      been_count = u.been_count + d.been,
+      recommended_count = u.recommended_count + d.recommended
+    FROM (
+      SELECT user_id, SUM(been) AS been, SUM(recommended) AS recommended
+      FROM (
+        SELECT n.user_id,
+          (n.status = 'been')::int - (o.status = 'been')::int AS been,
+          (n.status = 'recommended')::int - (o.status = 'recommended')::int AS recommended
+        FROM new_rows n
+        JOIN old_rows o ON o.id = n.id
+        WHERE o.status IS DISTINCT FROM n.status
+      ) changes
+      GROUP BY user_id
+    ) d
+    WHERE u.id = d.user_id AND (d.been <> 0 OR d.recommended <> 0);
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON FUNCTION apply_user_rating_count_deltas() IS 'Maintains been_count and recommended_count once per statement (replaces row-level update_user_rating_counts)';
+
+DROP TRIGGER IF EXISTS update_rating_counts_trigger ON public.ratings;
+
+-- Transition tables require one trigger per event
+DROP TRIGGER IF EXISTS rating_counts_insert_trigger ON public.ratings;
+CREATE TRIGGER rating_counts_insert_trigger
+  AFTER INSERT ON public.ratings
+  REFERENCING NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION apply_user_rating_count_deltas();
+
+DROP TRIGGER IF EXISTS rating_counts_update_trigger ON public.ratings;
+CREATE TRIGGER rating_counts_update_trigger
+  AFTER UPDATE ON public.ratings
+  REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION apply_user_rating_count_deltas();
+
+DROP TRIGGER IF EXISTS rating_counts_delete_trigger ON public.ratings;
+CREATE TRIGGER rating_counts_delete_trigger
+  AFTER DELETE ON public.ratings
+  REFERENCING OLD TABLE AS old_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION apply_user_rating_count_deltas();
+
+DROP FUNCTION IF EXISTS update_user_rating_counts();
+
+-- ============================================
+-- Summary
+-- ============================================
+-- - Added unique (user_id, restaurant_id) index on ratings for bulk upserts
+-- - Rating count triggers now run once per statement with transition tables
+--   (INSERT ... ON CONFLICT DO UPDATE fires the insert trigger for inserted
+--   rows and the update trigger for conflicting rows)
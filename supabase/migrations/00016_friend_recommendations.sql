@@ -0,0 +1,74 @@
+-- Migration: Materialized Friend Recommendations
+--
+-- Problem: /ratings/friend-recs/{userId}/ fetched follows, the user's visits
+-- and friends' high ratings in three queries, then aggregated in Python
+-- after cutting off at limit * 2 rows - so recommenderCount was wrong for
+-- any restaurant whose ratings fell past the cutoff.
+--
+-- Solution: Store per-user recommendations aggregated in SQL
+-- (max friend rating, distinct recommender count, top recommender).
+-- The Django FriendRecommendationService rebuilds a user's rows on first
+-- read / when stale and patches them when a followee rates a restaurant or
+-- the user visits one.
+
+-- ============================================
+-- STEP 1: Recommendations table
+-- ============================================
+
+CREATE TABLE IF NOT EXISTS public.friend_recommendations (
+  id BIGSERIAL PRIMARY KEY,
+  user_id UUID NOT NULL REFERENCES public.users(id) ON DELETE CASCADE,
+  restaurant_id UUID NOT NULL REFERENCES public.restaurants(id) ON DELETE CASCADE,
+  friend_rating NUMERIC(3,1) NOT NULL,
+  recommender_count INTEGER NOT NULL,
+  top_recommender_id UUID NOT NULL REFERENCES public.users(id) ON DELETE CASCADE,
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  UNIQUE (user_id, restaurant_id)
+);
+
+-- Read path: WHERE user_id = ? ORDER BY friend_rating DESC, recommender_count DESC
+CREATE INDEX IF NOT EXISTS idx_friend_recs_user_rank
+  ON public.friend_recommendations (user_id, friend_rating DESC, recommender_count DESC);
+
+-- Incremental path: WHERE restaurant_id = ANY(...)
+CREATE INDEX IF NOT EXISTS idx_friend_recs_restaurant
+  ON public.friend_recommendations (restaurant_id);
+
+COMMENT ON TABLE public.friend_recommendations IS 'Materialized friend recommendations (friends rated >= 8.0, user has not been). Maintained by the Django API.';
+
+-- ============================================
+-- STEP 2: Refresh bookkeeping
+-- ============================================
+
+CREATE TABLE IF NOT EXISTS public.friend_recommendation_state (
+  user_id UUID PRIMARY KEY REFERENCES public.users(id) ON DELETE CASCADE,
+  refreshed_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+COMMENT ON TABLE public.friend_recommendation_state IS 'Last full rebuild of a user''s friend_recommendations. Missing row = never materialized.';
+
+-- ============================================
+-- STEP 3: Supporting index for the aggregate
+-- ============================================
+
+-- Friends' high ratings: user_id = ANY(following) AND status = 'been' AND rating >= 8
+CREATE INDEX IF NOT EXISTS idx_ratings_user_status_rating
+  ON public.ratings (user_id, status, rating DESC);
+
+-- ============================================
+-- STEP 4: RLS
+-- ============================================
+
+ALTER TABLE public.friend_recommendations ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.friend_recommendation_state ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can view their own friend recommendations"
+  ON public.friend_recommendations FOR SELECT
+  USING (auth.uid() = user_id);
+
+-- ============================================
+-- Summary
+-- ============================================
+-- - Added friend_recommendations (materialized, per user) and
+--   friend_recommendation_state tables
+-- - Added ratings (user_id, status, rating) index for the aggregate query
@@ -0,0 +1,69 @@
+-- Migration: Item-Item Collaborative Filtering
+--
+-- Problem: The only personalized recommendations come from friends' ratings.
+--
+-- Solution: Store the top-N most similar restaurants per restaurant
+-- (shrunk cosine over "been" co-visitation), computed in batch by the Django
+-- CollaborativeFilteringService. /ratings/recommendations/{userId}/ scores
+-- unseen restaurants with one indexed join against these lists.
+--
+-- Rating writes queue restaurants in restaurant_neighbor_dirty; the
+-- refresh_restaurant_neighbors management command recomputes them.
+
+-- ============================================
+-- STEP 1: Neighbor lists (sparse similarity matrix)
+-- ============================================
+
+CREATE TABLE IF NOT EXISTS public.restaurant_neighbors (
+  restaurant_id UUID NOT NULL REFERENCES public.restaurants(id) ON DELETE CASCADE,
+  neighbor_id UUID NOT NULL REFERENCES public.restaurants(id) ON DELETE CASCADE,
+  similarity DOUBLE PRECISION NOT NULL,
+  co_count INTEGER NOT NULL,
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  PRIMARY KEY (restaurant_id, neighbor_id)
+);
+
+-- Reverse lookups when refreshing symmetric entries
+CREATE INDEX IF NOT EXISTS idx_restaurant_neighbors_neighbor
+  ON public.restaurant_neighbors (neighbor_id);
+
+COMMENT ON TABLE public.restaurant_neighbors IS 'Top-N similar restaurants per restaurant for item-item collaborative filtering. Maintained by the Django API.';
+
+-- ============================================
+-- STEP 2: Dirty queue for incremental refresh
+-- ============================================
+
+CREATE TABLE IF NOT EXISTS public.restaurant_neighbor_dirty (
+  restaurant_id UUID PRIMARY KEY REFERENCES public.restaurants(id) ON DELETE CASCADE,
+  marked_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_restaurant_neighbor_dirty_marked_at
+  ON public.restaurant_neighbor_dirty (marked_at);
+
+-- ============================================
+-- STEP 3: Supporting index for the batch self-join
+-- ============================================
+
+-- Most recent "been" ratings per user (ROW_NUMBER ... ORDER BY updated_at DESC)
+CREATE INDEX IF NOT EXISTS idx_ratings_been_user_updated_at
+  ON public.ratings (user_id, updated_at DESC) INCLUDE (restaurant_id)
+  WHERE status = 'been';
+
+-- ============================================
+-- STEP 4: RLS
+-- ============================================
+
+ALTER TABLE public.restaurant_neighbors ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.restaurant_neighbor_dirty ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Anyone can view restaurant neighbors"
+  ON public.restaurant_neighbors FOR SELECT
+  USING (true);
+
+-- ============================================
+-- Summary
+-- ============================================
+-- - Added restaurant_neighbors (top-N similarity lists) and
+--   restaurant_neighbor_dirty (incremental refresh queue)
+-- - Added partial index on "been" ratings for the co-visitation batch
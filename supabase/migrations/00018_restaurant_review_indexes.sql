@@ -0,0 +1,29 @@
+-- Migration: Restaurant Review Indexes
+--
+-- Problem: /ratings/reviews/restaurant/{id}/ returned every review for a
+-- restaurant in one response, sorted with a full scan of its ratings.
+--
+-- Solution: The API now pages reviews with keyset cursors
+-- (recent / highest / most-liked) and caches a per-restaurant summary.
+-- These indexes let each page be a bounded index range scan.
+-- (Like counts for sort=most-liked use an index on the Django-managed
+-- activity_interactions table.)
+
+-- ============================================
+-- STEP 1: Review page indexes
+-- ============================================
+
+-- sort=recent: WHERE restaurant_id = ? ORDER BY created_at DESC, id DESC
+CREATE INDEX IF NOT EXISTS idx_ratings_restaurant_reviews_recent
+  ON public.ratings (restaurant_id, created_at DESC, id DESC)
+  WHERE status = 'been' AND notes IS NOT NULL AND notes <> '';
+
+-- sort=highest: ORDER BY COALESCE(rating, -1) DESC, created_at DESC, id DESC
+CREATE INDEX IF NOT EXISTS idx_ratings_restaurant_reviews_highest
+  ON public.ratings (restaurant_id, (COALESCE(rating, -1)) DESC, created_at DESC, id DESC)
+  WHERE status = 'been' AND notes IS NOT NULL AND notes <> '';
+
+-- ============================================
+-- Summary
+-- ============================================
+-- - Added partial indexes on ratings for keyset-paged restaurant reviews
@@ -0,0 +1,83 @@
+-- Migration: Incremental Notification Sync
+--
+-- Problem: /notifications/ sync (?since= deltas, ETag/304) reads
+-- notifications.updated_at, but nothing creates that column. 00009 dropped
+-- the original notifications table; the Django API has used its own
+-- since, created from its model, and 00014 only covered ratings.
+--
+-- Solution:
+-- 1. (Re)create notifications as the Django model defines it, if missing
+-- 2. Add updated_at, backfilled from created_at
+-- 3. Keep updated_at current on every UPDATE with a trigger, so raw SQL
+--    writes show up in deltas too
+-- 4. Index (user_id, updated_at, id) for delta pages and ETag lookups
+
+-- ============================================
+-- STEP 1: Notifications table
+-- ============================================
+
+CREATE TABLE IF NOT EXISTS public.notifications (
+  id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+  user_id UUID NOT NULL REFERENCES public.users(id) ON DELETE CASCADE,
+  notification_type VARCHAR(30) NOT NULL,
+  actor_user_id UUID REFERENCES public.users(id) ON DELETE SET NULL,
+  target_restaurant_id UUID REFERENCES public.restaurants(id) ON DELETE SET NULL,
+  target_list VARCHAR(200),
+  comment_text TEXT,
+  streak_count INTEGER,
+  action_description VARCHAR(500) NOT NULL,
+  is_read BOOLEAN NOT NULL DEFAULT FALSE,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_notifications_user_created_at
+  ON public.notifications (user_id, created_at DESC);
+
+COMMENT ON TABLE public.notifications IS 'User notifications. Written by the Django API (see apps/notifications).';
+
+ALTER TABLE public.notifications ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Users can view their own notifications" ON public.notifications;
+CREATE POLICY "Users can view their own notifications"
+  ON public.notifications FOR SELECT
+  USING (auth.uid() = user_id);
+
+-- ============================================
+-- STEP 2: updated_at column
+-- ============================================
+
+ALTER TABLE public.notifications ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ;
+
+UPDATE public.notifications SET updated_at = created_at WHERE updated_at IS NULL;
+
+ALTER TABLE public.notifications
+  ALTER COLUMN updated_at SET DEFAULT NOW(),
+  ALTER COLUMN updated_at SET NOT NULL;
+
+COMMENT ON COLUMN public.notifications.updated_at IS 'Bumped on every change (read state, coalescing) for incremental sync';
+
+-- ============================================
+-- STEP 3: Trigger to bump updated_at
+-- ============================================
+
+DROP TRIGGER IF EXISTS update_notifications_updated_at ON public.notifications;
+CREATE TRIGGER update_notifications_updated_at
+  BEFORE UPDATE ON public.notifications
+  FOR EACH ROW
+  EXECUTE FUNCTION update_updated_at_column();
+
+-- ============================================
+-- STEP 4: Index for "changed since" queries
+-- ============================================
+
+-- Delta pages: user_id = ? AND (updated_at, id) > (?, ?) ORDER BY updated_at, id
+-- ETag: MAX(updated_at) WHERE user_id = ?
+CREATE INDEX IF NOT EXISTS idx_notifications_user_updated_at
+  ON public.notifications (user_id, updated_at, id);
+
+-- ============================================
+-- Summary
+-- ============================================
+-- - Recreated notifications (if missing) to match the Django model
+-- - Added notifications.updated_at with a BEFORE UPDATE trigger
+-- - Added (user_id, updated_at, id) index for delta and ETag queries
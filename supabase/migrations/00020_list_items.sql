@@ -0,0 +1,138 @@
+-- Migration: Ordered List Items, Bookmarks and Stats
+--
+-- Problem: The Django API stores list contents as list_items rows ordered by
+-- a lexicographic key, and list discovery reads list_bookmarks and
+-- list_stats, but none of these tables exist in SQL. 00009 also dropped the
+-- original lists table; the Django API has recreated it from its model.
+--
+-- Solution:
+-- 1. (Re)create lists as the Django model defines it, if missing
+-- 2. Add list_items, with position in the "C" collation so keys sort
+--    byte-wise, the way apps/lists/ordering.py generates them
+-- 3. Add list_bookmarks and list_stats for trending lists
+--
+-- Legacy lists.restaurants arrays are merged into list_items by
+-- `python manage.py migrate_list_items`; until then the API reads the array.
+
+-- ============================================
+-- STEP 1: Lists table
+-- ============================================
+
+CREATE TABLE IF NOT EXISTS public.lists (
+  id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+  user_id UUID NOT NULL REFERENCES public.users(id) ON DELETE CASCADE,
+  name VARCHAR(200) NOT NULL,
+  description TEXT NOT NULL DEFAULT '',
+  restaurants UUID[] NOT NULL DEFAULT ARRAY[]::UUID[],
+  is_public BOOLEAN NOT NULL DEFAULT TRUE,
+  category VARCHAR(20) NOT NULL DEFAULT 'restaurants',
+  list_type VARCHAR(20) NOT NULL DEFAULT 'playlists',
+  thumbnail_image VARCHAR(500),
+  is_featured BOOLEAN NOT NULL DEFAULT FALSE,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_lists_user_id ON public.lists (user_id);
+
+COMMENT ON COLUMN public.lists.restaurants IS 'Legacy - contents live in list_items (see migrate_list_items)';
+
+DROP TRIGGER IF EXISTS update_lists_updated_at ON public.lists;
+CREATE TRIGGER update_lists_updated_at
+  BEFORE UPDATE ON public.lists
+  FOR EACH ROW
+  EXECUTE FUNCTION update_updated_at_column();
+
+ALTER TABLE public.lists ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Users can view public lists and own lists" ON public.lists;
+CREATE POLICY "Users can view public lists and own lists"
+  ON public.lists FOR SELECT
+  USING (is_public = true OR auth.uid() = user_id);
+
+-- ============================================
+-- STEP 2: List items
+-- ============================================
+
+CREATE TABLE IF NOT EXISTS public.list_items (
+  id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+  list_id UUID NOT NULL REFERENCES public.lists(id) ON DELETE CASCADE,
+  restaurant_id UUID NOT NULL REFERENCES public.restaurants(id) ON DELETE CASCADE,
+  position VARCHAR(255) COLLATE "C" NOT NULL,
+  added_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  UNIQUE (list_id, restaurant_id),
+  -- Also serves list pages: list_id = ? AND position > ? ORDER BY position
+  UNIQUE (list_id, position)
+);
+
+-- Lists containing a restaurant
+CREATE INDEX IF NOT EXISTS idx_list_items_restaurant_id ON public.list_items (restaurant_id);
+
+COMMENT ON TABLE public.list_items IS 'Restaurants in a list, ordered by position';
+COMMENT ON COLUMN public.list_items.position IS 'Base-62 order key compared byte-wise; inserts and moves write one row';
+
+ALTER TABLE public.list_items ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "List items follow list visibility" ON public.list_items;
+CREATE POLICY "List items follow list visibility"
+  ON public.list_items FOR SELECT
+  USING (EXISTS (
+    SELECT 1 FROM public.lists l
+    WHERE l.id = list_id AND (l.is_public = true OR auth.uid() = l.user_id)
+  ));
+
+-- ============================================
+-- STEP 3: Bookmarks and trending stats
+-- ============================================
+
+CREATE TABLE IF NOT EXISTS public.list_bookmarks (
+  id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+  user_id UUID NOT NULL REFERENCES public.users(id) ON DELETE CASCADE,
+  list_id UUID NOT NULL REFERENCES public.lists(id) ON DELETE CASCADE,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  UNIQUE (user_id, list_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_list_bookmarks_list_id ON public.list_bookmarks (list_id);
+
+ALTER TABLE public.list_bookmarks ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Users can view their own list bookmarks" ON public.list_bookmarks;
+CREATE POLICY "Users can view their own list bookmarks"
+  ON public.list_bookmarks FOR SELECT
+  USING (auth.uid() = user_id);
+
+CREATE TABLE IF NOT EXISTS public.list_stats (
+  list_id UUID PRIMARY KEY REFERENCES public.lists(id) ON DELETE CASCADE,
+  bookmark_count INTEGER NOT NULL DEFAULT 0,
+  view_count INTEGER NOT NULL DEFAULT 0,
+  trending_score DOUBLE PRECISION NOT NULL DEFAULT 0,
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_list_stats_trending_score
+  ON public.list_stats (trending_score DESC);
+
+COMMENT ON COLUMN public.list_stats.trending_score IS 'Forward-decayed views and bookmarks in log space (see apps/core/decay.py)';
+
+-- Counts of existing bookmarks; rebuild trending_score with
+-- `python manage.py refresh_list_scores`
+INSERT INTO public.list_stats (list_id, bookmark_count)
+SELECT list_id, COUNT(*)
+FROM public.list_bookmarks
+GROUP BY list_id
+ON CONFLICT (list_id) DO UPDATE SET bookmark_count = EXCLUDED.bookmark_count;
+
+ALTER TABLE public.list_stats ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Anyone can view list stats" ON public.list_stats;
+CREATE POLICY "Anyone can view list stats"
+  ON public.list_stats FOR SELECT
+  USING (true);
+
+-- ============================================
+-- Summary
+-- ============================================
+-- - Recreated lists (if missing) to match the Django model
+-- - Added list_items with a "C"-collated (list_id, position) key
+-- - Added list_bookmarks and list_stats with a trending_score index
@@ -0,0 +1,74 @@
+-- Migration: Group Dinner Session Suggestion State
+--
+-- Problem: Group dinner sessions now keep their category and incrementally
+-- maintained suggestion state (participants' want-to-try and recent-visit
+-- sets, and the candidate set) between requests, but no SQL migration adds
+-- those columns. 00009 dropped the original group_dinner_sessions table; the
+-- Django API has recreated it from its model.
+--
+-- Solution:
+-- 1. (Re)create group_dinner_sessions as the Django model defined it, if
+--    missing
+-- 2. Add category, suggestion_state and updated_at, on new and existing
+--    tables alike
+-- 3. Keep updated_at current with the shared trigger function
+
+-- ============================================
+-- STEP 1: Sessions table
+-- ============================================
+
+CREATE TABLE IF NOT EXISTS public.group_dinner_sessions (
+  id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+  user_id UUID NOT NULL REFERENCES public.users(id) ON DELETE CASCADE,
+  participants UUID[] NOT NULL DEFAULT ARRAY[]::UUID[],
+  selected_restaurant_id UUID REFERENCES public.restaurants(id) ON DELETE SET NULL,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_group_dinner_sessions_user_id
+  ON public.group_dinner_sessions (user_id);
+
+ALTER TABLE public.group_dinner_sessions ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Users can view their own group dinner sessions" ON public.group_dinner_sessions;
+CREATE POLICY "Users can view their own group dinner sessions"
+  ON public.group_dinner_sessions FOR SELECT
+  USING (auth.uid() = user_id OR auth.uid() = ANY(participants));
+
+-- ============================================
+-- STEP 2: Suggestion state columns
+-- ============================================
+
+ALTER TABLE public.group_dinner_sessions ADD COLUMN IF NOT EXISTS category VARCHAR(20);
+ALTER TABLE public.group_dinner_sessions ADD COLUMN IF NOT EXISTS suggestion_state JSONB;
+ALTER TABLE public.group_dinner_sessions ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ;
+
+-- Empty state is rebuilt on the session's next suggestion request
+UPDATE public.group_dinner_sessions SET suggestion_state = '{}'::jsonb WHERE suggestion_state IS NULL;
+UPDATE public.group_dinner_sessions SET updated_at = created_at WHERE updated_at IS NULL;
+
+ALTER TABLE public.group_dinner_sessions
+  ALTER COLUMN suggestion_state SET DEFAULT '{}'::jsonb,
+  ALTER COLUMN suggestion_state SET NOT NULL,
+  ALTER COLUMN updated_at SET DEFAULT NOW(),
+  ALTER COLUMN updated_at SET NOT NULL;
+
+COMMENT ON COLUMN public.group_dinner_sessions.category IS 'Restaurant category suggestions are filtered to (NULL = any)';
+COMMENT ON COLUMN public.group_dinner_sessions.suggestion_state IS 'Participants'' want-to-try/recent-visit sets and candidate set, updated by delta (see GroupSuggestionSessionService)';
+
+-- ============================================
+-- STEP 3: Trigger to bump updated_at
+-- ============================================
+
+DROP TRIGGER IF EXISTS update_group_dinner_sessions_updated_at ON public.group_dinner_sessions;
+CREATE TRIGGER update_group_dinner_sessions_updated_at
+  BEFORE UPDATE ON public.group_dinner_sessions
+  FOR EACH ROW
+  EXECUTE FUNCTION update_updated_at_column();
+
+-- ============================================
+-- Summary
+-- ============================================
+-- - Recreated group_dinner_sessions (if missing) to match the Django model
+-- - Added category, suggestion_state and updated_at columns
+-- - Added BEFORE UPDATE trigger for updated_at
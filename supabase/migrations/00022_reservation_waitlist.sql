@@ -0,0 +1,82 @@
+-- Migration: Reservation Claims and Waitlist
+--
+-- Problem: Reservation claims queue losing users in reservation_waitlist
+-- and hand releases to the head of the queue, but the table exists only in
+-- the Django model. 00009 dropped the original reservations table; the
+-- Django API has recreated it from its model.
+--
+-- Solution:
+-- 1. (Re)create reservations as the Django model defines it, if missing
+-- 2. Index open seats by slot for "claim any seat in this drop"
+-- 3. Add reservation_waitlist, served in id (arrival) order
+
+-- ============================================
+-- STEP 1: Reservations table
+-- ============================================
+
+CREATE TABLE IF NOT EXISTS public.reservations (
+  id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+  restaurant_id UUID NOT NULL REFERENCES public.restaurants(id) ON DELETE CASCADE,
+  user_id UUID NOT NULL REFERENCES public.users(id) ON DELETE CASCADE,
+  date_time TIMESTAMPTZ NOT NULL,
+  party_size INTEGER NOT NULL,
+  status VARCHAR(20) NOT NULL DEFAULT 'available',
+  claimed_by_id UUID REFERENCES public.users(id) ON DELETE SET NULL,
+  shared_with UUID[] NOT NULL DEFAULT ARRAY[]::UUID[],
+  notes TEXT,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_reservations_user_id ON public.reservations (user_id);
+CREATE INDEX IF NOT EXISTS idx_reservations_claimed_by_id ON public.reservations (claimed_by_id);
+
+ALTER TABLE public.reservations ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Anyone can view reservations" ON public.reservations;
+CREATE POLICY "Anyone can view reservations"
+  ON public.reservations FOR SELECT
+  USING (true);
+
+-- ============================================
+-- STEP 2: Open seat index
+-- ============================================
+
+-- claim_next: restaurant_id = ? AND date_time = ? AND status = 'available'
+-- ORDER BY party_size, id ... FOR UPDATE SKIP LOCKED
+CREATE INDEX IF NOT EXISTS idx_reservations_open_slot
+  ON public.reservations (restaurant_id, date_time, party_size, id)
+  WHERE status = 'available';
+
+-- ============================================
+-- STEP 3: Waitlist table
+-- ============================================
+
+CREATE TABLE IF NOT EXISTS public.reservation_waitlist (
+  id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+  reservation_id UUID NOT NULL REFERENCES public.reservations(id) ON DELETE CASCADE,
+  user_id UUID NOT NULL REFERENCES public.users(id) ON DELETE CASCADE,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  UNIQUE (reservation_id, user_id)
+);
+
+-- Head of the queue and positions: reservation_id = ? ORDER BY id
+CREATE INDEX IF NOT EXISTS idx_reservation_waitlist_reservation_id
+  ON public.reservation_waitlist (reservation_id, id);
+CREATE INDEX IF NOT EXISTS idx_reservation_waitlist_user_id
+  ON public.reservation_waitlist (user_id);
+
+COMMENT ON TABLE public.reservation_waitlist IS 'Users queued for a claimed reservation, first come first served. Written by the Django API (see ReservationClaimService).';
+
+ALTER TABLE public.reservation_waitlist ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Users can view their own waitlist entries" ON public.reservation_waitlist;
+CREATE POLICY "Users can view their own waitlist entries"
+  ON public.reservation_waitlist FOR SELECT
+  USING (auth.uid() = user_id);
+
+-- ============================================
+-- Summary
+-- ============================================
+-- - Recreated reservations (if missing) to match the Django model
+-- - Added partial index on open seats per slot
+-- - Added reservation_waitlist with (reservation_id, id) queue index
@@ -0,0 +1,105 @@
+-- Migration: Tastemaker Post Like and Bookmark Counters
+--
+-- Problem: Post likes and bookmarks are rows in tastemaker_post_interactions,
+-- and the API reads totals from like_count / bookmark_count counter columns
+-- instead of counting rows, but no SQL migration adds those columns. 00009
+-- dropped the original tastemaker_posts table (with its likes/bookmarks
+-- arrays); the Django API has recreated it from its model.
+--
+-- Solution:
+-- 1. (Re)create tastemaker_posts and tastemaker_post_interactions as the
+--    Django models define them, if missing
+-- 2. Add like_count and bookmark_count, backfilled from the interactions
+--
+-- PostInteractionService moves the counters in the same transaction as
+-- each interaction row. The backfill recomputes every post, so re-running
+-- this migration also repairs counters written outside the API.
+
+-- ============================================
+-- STEP 1: Posts and interactions tables
+-- ============================================
+
+CREATE TABLE IF NOT EXISTS public.tastemaker_posts (
+  id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+  user_id UUID NOT NULL REFERENCES public.users(id) ON DELETE CASCADE,
+  title VARCHAR(300) NOT NULL,
+  subtitle VARCHAR(500),
+  cover_image VARCHAR(500) NOT NULL,
+  content TEXT NOT NULL,
+  restaurant_ids UUID[] NOT NULL DEFAULT ARRAY[]::UUID[],
+  list_ids UUID[] NOT NULL DEFAULT ARRAY[]::UUID[],
+  tags VARCHAR(50)[] NOT NULL DEFAULT ARRAY[]::VARCHAR(50)[],
+  is_featured BOOLEAN NOT NULL DEFAULT FALSE,
+  published_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  view_count INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE INDEX IF NOT EXISTS idx_tastemaker_posts_user_id ON public.tastemaker_posts (user_id);
+
+DROP TRIGGER IF EXISTS update_tastemaker_posts_updated_at ON public.tastemaker_posts;
+CREATE TRIGGER update_tastemaker_posts_updated_at
+  BEFORE UPDATE ON public.tastemaker_posts
+  FOR EACH ROW
+  EXECUTE FUNCTION update_updated_at_column();
+
+ALTER TABLE public.tastemaker_posts ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Anyone can view tastemaker posts" ON public.tastemaker_posts;
+CREATE POLICY "Anyone can view tastemaker posts"
+  ON public.tastemaker_posts FOR SELECT
+  USING (true);
+
+CREATE TABLE IF NOT EXISTS public.tastemaker_post_interactions (
+  id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+  user_id UUID NOT NULL REFERENCES public.users(id) ON DELETE CASCADE,
+  post_id UUID NOT NULL REFERENCES public.tastemaker_posts(id) ON DELETE CASCADE,
+  interaction_type VARCHAR(20) NOT NULL,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  UNIQUE (user_id, post_id, interaction_type)
+);
+
+-- Counter backfill: post_id = ? AND interaction_type = ?
+CREATE INDEX IF NOT EXISTS idx_tastemaker_post_interactions_post_id
+  ON public.tastemaker_post_interactions (post_id, interaction_type);
+
+ALTER TABLE public.tastemaker_post_interactions ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Users can view their own post interactions" ON public.tastemaker_post_interactions;
+CREATE POLICY "Users can view their own post interactions"
+  ON public.tastemaker_post_interactions FOR SELECT
+  USING (auth.uid() = user_id);
+
+-- ============================================
+-- STEP 2: Counter columns
+-- ============================================
+
+ALTER TABLE public.tastemaker_posts ADD COLUMN IF NOT EXISTS like_count INTEGER;
+ALTER TABLE public.tastemaker_posts ADD COLUMN IF NOT EXISTS bookmark_count INTEGER;
+
+-- Backfill from the interaction rows
+UPDATE public.tastemaker_posts p
+SET like_count = (
+      SELECT COUNT(*) FROM public.tastemaker_post_interactions i
+      WHERE i.post_id = p.id AND i.interaction_type = 'like'
+    ),
+    bookmark_count = (
+      SELECT COUNT(*) FROM public.tastemaker_post_interactions i
+      WHERE i.post_id = p.id AND i.interaction_type = 'bookmark'
+    );
+
+ALTER TABLE public.tastemaker_posts
+  ALTER COLUMN like_count SET DEFAULT 0,
+  ALTER COLUMN like_count SET NOT NULL,
+  ALTER COLUMN bookmark_count SET DEFAULT 0,
+  ALTER COLUMN bookmark_count SET NOT NULL;
+
+COMMENT ON COLUMN public.tastemaker_posts.like_count IS 'Likes in tastemaker_post_interactions, kept by PostInteractionService';
+COMMENT ON COLUMN public.tastemaker_posts.bookmark_count IS 'Bookmarks in tastemaker_post_interactions, kept by PostInteractionService';
+
+-- ============================================
+-- Summary
+-- ============================================
+-- - Recreated tastemaker_posts and tastemaker_post_interactions (if
+--   missing) to match the Django models
+-- - Added like_count and bookmark_count, backfilled from interactions
@@ -0,0 +1,76 @@
+-- Migration: Tastemaker Post Hot Score
+--
+-- Problem: The trending feed orders tastemaker posts by a hot_score column
+-- (ORDER BY hot_score DESC, optionally featured posts only), but no SQL
+-- migration adds the column or the indexes that serve those orderings.
+--
+-- Solution:
+-- 1. Add hot_score, backfilled from publish time, views and interactions
+-- 2. Index it for the trending and featured feeds
+--
+-- hot_score is a forward-decayed score stored in log space (see
+-- apps/core/decay.py): ln(sum of weight * 2^((t - 2025-01-01) / 2 days))
+-- over the post's events. The backfill uses PostRankingService's weights
+-- (publish 20, view 1, like 4, bookmark 8) and, like refresh(), credits
+-- views at publish time. It only fills rows without a score, so re-running
+-- this migration leaves scores moved by the API alone; use
+-- `python manage.py refresh_post_scores` to rebuild them.
+
+-- ============================================
+-- STEP 1: Hot score column
+-- ============================================
+
+ALTER TABLE public.tastemaker_posts ADD COLUMN IF NOT EXISTS hot_score DOUBLE PRECISION;
+
+-- Log-space score of each event, then log-sum-exp per post (offset by the
+-- largest term so exp() stays in range)
+WITH events AS (
+  SELECT p.id AS post_id,
+         LN(20 + p.view_count) + LN(2) * EXTRACT(EPOCH FROM p.published_at - TIMESTAMPTZ '2025-01-01 00:00:00+00') / 172800 AS score
+  FROM public.tastemaker_posts p
+  WHERE p.hot_score IS NULL
+  UNION ALL
+  SELECT i.post_id,
+         LN(CASE i.interaction_type WHEN 'like' THEN 4 ELSE 8 END)
+           + LN(2) * EXTRACT(EPOCH FROM i.created_at - TIMESTAMPTZ '2025-01-01 00:00:00+00') / 172800
+  FROM public.tastemaker_post_interactions i
+  JOIN public.tastemaker_posts p ON p.id = i.post_id
+  WHERE p.hot_score IS NULL AND i.interaction_type IN ('like', 'bookmark')
+),
+peaks AS (
+  SELECT post_id, MAX(score) AS peak FROM events GROUP BY post_id
+),
+scores AS (
+  SELECT e.post_id, k.peak + LN(SUM(EXP(GREATEST(e.score - k.peak, -700)))) AS hot_score
+  FROM events e
+  JOIN peaks k ON k.post_id = e.post_id
+  GROUP BY e.post_id, k.peak
+)
+UPDATE public.tastemaker_posts p
+SET hot_score = s.hot_score
+FROM scores s
+WHERE s.post_id = p.id;
+
+ALTER TABLE public.tastemaker_posts
+  ALTER COLUMN hot_score SET DEFAULT 0,
+  ALTER COLUMN hot_score SET NOT NULL;
+
+COMMENT ON COLUMN public.tastemaker_posts.hot_score IS 'Log-space forward-decayed engagement score (see apps/core/decay.py), kept by PostRankingService';
+
+-- ============================================
+-- STEP 2: Feed indexes
+-- ============================================
+
+-- Trending: ORDER BY hot_score DESC
+CREATE INDEX IF NOT EXISTS idx_tastemaker_posts_hot_score
+  ON public.tastemaker_posts (hot_score DESC);
+
+-- Featured: is_featured = TRUE ORDER BY hot_score DESC
+CREATE INDEX IF NOT EXISTS idx_tastemaker_posts_featured_hot_score
+  ON public.tastemaker_posts (is_featured, hot_score DESC);
+
+-- ============================================
+-- Summary
+-- ============================================
+-- - Added hot_score, backfilled from publish time, views and interactions
+-- - Added (hot_score DESC) and (is_featured, hot_score DESC) indexes
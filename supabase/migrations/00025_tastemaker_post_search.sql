@@ -0,0 +1,63 @@
+-- Migration: Tastemaker Post Full-Text Search
+--
+-- Problem: Post search matches and ranks tastemaker posts on a weighted
+-- search_vector column through a GIN index, but no SQL migration adds the
+-- column or the index, and nothing keeps the vector current for posts
+-- written outside the Django API.
+--
+-- Solution:
+-- 1. Add search_vector
+-- 2. Keep it current with a BEFORE INSERT OR UPDATE trigger
+-- 3. Backfill existing posts and add the GIN index
+--
+-- Weights match apps/tastemakers/search.py: title A, tags and subtitle B,
+-- content C, all with the english config. Requires 00023.
+
+-- ============================================
+-- STEP 1: Search vector column
+-- ============================================
+
+ALTER TABLE public.tastemaker_posts ADD COLUMN IF NOT EXISTS search_vector TSVECTOR;
+
+COMMENT ON COLUMN public.tastemaker_posts.search_vector IS 'Weighted title/tags/subtitle/content tsvector, kept by update_tastemaker_post_search_vector()';
+
+-- ============================================
+-- STEP 2: Trigger to keep it current
+-- ============================================
+
+CREATE OR REPLACE FUNCTION update_tastemaker_post_search_vector()
+RETURNS TRIGGER AS $$
+BEGIN
+  NEW.search_vector :=
+    setweight(to_tsvector('english', COALESCE(NEW.title, '')), 'A')
+    || setweight(to_tsvector('english', COALESCE(array_to_string(NEW.tags, ' '), '')), 'B')
+    || setweight(to_tsvector('english', COALESCE(NEW.subtitle, '')), 'B')
+    || setweight(to_tsvector('english', COALESCE(NEW.content, '')), 'C');
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Counter and hot_score updates don't touch the text, so skip them
+DROP TRIGGER IF EXISTS update_tastemaker_posts_search_vector ON public.tastemaker_posts;
+CREATE TRIGGER update_tastemaker_posts_search_vector
+  BEFORE INSERT OR UPDATE OF title, subtitle, content, tags ON public.tastemaker_posts
+  FOR EACH ROW
+  EXECUTE FUNCTION update_tastemaker_post_search_vector();
+
+-- ============================================
+-- STEP 3: Backfill and index
+-- ============================================
+
+-- Fires the trigger for every post
+UPDATE public.tastemaker_posts SET title = title;
+
+-- Search: search_vector @@ websearch_to_tsquery('english', ?)
+CREATE INDEX IF NOT EXISTS idx_tastemaker_posts_search_vector
+  ON public.tastemaker_posts USING GIN (search_vector);
+
+-- ============================================
+-- Summary
+-- ============================================
+-- - Added search_vector, kept current by a BEFORE INSERT OR UPDATE trigger
+-- - Backfilled existing posts
+-- - Added GIN index on search_vector
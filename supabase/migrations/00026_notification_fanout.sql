@@ -0,0 +1,95 @@
+-- Migration: Notification Fan-out Queue and Coalescing
+--
+-- Problem: Request handlers queue notification events in
+-- notification_events, and the fan-out worker coalesces them into
+-- notifications keyed by group_key ("devin and 4 others liked your rating
+-- of"), keeping the distinct actors in actor_ids/actor_count. None of that
+-- exists in SQL.
+--
+-- Solution:
+-- 1. Add the notification_events queue
+-- 2. Add group_key, actor_ids and actor_count to notifications, backfilled
+--    so unread notifications keep coalescing
+-- 3. Index (user_id, group_key, created_at DESC) for the worker's lookup of
+--    open notifications
+--
+-- Requires 00019 (notifications table).
+
+-- ============================================
+-- STEP 1: Event queue
+-- ============================================
+
+CREATE TABLE IF NOT EXISTS public.notification_events (
+  id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+  event_type VARCHAR(30) NOT NULL,
+  recipient_id UUID NOT NULL,
+  actor_id UUID,
+  target_restaurant_id UUID,
+  target_list VARCHAR(200),
+  comment_text TEXT,
+  streak_count INTEGER,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- Unlike, unfollow ...: takes the actor back out of the notification
+ALTER TABLE public.notification_events ADD COLUMN IF NOT EXISTS retract BOOLEAN NOT NULL DEFAULT FALSE;
+
+COMMENT ON TABLE public.notification_events IS 'Queued events, turned into notifications and deleted in id order by process_notification_events (see apps/notifications).';
+
+-- Worker only (ORDER BY id ... FOR UPDATE SKIP LOCKED); no client access
+ALTER TABLE public.notification_events ENABLE ROW LEVEL SECURITY;
+
+-- ============================================
+-- STEP 2: Coalescing columns
+-- ============================================
+
+ALTER TABLE public.notifications ADD COLUMN IF NOT EXISTS group_key VARCHAR(200);
+ALTER TABLE public.notifications ADD COLUMN IF NOT EXISTS actor_ids JSONB;
+ALTER TABLE public.notifications ADD COLUMN IF NOT EXISTS actor_count INTEGER;
+
+-- Same key as NotificationFanoutService.group_key(); other types never
+-- coalesce
+UPDATE public.notifications
+SET group_key = CASE
+      WHEN notification_type IN ('rating_liked', 'bookmark_liked', 'follow', 'list_bookmark')
+      THEN notification_type || ':' || COALESCE(target_restaurant_id::text, '') || ':' || COALESCE(target_list, '')
+      ELSE ''
+    END
+WHERE group_key IS NULL;
+
+UPDATE public.notifications
+SET actor_ids = CASE
+      WHEN actor_user_id IS NULL THEN '[]'::jsonb
+      ELSE jsonb_build_array(actor_user_id::text)
+    END
+WHERE actor_ids IS NULL;
+
+UPDATE public.notifications SET actor_count = 1 WHERE actor_count IS NULL;
+
+ALTER TABLE public.notifications
+  ALTER COLUMN group_key SET DEFAULT '',
+  ALTER COLUMN group_key SET NOT NULL,
+  ALTER COLUMN actor_ids SET DEFAULT '[]'::jsonb,
+  ALTER COLUMN actor_ids SET NOT NULL,
+  ALTER COLUMN actor_count SET DEFAULT 1,
+  ALTER COLUMN actor_count SET NOT NULL;
+
+COMMENT ON COLUMN public.notifications.group_key IS 'Coalescing key: unread notifications with the same key absorb new events ('''' = never coalesces)';
+COMMENT ON COLUMN public.notifications.actor_ids IS 'Distinct actor ids, latest last';
+COMMENT ON COLUMN public.notifications.actor_count IS 'Length of actor_ids';
+
+-- ============================================
+-- STEP 3: Open notification index
+-- ============================================
+
+-- Fan-out: user_id IN (...) AND group_key IN (...) AND is_read = FALSE
+-- AND created_at >= NOW() - window
+CREATE INDEX IF NOT EXISTS idx_notifications_user_group_key_created_at
+  ON public.notifications (user_id, group_key, created_at DESC);
+
+-- ============================================
+-- Summary
+-- ============================================
+-- - Added notification_events (with retract), worker access only
+-- - Added notifications.group_key, actor_ids and actor_count, backfilled
+-- - Added (user_id, group_key, created_at DESC) index
@@ -0,0 +1,65 @@
+-- Migration: Unread Notification Counters
+--
+-- Problem: Badge polling reads each user's unread count from
+-- notification_counters, moved in step with notification inserts and
+-- read/read-all, instead of counting rows, but the table exists only in the
+-- Django model.
+--
+-- Solution:
+-- 1. Add notification_counters, one row per user
+-- 2. Backfill it from current unread notifications
+--
+-- Requires 00019 (notifications table). Re-running the backfill resets
+-- every counter to the actual count, like
+-- `python manage.py reconcile_notification_counters`.
+
+-- ============================================
+-- STEP 1: Counters table
+-- ============================================
+
+CREATE TABLE IF NOT EXISTS public.notification_counters (
+  user_id UUID PRIMARY KEY REFERENCES public.users(id) ON DELETE CASCADE,
+  unread_count INTEGER NOT NULL DEFAULT 0,
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+COMMENT ON TABLE public.notification_counters IS 'Unread notifications per user, kept by the Django API (see UnreadCounterService). No row = not counted yet.';
+
+DROP TRIGGER IF EXISTS update_notification_counters_updated_at ON public.notification_counters;
+CREATE TRIGGER update_notification_counters_updated_at
+  BEFORE UPDATE ON public.notification_counters
+  FOR EACH ROW
+  EXECUTE FUNCTION update_updated_at_column();
+
+ALTER TABLE public.notification_counters ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Users can view their own notification counter" ON public.notification_counters;
+CREATE POLICY "Users can view their own notification counter"
+  ON public.notification_counters FOR SELECT
+  USING (auth.uid() = user_id);
+
+-- ============================================
+-- STEP 2: Backfill unread counts
+-- ============================================
+
+INSERT INTO public.notification_counters (user_id, unread_count)
+SELECT user_id, COUNT(*)
+FROM public.notifications
+WHERE is_read = FALSE
+GROUP BY user_id
+ON CONFLICT (user_id) DO UPDATE SET unread_count = EXCLUDED.unread_count;
+
+-- Counters whose notifications have all been read since
+UPDATE public.notification_counters c
+SET unread_count = 0
+WHERE c.unread_count <> 0
+  AND NOT EXISTS (
+    SELECT 1 FROM public.notifications n
+    WHERE n.user_id = c.user_id AND n.is_read = FALSE
+  );
+
+-- ============================================
+-- Summary
+-- ============================================
+-- - Added notification_counters (one row per user) with updated_at trigger
+-- - Backfilled unread counts from notifications